@@ -0,0 +1,123 @@
+import datetime
+from typing import Dict, Union
+
+import numpy as np
+
+# Range covered by the precomputed calendar
+CALENDAR_START = datetime.date(2000, 1, 1)
+CALENDAR_END = datetime.date(2050, 12, 31)
+
+# Brazilian convention for annualizing business days
+BUSINESS_DAYS_PER_YEAR = 252
+
+DateLike = Union[datetime.date, np.datetime64, str]
+
+def easter_sunday(year: int) -> datetime.date:
+    """Gregorian Easter (anonymous algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+def b3_holidays(year: int) -> Dict[datetime.date, str]:
+    """Dates on which the B3 equities and options markets are closed, with their names."""
+    easter = easter_sunday(year)
+    holidays = {
+        datetime.date(year, 1, 1): "Confraternização Universal",
+        easter - datetime.timedelta(days=48): "Carnaval",
+        easter - datetime.timedelta(days=47): "Carnaval",
+        easter - datetime.timedelta(days=2): "Sexta-feira Santa",
+        datetime.date(year, 4, 21): "Tiradentes",
+        datetime.date(year, 5, 1): "Dia do Trabalho",
+        easter + datetime.timedelta(days=60): "Corpus Christi",
+        datetime.date(year, 9, 7): "Independência",
+        datetime.date(year, 10, 12): "Nossa Senhora Aparecida",
+        datetime.date(year, 11, 2): "Finados",
+        datetime.date(year, 11, 15): "Proclamação da República",
+        datetime.date(year, 12, 24): "Véspera de Natal",
+        datetime.date(year, 12, 25): "Natal",
+        datetime.date(year, 12, 31): "Último dia do ano",
+    }
+    # São Paulo municipal/state holidays closed B3 until 2021
+    if year <= 2021:
+        holidays[datetime.date(year, 1, 25)] = "Aniversário de São Paulo"
+        holidays[datetime.date(year, 7, 9)] = "Revolução Constitucionalista"
+    if year <= 2021 or year >= 2024:
+        # Municipal until 2021, national holiday since 2024
+        holidays[datetime.date(year, 11, 20)] = "Consciência Negra"
+    return holidays
+
+def _build_calendar():
+    n_days = (CALENDAR_END - CALENDAR_START).days + 1
+    offsets = np.arange(n_days)
+    # date.weekday() == (ordinal + 6) % 7
+    weekdays = (CALENDAR_START.toordinal() + offsets + 6) % 7
+    trading = weekdays < 5
+    for year in range(CALENDAR_START.year, CALENDAR_END.year + 1):
+        for holiday in b3_holidays(year):
+            trading[(holiday - CALENDAR_START).days] = False
+    # cumulative[i] = trading days strictly before offset i
+    cumulative = np.concatenate([[0], np.cumsum(trading)])
+    # Offset of the latest trading day on or before each offset (-1 if none)
+    on_or_before = np.maximum.accumulate(np.where(trading, offsets, -1))
+    return trading, cumulative, on_or_before
+
+_TRADING, _CUMULATIVE, _ON_OR_BEFORE = _build_calendar()
+_EPOCH_OFFSET = (CALENDAR_START - datetime.date(1970, 1, 1)).days
+
+def _offsets(dates) -> np.ndarray:
+    """Day offsets from CALENDAR_START for a date or array of dates."""
+    if isinstance(dates, datetime.datetime):
+        dates = dates.date()
+    if isinstance(dates, datetime.date):
+        offsets = np.asarray((dates - CALENDAR_START).days)
+    else:
+        offsets = np.asarray(dates, dtype='datetime64[D]').astype(np.int64) - _EPOCH_OFFSET
+    if np.any((offsets < 0) | (offsets >= _TRADING.size)):
+        raise ValueError(f"Date outside the B3 calendar ({CALENDAR_START} to {CALENDAR_END})")
+    return offsets
+
+def _to_date(offset) -> datetime.date:
+    return CALENDAR_START + datetime.timedelta(days=int(offset))
+
+def is_trading_day(date: DateLike):
+    result = _TRADING[_offsets(date)]
+    return bool(result) if np.ndim(result) == 0 else result
+
+def latest_trading_day(date: datetime.date) -> datetime.date:
+    """`date` itself if B3 trades on it, otherwise the previous trading day."""
+    offset = _ON_OR_BEFORE[_offsets(date)]
+    if offset < 0:
+        raise ValueError(f"No trading day on or before {date} in the B3 calendar")
+    return _to_date(offset)
+
+def previous_trading_day(date: datetime.date) -> datetime.date:
+    """Latest trading day strictly before `date`."""
+    return latest_trading_day(date - datetime.timedelta(days=1))
+
+def next_trading_day(date: datetime.date) -> datetime.date:
+    """Earliest trading day strictly after `date`."""
+    offset = int(_offsets(date)) + 1
+    remaining = np.flatnonzero(_TRADING[offset:])
+    if remaining.size == 0:
+        raise ValueError(f"No trading day after {date} in the B3 calendar")
+    return _to_date(offset + remaining[0])
+
+def business_days_between(start, end):
+    """
+    Trading days in [start, end), B3's "dias úteis" count. Accepts dates or
+    arrays of dates (broadcast together); negative when end precedes start.
+    """
+    result = _CUMULATIVE[_offsets(end)] - _CUMULATIVE[_offsets(start)]
+    return int(result) if np.ndim(result) == 0 else result
+
+def year_fraction(start, end):
+    """Business-day year fraction (dias úteis / 252) used for pricing maturities."""
+    return business_days_between(start, end) / BUSINESS_DAYS_PER_YEAR
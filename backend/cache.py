@@ -0,0 +1,253 @@
+import datetime
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Bump when the cached layout changes so stale files are ignored and replaced
+CACHE_SCHEMA_VERSION = "2"
+
+class ParquetDayCache:
+    """
+    On-disk columnar cache with one Parquet file per trading date.
+    Files are written atomically and carry their row count and schema version
+    in the Parquet metadata; anything that fails those checks is treated as a
+    miss and removed. Files not used for max_age_days are evicted, and the
+    least recently used go first once the directory exceeds max_bytes.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "options",
+        max_age_days: Optional[int] = 30,
+        max_bytes: Optional[int] = 512 * 1024 * 1024
+    ):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, date: datetime.date) -> str:
+        return os.path.join(self.directory, f"{self.prefix}_{date.strftime('%Y%m%d')}.parquet")
+
+    def load(self, date: datetime.date, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Memory-maps the file for `date` and reads only `columns` (all if None)."""
+        path = self.path_for(date)
+        if not os.path.exists(path):
+            return None
+        try:
+            metadata = pq.read_metadata(path)
+            kv = metadata.metadata or {}
+            if kv.get(b"schema_version") != CACHE_SCHEMA_VERSION.encode():
+                raise ValueError("schema version mismatch")
+            if int(kv.get(b"num_rows", b"-1")) != metadata.num_rows:
+                raise ValueError("row count mismatch")
+            if kv.get(b"trading_date") != date.isoformat().encode():
+                raise ValueError("trading date mismatch")
+            table = pq.read_table(path, columns=columns, memory_map=True)
+            # mtime doubles as last-access time for eviction
+            os.utime(path)
+            return table.to_pandas()
+        except Exception as e:
+            print(f"Discarding invalid cache file {path}: {e}")
+            self._remove(path)
+            return None
+
+    def save(self, date: datetime.date, df: pd.DataFrame):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b"schema_version": CACHE_SCHEMA_VERSION.encode(),
+            b"num_rows": str(table.num_rows).encode(),
+            b"trading_date": date.isoformat().encode(),
+        })
+        path = self.path_for(date)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            pq.write_table(table, tmp_path, compression="zstd")
+            os.replace(tmp_path, path)
+        finally:
+            self._remove(tmp_path)
+        self.evict()
+
+    def dates(self) -> List[datetime.date]:
+        """Trading dates currently on disk, oldest first."""
+        found = []
+        for name in os.listdir(self.directory):
+            if name.startswith(f"{self.prefix}_") and name.endswith(".parquet"):
+                try:
+                    found.append(datetime.datetime.strptime(name[len(self.prefix) + 1:-8], "%Y%m%d").date())
+                except ValueError:
+                    continue
+        return sorted(found)
+
+    def evict(self, now: Optional[float] = None):
+        """Drops files unused for max_age_days, then the least recently used until under max_bytes."""
+        now = now if now is not None else datetime.datetime.now().timestamp()
+        files = []
+        for date in self.dates():
+            path = self.path_for(date)
+            stat = os.stat(path)
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        if self.max_age_days is not None:
+            cutoff = now - self.max_age_days * 86400
+            for mtime, _, path in [f for f in files if f[0] < cutoff]:
+                self._remove(path)
+            files = [f for f in files if f[0] >= cutoff]
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _ in files)
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+class _Flight:
+    """A load in progress that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU bounded by the summed size of its values and,
+    with `max_entries`, by its entry count as well.
+    get_or_load() is single-flight: concurrent misses for one key run the
+    loader once and every caller receives that result. Loader results of None
+    are returned but not cached. With `ttl` (seconds), entries older than that
+    are dropped on lookup and count as misses.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 1024 * 1024 * 1024,
+        sizeof: Callable[[Any], int] = frame_nbytes,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        max_entries: Optional[int] = None
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.sizeof = sizeof
+        self.ttl = ttl
+        self.clock = clock
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value):
+        with self._lock:
+            self._put(key, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[Hashable], Any]):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader(key)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.error is None and flight.value is not None:
+                    self._put(key, flight.value)
+            flight.done.set()
+        return flight.value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            # Coalesced callers waited on another caller's load, so they cost nothing extra
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+    def _lookup(self, key: Hashable) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] is not None and self.clock() >= entry[2]:
+            del self._entries[key]
+            self.current_bytes -= entry[1]
+            self.expirations += 1
+            return None
+        return entry
+
+    def _put(self, key: Hashable, value):
+        if key in self._entries:
+            self.current_bytes -= self._entries.pop(key)[1]
+        size = self.sizeof(value)
+        expires = self.clock() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (value, size, expires)
+        self.current_bytes += size
+        # Always keep the newest entry, even if it alone exceeds the budget
+        while len(self._entries) > 1 and (
+            self.current_bytes > self.max_bytes
+            or (self.max_entries is not None and len(self._entries) > self.max_entries)
+        ):
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
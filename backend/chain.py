@@ -0,0 +1,59 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from .b3_calendar import business_days_between, BUSINESS_DAYS_PER_YEAR
+from .logic import calculate_black_scholes_batch, calculate_implied_volatility_batch
+
+# Columns returned by /market/chain/{symbol}, in order
+CHAIN_COLUMNS = [
+    "symbol", "type", "strike", "maturity_date", "business_days", "price", "volume",
+    "moneyness", "implied_volatility", "delta", "gamma", "theta", "vega", "rho",
+]
+
+def chain_analytics(
+    options: pd.DataFrame,
+    spot: float,
+    trading_date: datetime.date,
+    rate: float,
+    dividend: float = 0.0
+) -> pd.DataFrame:
+    """
+    Implied volatility and greeks for every series of a COTAHIST chain in one
+    vectorized pass. Maturities are business days to expiry / 252; moneyness is
+    strike / spot. Series whose last price admits no volatility get NaN IV and
+    greeks. Spot and trading date are kept in the frame's attrs.
+    """
+    is_call = (options['TIPO_DE_MERCADO'] == 'OPCOES_DE_COMPRA').to_numpy()
+    option_type = np.where(is_call, 'CALL', 'PUT')
+    strike = options['PRECO_DE_EXERCICIO'].to_numpy(dtype=float)
+    price = options['PRECO_ULTIMO_NEGOCIO'].to_numpy(dtype=float)
+    expiry = options['DATA_DE_VENCIMENTO'].to_numpy(dtype='datetime64[D]')
+
+    business_days = business_days_between(np.datetime64(trading_date, 'D'), expiry)
+    maturity = business_days / BUSINESS_DAYS_PER_YEAR
+
+    iv = calculate_implied_volatility_batch(price, spot, strike, maturity, rate, option_type, dividend)
+    volatility = iv["implied_volatility"]
+    greeks = calculate_black_scholes_batch(
+        spot, strike, maturity, np.nan_to_num(volatility), rate, option_type, dividend
+    )
+    solved = np.isfinite(volatility)
+
+    columns = {
+        "symbol": options['CODIGO_DE_NEGOCIACAO'].to_numpy(),
+        "type": option_type,
+        "strike": strike,
+        "maturity_date": np.datetime_as_string(expiry),
+        "business_days": business_days,
+        "price": price,
+        "volume": options['VOLUME_TOTAL_NEGOCIADO'].to_numpy(dtype=float),
+        "moneyness": strike / spot,
+        "implied_volatility": volatility,
+    }
+    for greek in ("delta", "gamma", "theta", "vega", "rho"):
+        columns[greek] = np.where(solved, greeks[greek], np.nan)
+    df = pd.DataFrame(columns, columns=CHAIN_COLUMNS)
+    df.attrs = {"spot": spot, "trading_date": trading_date.isoformat()}
+    return df
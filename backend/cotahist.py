@@ -0,0 +1,255 @@
+import datetime
+import io
+import os
+import tempfile
+import time
+import zipfile
+from typing import BinaryIO, Iterable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import requests
+from b3cotahist import CODBDI, FIELD_SIZES, INDOPC, MARKETS
+
+COTAHIST_DAILY_URL = "https://bvmf.bmfbovespa.com.br/InstDados/SerHist/COTAHIST_D{date:%d%m%Y}.ZIP"
+COTAHIST_MONTHLY_URL = "https://bvmf.bmfbovespa.com.br/InstDados/SerHist/COTAHIST_M{month:02d}{year}.ZIP"
+COTAHIST_YEARLY_URL = "https://bvmf.bmfbovespa.com.br/InstDados/SerHist/COTAHIST_A{year}.ZIP"
+
+# TPMERC codes of the records kept by default, plus the spot market for underlyings
+OPTION_MARKETS = ("070", "080")
+SPOT_MARKET = "010"
+
+# Uncompressed bytes decoded per step; bounds memory regardless of file size
+CHUNK_BYTES = 8 * 1024 * 1024
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Fixed-width layout: field -> (start, stop) within a 245-byte record
+FIELD_BOUNDS = {}
+_position = 0
+for _field, _width in FIELD_SIZES.items():
+    FIELD_BOUNDS[_field] = (_position, _position + _width)
+    _position += _width
+RECORD_LENGTH = _position
+_MARKET_START, _MARKET_STOP = FIELD_BOUNDS['TIPO_DE_MERCADO']
+
+# Same value conventions as b3cotahist, so parsed frames and cached files stay interchangeable
+PRICE_COLUMNS = {
+    'PRECO_DE_ABERTURA', 'PRECO_MAXIMO', 'PRECO_MINIMO', 'PRECO_MEDIO',
+    'PRECO_ULTIMO_NEGOCIO', 'PRECO_MELHOR_OFERTA_DE_COMPRA', 'PRECO_MELHOR_OFERTA_DE_VENDAS',
+    'PRECO_DE_EXERCICIO', 'PRECO_DE_EXERCICIO_EM_PONTOS',
+}
+FLOAT_COLUMNS = {'VOLUME_TOTAL_NEGOCIADO', 'QUANTIDADE_NEGOCIADA'}
+INTEGER_COLUMNS = {
+    'FATOR_DE_COTACAO', 'PRAZO_EM_DIAS_DO_MERCADO_A_TERMO', 'NUMERO_DE_NEGOCIOS',
+    'NUMERO_DE_DISTRIBUICAO', 'TIPO_DE_REGISTRO',
+}
+DATE_COLUMNS = {'DATA_DO_PREGAO', 'DATA_DE_VENCIMENTO'}
+CODE_MAPS = {'TIPO_DE_MERCADO': MARKETS, 'CODIGO_BDI': CODBDI, 'INDICADOR_DE_CORRECAO_DE_PRECOS': INDOPC}
+
+class ParseStats:
+    """Counters for one parse; `mb_per_s` is uncompressed throughput."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.records = 0
+        self.kept = 0
+        self.seconds = 0.0
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.bytes / 1e6:.1f} MB in {self.seconds:.2f}s ({self.mb_per_s:.0f} MB/s), "
+            f"kept {self.kept} of {self.records} records"
+        )
+
+def _digits(block: np.ndarray) -> np.ndarray:
+    """Unsigned integers from an (n, width) block of ASCII digits; NaN where not numeric."""
+    digits = block.astype(np.int64) - ord('0')
+    blank = block == ord(' ')
+    digits[blank] = 0
+    valid = ((digits >= 0) & (digits <= 9)).all(axis=1) & ~blank.all(axis=1)
+    powers = 10 ** np.arange(block.shape[1] - 1, -1, -1, dtype=np.int64)
+    values = (digits * powers).sum(axis=1).astype(np.float64)
+    values[~valid] = np.nan
+    return values
+
+def _dates(values: np.ndarray) -> np.ndarray:
+    """YYYYMMDD numbers to datetime64[ms] (ms keeps the 9999-12-31 spot expiry in range)."""
+    valid = ~np.isnan(values)
+    ymd = np.where(valid, values, 19700101).astype(np.int64)
+    months = (ymd // 10000 - 1970) * 12 + ymd // 100 % 100 - 1
+    days = months.astype('datetime64[M]').astype('datetime64[D]') + (ymd % 100 - 1)
+    dates = days.astype('datetime64[ms]')
+    dates[~valid] = np.datetime64('NaT')
+    return dates
+
+def _strings(block: np.ndarray) -> np.ndarray:
+    width = block.shape[1]
+    raw = np.ascontiguousarray(block).view(f'S{width}').ravel()
+    return np.array([value.decode('latin-1').strip() for value in raw.tolist()], dtype=object)
+
+def decode_records(block: np.ndarray, columns: Sequence[str]) -> pd.DataFrame:
+    """Typed columns from an (n, RECORD_LENGTH) uint8 block of records."""
+    data = {}
+    for column in columns:
+        start, stop = FIELD_BOUNDS[column]
+        field = block[:, start:stop]
+        if column in PRICE_COLUMNS:
+            data[column] = np.round(_digits(field) / 100, 4)
+        elif column in FLOAT_COLUMNS:
+            data[column] = _digits(field)
+        elif column in INTEGER_COLUMNS:
+            data[column] = pd.array(_digits(field), dtype='UInt32')
+        elif column in DATE_COLUMNS:
+            data[column] = _dates(_digits(field))
+        elif column in CODE_MAPS:
+            # Few distinct codes per column, so decode and map the uniques only
+            uniques, inverse = np.unique(_strings(field).astype(str), return_inverse=True)
+            names = np.array([CODE_MAPS[column].get(code, code) for code in uniques], dtype=object)
+            data[column] = names[inverse.ravel()]
+        else:
+            data[column] = _strings(field)
+    return pd.DataFrame(data, columns=list(columns))
+
+def _split_records(text: bytes) -> np.ndarray:
+    """
+    (n, RECORD_LENGTH) block of the complete lines in `text`. B3 files are
+    fixed-stride (245 bytes + CRLF), which is viewed in place; anything else
+    goes through a per-line split.
+    """
+    for newline in (b"\r\n", b"\n"):
+        stride = RECORD_LENGTH + len(newline)
+        if len(text) % stride == 0:
+            block = np.frombuffer(text, dtype=np.uint8).reshape(-1, stride)
+            if (block[:, RECORD_LENGTH:] == np.frombuffer(newline, dtype=np.uint8)).all():
+                return block[:, :RECORD_LENGTH]
+    lines = [line.rstrip(b"\r")[:RECORD_LENGTH].ljust(RECORD_LENGTH) for line in text.split(b"\n") if line.strip()]
+    return np.frombuffer(b"".join(lines), dtype=np.uint8).reshape(-1, RECORD_LENGTH)
+
+def _market_codes(markets: Iterable[str]) -> np.ndarray:
+    return np.array([int.from_bytes(market.encode(), 'big') for market in markets], dtype=np.int64)
+
+def iter_cotahist(
+    stream: BinaryIO,
+    markets: Iterable[str] = OPTION_MARKETS,
+    columns: Optional[Sequence[str]] = None,
+    chunk_bytes: int = CHUNK_BYTES,
+    stats: Optional[ParseStats] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams a COTAHIST text file, yielding one typed DataFrame per chunk with
+    only the quote records of `markets` (TPMERC codes). Records are filtered
+    on their 3-byte market code before any field is decoded, and at most one
+    chunk of raw text is held at a time.
+    """
+    columns = list(columns) if columns is not None else list(FIELD_SIZES)
+    wanted = _market_codes(markets)
+    stats = stats if stats is not None else ParseStats()
+    started = time.perf_counter()
+    tail = b""
+    while True:
+        chunk = stream.read(chunk_bytes)
+        stats.bytes += len(chunk)
+        if chunk:
+            # Decode complete lines only; a partial last line waits for the next chunk
+            cut = chunk.rfind(b"\n") + 1
+            if cut == 0:
+                tail += chunk
+                continue
+            text, tail = tail + chunk[:cut], chunk[cut:]
+        else:
+            text, tail = tail, b""
+
+        block = _split_records(text)
+        # "01" quote records only; header (00) and trailer (99) are skipped
+        quotes = (block[:, 0] == ord('0')) & (block[:, 1] == ord('1'))
+        market = block[:, _MARKET_START:_MARKET_STOP].astype(np.int64) @ np.array([65536, 256, 1])
+        keep = quotes & np.isin(market, wanted)
+        stats.records += int(quotes.sum())
+        stats.kept += int(keep.sum())
+        if keep.any():
+            frame = decode_records(block[keep], columns)
+            stats.seconds = time.perf_counter() - started
+            yield frame
+        if not chunk:
+            break
+    stats.seconds = time.perf_counter() - started
+
+def read_cotahist(
+    source: Union[str, os.PathLike, bytes, BinaryIO],
+    markets: Iterable[str] = OPTION_MARKETS,
+    columns: Optional[Sequence[str]] = None,
+    chunk_bytes: int = CHUNK_BYTES,
+    stats: Optional[ParseStats] = None
+) -> pd.DataFrame:
+    """
+    Records of `markets` from a COTAHIST .TXT or .ZIP (path, bytes or binary
+    stream). Zip members are decompressed incrementally, never in full.
+    """
+    columns = list(columns) if columns is not None else list(FIELD_SIZES)
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive, archive.open(archive.namelist()[0]) as stream:
+            frames = list(iter_cotahist(stream, markets, columns, chunk_bytes, stats))
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as stream:
+            frames = list(iter_cotahist(stream, markets, columns, chunk_bytes, stats))
+    else:
+        source.seek(0)
+        frames = list(iter_cotahist(source, markets, columns, chunk_bytes, stats))
+
+    if not frames:
+        return decode_records(np.empty((0, RECORD_LENGTH), dtype=np.uint8), columns)
+    return pd.concat(frames, ignore_index=True)
+
+def download(url: str, destination: BinaryIO, verify: bool = False):
+    """Streams `url` into `destination` without holding the body in memory."""
+    # verify=False as in b3cotahist: B3 serves an incomplete certificate chain
+    with requests.get(url, stream=True, verify=verify, timeout=60) as response:
+        response.raise_for_status()
+        for block in response.iter_content(DOWNLOAD_CHUNK_BYTES):
+            destination.write(block)
+
+def _fetch(url: str, markets: Iterable[str], columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    stats = ParseStats()
+    with tempfile.TemporaryFile() as archive:
+        download(url, archive)
+        archive.seek(0)
+        # B3 answers some missing files with a 200 HTML page; never parse that as an empty day
+        if not zipfile.is_zipfile(archive):
+            raise zipfile.BadZipFile(f"{url} did not return a zip archive")
+        df = read_cotahist(archive, markets, columns, stats=stats)
+    print(f"Parsed {url.rsplit('/', 1)[-1]}: {stats}")
+    if stats.records == 0:
+        raise FileNotFoundError(f"{url} has no quote records")
+    return df
+
+def fetch_day(
+    date: datetime.date,
+    markets: Iterable[str] = OPTION_MARKETS,
+    columns: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """Downloads and parses the daily COTAHIST file of `date`."""
+    return _fetch(COTAHIST_DAILY_URL.format(date=date), markets, columns)
+
+def fetch_month(
+    year: int,
+    month: int,
+    markets: Iterable[str] = OPTION_MARKETS,
+    columns: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """Downloads and parses the monthly COTAHIST file."""
+    return _fetch(COTAHIST_MONTHLY_URL.format(year=year, month=month), markets, columns)
+
+def fetch_year(
+    year: int,
+    markets: Iterable[str] = OPTION_MARKETS,
+    columns: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """Downloads and parses the yearly COTAHIST file, the only format before 2014."""
+    return _fetch(COTAHIST_YEARLY_URL.format(year=year), markets, columns)
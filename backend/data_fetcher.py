@@ -1,143 +1,304 @@
+import asyncio
 import datetime
-import b3cotahist
+import functools
+import threading
 import pandas as pd
-from typing import List, Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, List, Dict, Optional
 import os
-import subprocess
-import io
+from . import cotahist
+from .b3_calendar import latest_trading_day, previous_trading_day
+from .cache import LRUCache, ParquetDayCache
+from .chain import chain_analytics
+from .surface import VolSurface, fit_surface
+from .history import BACKFILL_WORKERS, HistoryStore, backfill
+from .market_index import OPTION_EXPORT_COLUMNS, OptionChainIndex, QuoteIndex, underlying_root
+from .rb3_worker import RWorkerError, RWorkerPool
 
 CACHE_DIR = "cache_b3"
 if not os.path.exists(CACHE_DIR):
     os.makedirs(CACHE_DIR)
 
+# B3 data usually becomes available some time after this hour
+MARKET_CLOSE_HOUR = 19
+# Earliest date the fetch fallback walks back to, and how many trading days it tries
+FALLBACK_FLOOR = datetime.date(2025, 1, 1)
+FALLBACK_ATTEMPTS = 5
+
+# In-memory budget for parsed trading days held by B3DataFetcher
+MEMORY_CACHE_BYTES = 1024 * 1024 * 1024
+
+# In-memory budget for computed chain analytics, keyed by (symbol, date, rate)
+ANALYTICS_CACHE_BYTES = 64 * 1024 * 1024
+# Annual risk-free rate for chain analytics when the caller gives none (SELIC)
+DEFAULT_RISK_FREE_RATE = 0.105
+
+# Blocking work (downloads, parsing, R calls) runs on this many threads
+FETCH_WORKERS = 4
+# Seconds an API request waits for blocking work before giving up
+FETCH_TIMEOUT = 60.0
+
+# COTAHIST columns actually used downstream; only these are persisted
+OPTION_COLUMNS = [
+    'CODIGO_DE_NEGOCIACAO',
+    'TIPO_DE_MERCADO',
+    'PRECO_DE_EXERCICIO',
+    'PRECO_ULTIMO_NEGOCIO',
+    'DATA_DE_VENCIMENTO',
+    'VOLUME_TOTAL_NEGOCIADO',
+]
+# Extra columns kept for spot (VISTA) rows, which are cached with the options
+SPOT_COLUMNS = [
+    'NOME_DA_EMPRESA',
+    'ESPECIFICACAO_DO_PAPEL',
+    'PRECO_DE_ABERTURA',
+    'PRECO_MAXIMO',
+    'PRECO_MINIMO',
+]
+DAY_COLUMNS = OPTION_COLUMNS + SPOT_COLUMNS
+DAY_MARKETS = (cotahist.SPOT_MARKET,) + cotahist.OPTION_MARKETS
+
 def get_latest_workday():
-    """Returns the date of the latest potential workday."""
+    """Returns the date of the latest B3 trading day whose data should be published."""
     dt = datetime.datetime.now()
-    # If today is weekend, go back to Friday
-    if dt.weekday() == 5: # Saturday
-        dt -= datetime.timedelta(days=1)
-    elif dt.weekday() == 6: # Sunday
-        dt -= datetime.timedelta(days=2)
-    
-    # Also, B3 data usually becomes available after market close
-    # For simplicity, we try yesterday if today's market hasn't closed yet or if it's too early
-    if dt.hour < 19:
-        dt -= datetime.timedelta(days=1)
-        # Check again for weekend
-        if dt.weekday() == 5: # Saturday
-            dt -= datetime.timedelta(days=1)
-        elif dt.weekday() == 6: # Sunday
-            dt -= datetime.timedelta(days=2)
-            
-    return dt.date()
+    # B3 data usually becomes available after market close, so before the
+    # cutoff the newest file is the previous trading day's
+    date = dt.date()
+    if dt.hour < MARKET_CLOSE_HOUR:
+        date -= datetime.timedelta(days=1)
+    return latest_trading_day(date)
 
 class B3DataFetcher:
-    def __init__(self):
+    def __init__(
+        self,
+        cache_dir: str = CACHE_DIR,
+        memory_budget: int = MEMORY_CACHE_BYTES,
+        rb3_pool: Optional[RWorkerPool] = None,
+        fetch_workers: int = FETCH_WORKERS,
+        fetch_timeout: float = FETCH_TIMEOUT
+    ):
         self.cached_date = None
         self.df_options = None
+        # Newest trading day known to be loaded, maintained by the prefetcher
+        self.latest_date: Optional[datetime.date] = None
+        self.disk_cache = ParquetDayCache(cache_dir)
+        # Multi-year store filled by backfill(), separate from the per-day cache
+        self.history = HistoryStore(os.path.join(cache_dir, "history"))
+        self.memory_cache = LRUCache(max_bytes=memory_budget, sizeof=lambda index: index.nbytes)
+        self.analytics_cache = LRUCache(max_bytes=ANALYTICS_CACHE_BYTES)
+        # Fitted smiles are tiny, so they share the analytics budget in their own LRU
+        self.surface_cache = LRUCache(max_bytes=ANALYTICS_CACHE_BYTES, sizeof=lambda surface: surface.nbytes)
+        # Long-lived R processes that keep the rb3 superset loaded between requests
+        self.rb3_pool = rb3_pool if rb3_pool is not None else RWorkerPool()
+        self.executor = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="b3-fetch")
+        self.fetch_timeout = fetch_timeout
+        # Calls still running on the executor, so retries join them instead of taking another thread
+        self._inflight: Dict[Hashable, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    async def run_async(self, func: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Runs a blocking fetcher call on the bounded executor so the event loop
+        stays free. Raises asyncio.TimeoutError after `timeout` seconds
+        (fetch_timeout by default); the work itself keeps running and still
+        fills the caches for later requests. A call identical to one still
+        running (e.g. a retry after a timeout, while an R query waits on its
+        longer watchdog) waits on that call instead of occupying another thread.
+        """
+        try:
+            key = (func, args, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            key = None
+        with self._inflight_lock:
+            future = self._inflight.get(key) if key is not None else None
+            if future is None:
+                future = self.executor.submit(func, *args, **kwargs)
+                if key is not None:
+                    self._inflight[key] = future
+                    future.add_done_callback(functools.partial(self._finished, key))
+        # Shielded: a timed-out waiter must not cancel work other callers share
+        waiter = asyncio.shield(asyncio.wrap_future(future))
+        return await asyncio.wait_for(waiter, timeout if timeout is not None else self.fetch_timeout)
+
+    def _finished(self, key: Hashable, future: Future):
+        with self._inflight_lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
 
     def fetch_data(self, date: Optional[datetime.date] = None):
+        index = self.fetch_index(date)
+        return index.frame if index is not None else None
+
+    def fetch_index(self, date: Optional[datetime.date] = None) -> Optional[OptionChainIndex]:
+        """Options of a trading day indexed by underlying, falling back to earlier trading days."""
         if date is None:
-            date = get_latest_workday()
-        
-        if self.cached_date == date and self.df_options is not None:
-            return self.df_options
+            date = self.latest_date or get_latest_workday()
+
+        index = None
+        for _ in range(FALLBACK_ATTEMPTS):
+            # Concurrent callers for the same uncached date share one load
+            index = self.memory_cache.get_or_load(date, self._load_index)
+            if index is not None or date <= FALLBACK_FLOOR:
+                break
+            # Try the previous trading day, skipping weekends and B3 holidays
+            date = previous_trading_day(date)
+        if index is None:
+            return None
+
+        self.df_options = index.frame
+        self.cached_date = date
+        return index
+
+    def _load_index(self, date: datetime.date) -> Optional[OptionChainIndex]:
+        df_day = self._load_date(date)
+        if df_day is None:
+            return None
+        spot = (df_day['TIPO_DE_MERCADO'] == 'VISTA').to_numpy()
+        options = df_day.loc[~spot, OPTION_COLUMNS].reset_index(drop=True)
+        return OptionChainIndex(options, quotes=QuoteIndex(df_day.loc[spot]), date=date)
+
+    def _load_date(self, date: datetime.date) -> Optional[pd.DataFrame]:
+        """Loads the options and spot rows of one trading date from the disk cache, downloading on a miss."""
+        df_day = self.disk_cache.load(date, columns=DAY_COLUMNS)
+        if df_day is not None:
+            return df_day
 
         print(f"Fetching B3 data for {date}...")
         try:
-            # b3cotahist.get returns a pandas DataFrame
-            # It might fail if the date is a holiday or not yet available
-            df = b3cotahist.get(date)
-            
-            # Filter for options (OPCOES_DE_COMPRA = 070, OPCOES_DE_VENDA = 080 in mapping)
-            # Based on b3cotahist.py:
-            # '070': 'OPCOES_DE_COMPRA',
-            # '080': 'OPCOES_DE_VENDA',
-            
-            # Note: b3cotahist already maps 'TIPO_DE_MERCADO' to strings
-            self.df_options = df[df['TIPO_DE_MERCADO'].isin(['OPCOES_DE_COMPRA', 'OPCOES_DE_VENDA'])]
-            self.cached_date = date
-            return self.df_options
+            # Streams the COTAHIST file and decodes only the options (TPMERC
+            # 070/080) and spot (010) records and the columns used downstream
+            df_day = cotahist.fetch_day(date, markets=DAY_MARKETS, columns=DAY_COLUMNS)
         except Exception as e:
             print(f"Error fetching data for {date}: {e}")
-            # Try previous day if failed
-            if date > datetime.date(2025, 1, 1):
-                prev_date = date - datetime.timedelta(days=1)
-                return self.fetch_data(prev_date)
             return None
 
+        try:
+            self.disk_cache.save(date, df_day)
+        except Exception as e:
+            print(f"Could not write disk cache for {date}: {e}")
+        return df_day
+
+    def backfill(self, start: datetime.date, end: datetime.date, workers: int = BACKFILL_WORKERS) -> List[str]:
+        """Ingests the COTAHIST files covering [start, end] into the history store."""
+        return backfill(self.history, start, end, workers=workers)
+
+    def fetch_history(
+        self,
+        symbol: str,
+        start: datetime.date,
+        end: datetime.date,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """Stored options and spot rows of the underlying of `symbol` between two dates."""
+        return self.history.query(underlying_root(symbol), start, end, columns)
+
     def fetch_with_rb3(self, symbol: str) -> List[Dict]:
         """Calls the R script to fetch data using RB3 package."""
-        r_script = os.path.join(os.path.dirname(__file__), "..", "scripts", "rb3_options_fetcher.R")
-        
-        # Try different Rscript executable locations
-        executables = ["Rscript", 
-                       r"C:\Program Files\R\R-4.3.2\bin\x64\Rscript.exe",
-                       r"C:\Program Files\R\R-4.3.1\bin\x64\Rscript.exe"]
-        
-        stdout = None
-        for exe in executables:
-            try:
-                result = subprocess.run([exe, r_script, symbol], capture_output=True, text=True, check=True)
-                stdout = result.stdout
-                break
-            except (subprocess.CalledProcessError, FileNotFoundError):
-                continue
-        
-        if not stdout:
-            print("RB3 fetch failed or R not found.")
-            return []
-            
+        return self.fetch_frame_with_rb3(symbol).to_dict('records')
+
+    def fetch_frame_with_rb3(self, symbol: str) -> pd.DataFrame:
+        """RB3 options for `symbol` in the API export layout (empty on failure)."""
+        try:
+            df = self.rb3_pool.query(symbol)
+        except RWorkerError as e:
+            print(f"RB3 fetch failed: {e}")
+            return pd.DataFrame(columns=OPTION_EXPORT_COLUMNS)
+
         try:
-            # Parse the CSV output from R
-            df = pd.read_csv(io.StringIO(stdout))
-            results = []
-            for _, row in df.iterrows():
-                results.append({
-                    "symbol": row['symbol'],
-                    "strike": row['strike'],
-                    "price": row['price_close'],
-                    "type": row['type'],
-                    "maturity_date": str(row['maturity_date']),
-                    "volume": row['volume']
-                })
-            return results
+            return pd.DataFrame({
+                "symbol": df['symbol'],
+                "strike": df['strike'],
+                "price": df['price_close'],
+                "type": df['type'],
+                "maturity_date": df['maturity_date'].astype(str),
+                "volume": df['volume']
+            }, columns=OPTION_EXPORT_COLUMNS)
         except Exception as e:
             print(f"Error parsing RB3 output: {e}")
-            return []
+            return pd.DataFrame(columns=OPTION_EXPORT_COLUMNS)
 
     def get_options_for_symbol(self, symbol: str) -> List[Dict]:
+        return self.get_options_frame(symbol).to_dict('records')
+
+    def get_options_frame(self, symbol: str) -> pd.DataFrame:
+        """Options for `symbol` in the API export layout, one column per field."""
         # Prefer RB3 for more updated/complete data as requested by user
         print(f"Attempting to fetch {symbol} options via RB3...")
-        rb3_data = self.fetch_with_rb3(symbol)
-        if rb3_data:
+        rb3_data = self.fetch_frame_with_rb3(symbol)
+        if not rb3_data.empty:
             return rb3_data
             
         # Fallback to COTAHIST if RB3 fails
         print("Falling back to COTAHIST...")
-        df = self.fetch_data()
-        if df is None:
-            return []
-        
-        prefix = symbol[:4] 
-        df_filtered = df[df['CODIGO_DE_NEGOCIACAO'].str.startswith(prefix)]
-        
-        results = []
-        for _, row in df_filtered.iterrows():
-            results.append({
-                "symbol": row['CODIGO_DE_NEGOCIACAO'],
-                "strike": row['PRECO_DE_EXERCICIO'],
-                "price": row['PRECO_ULTIMO_NEGOCIO'],
-                "type": "CALL" if row['TIPO_DE_MERCADO'] == 'OPCOES_DE_COMPRA' else "PUT",
-                "maturity_date": row['DATA_DE_VENCIMENTO'].strftime("%Y-%m-%d") if isinstance(row['DATA_DE_VENCIMENTO'], datetime.date) else str(row['DATA_DE_VENCIMENTO']),
-                "volume": row['VOLUME_TOTAL_NEGOCIADO']
-            })
-        return results
+        index = self.fetch_index()
+        if index is None:
+            return pd.DataFrame(columns=OPTION_EXPORT_COLUMNS)
+        return index.export_for(symbol)
+
+    def get_chain_analytics(self, symbol: str, rate: float = DEFAULT_RISK_FREE_RATE) -> Optional[pd.DataFrame]:
+        """
+        IV, greeks and moneyness for every COTAHIST series of `symbol`'s
+        underlying, priced off its spot close. Computed once per
+        (symbol, trading date, rate); None when no trading day is available.
+        Raises ValueError when the day has no spot quote for `symbol`.
+        """
+        index = self.fetch_index()
+        if index is None:
+            return None
+        symbol = symbol.upper()
+        # The index's own date: cached_date may already belong to another thread's fetch
+        key = (symbol, index.date, rate)
+        return self.analytics_cache.get_or_load(key, lambda key: self._compute_chain(index, *key))
+
+    @staticmethod
+    def _compute_chain(index: OptionChainIndex, symbol: str, date: datetime.date, rate: float) -> pd.DataFrame:
+        spot = index.quotes.price(symbol)
+        if spot is None or spot <= 0:
+            raise ValueError(f"No spot quote for {symbol} on {date}")
+        return chain_analytics(index.options_for(symbol), spot, date, rate)
+
+    def get_vol_surface(self, symbol: str, rate: float = DEFAULT_RISK_FREE_RATE) -> Optional[VolSurface]:
+        """
+        Per-expiry smiles of `symbol` fitted from its chain analytics, once per
+        (symbol, trading date, rate); later lookups are closed-form evaluations.
+        """
+        chain = self.get_chain_analytics(symbol, rate)
+        if chain is None:
+            return None
+        key = (symbol.upper(), chain.attrs["trading_date"], rate)
+        return self.surface_cache.get_or_load(key, lambda key: fit_surface(chain, chain.attrs["spot"], rate))
 
     def get_asset_price(self, symbol: str) -> Optional[float]:
-        # For stocks (TIPO_DE_MERCADO = 'VISTA')
-        if self.cached_date is None:
-            self.fetch_data()
-        pass
+        """Last traded price of a spot ticker (TIPO_DE_MERCADO = 'VISTA') on the cached day."""
+        index = self.fetch_index()
+        return index.quotes.price(symbol) if index is not None else None
+
+    def get_assets(self, symbols: List[str]) -> List[Dict]:
+        """
+        Spot quotes of `symbols` from the cached day. Change is measured against
+        the previous trading day when that day is already in memory (no extra
+        download is made for it), otherwise against the day's open.
+        """
+        index = self.fetch_index()
+        if index is None:
+            return []
+        previous = self.memory_cache.get(previous_trading_day(index.date))
+        assets = []
+        for symbol in symbols:
+            quote = index.quotes.quote(symbol)
+            if quote is None:
+                continue
+            close = previous.quotes.price(symbol) if previous is not None else None
+            if close is None:
+                close = quote["open"]
+            change = quote["price"] - close
+            assets.append({
+                **quote,
+                "close": close,
+                "change": round(change, 4),
+                "change_percent": round(change / close * 100, 2) if close else 0.0,
+            })
+        return assets
 
 fetcher = B3DataFetcher()
@@ -0,0 +1,257 @@
+import argparse
+import datetime
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, NamedTuple, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from . import cotahist
+from .b3_calendar import CALENDAR_START, is_trading_day
+
+# Columns kept for every historical record; spot rows are stored next to their options
+HISTORY_COLUMNS = [
+    'DATA_DO_PREGAO',
+    'CODIGO_DE_NEGOCIACAO',
+    'TIPO_DE_MERCADO',
+    'PRECO_DE_ABERTURA',
+    'PRECO_MAXIMO',
+    'PRECO_MINIMO',
+    'PRECO_ULTIMO_NEGOCIO',
+    'PRECO_DE_EXERCICIO',
+    'DATA_DE_VENCIMENTO',
+    'VOLUME_TOTAL_NEGOCIADO',
+    'QUANTIDADE_NEGOCIADA',
+]
+HISTORY_MARKETS = (cotahist.SPOT_MARKET,) + cotahist.OPTION_MARKETS
+
+# Hive-style directories: year=2024/month=6/underlying=PETR/<source>-0.parquet
+PARTITIONING = ds.partitioning(
+    pa.schema([("year", pa.int16()), ("month", pa.int8()), ("underlying", pa.string())]),
+    flavor="hive"
+)
+
+# Parallel downloads/parses; each worker holds at most one file's kept rows
+BACKFILL_WORKERS = 4
+
+class Source(NamedTuple):
+    """One COTAHIST file: kind is "A" (year), "M" (month) or "D" (day)."""
+    kind: str
+    date: datetime.date
+
+    @property
+    def name(self) -> str:
+        if self.kind == "A":
+            return f"A{self.date.year}"
+        if self.kind == "M":
+            return f"M{self.date:%m%Y}"
+        return f"D{self.date:%d%m%Y}"
+
+    def fetch(self) -> pd.DataFrame:
+        if self.kind == "A":
+            return cotahist.fetch_year(self.date.year, HISTORY_MARKETS, HISTORY_COLUMNS)
+        if self.kind == "M":
+            return cotahist.fetch_month(self.date.year, self.date.month, HISTORY_MARKETS, HISTORY_COLUMNS)
+        return cotahist.fetch_day(self.date, HISTORY_MARKETS, HISTORY_COLUMNS)
+
+def _month_end(date: datetime.date) -> datetime.date:
+    first_of_next = (date.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return first_of_next - datetime.timedelta(days=1)
+
+def plan_sources(start: datetime.date, end: datetime.date, today: Optional[datetime.date] = None) -> List[Source]:
+    """
+    Fewest COTAHIST files covering [start, end]: whole past years as yearly
+    files, whole past months as monthly files, trading days otherwise.
+    Raises ValueError when a partial month before the trading calendar's
+    first year would need daily files.
+    """
+    today = today or datetime.date.today()
+    end = min(end, today)
+    sources = []
+    date = start
+    while date <= end:
+        year_end = datetime.date(date.year, 12, 31)
+        month_end = _month_end(date)
+        if date == datetime.date(date.year, 1, 1) and year_end <= end and year_end < today:
+            sources.append(Source("A", date))
+            date = year_end + datetime.timedelta(days=1)
+        elif date.day == 1 and month_end <= end and month_end < today:
+            sources.append(Source("M", date))
+            date = month_end + datetime.timedelta(days=1)
+        else:
+            if date < CALENDAR_START:
+                raise ValueError(
+                    f"No trading calendar before {CALENDAR_START}: {date} needs a daily file; "
+                    "before then, back-fill whole months or years (start on the 1st, end on a month end)"
+                )
+            if is_trading_day(date):
+                sources.append(Source("D", date))
+            date += datetime.timedelta(days=1)
+    return sources
+
+class HistoryStore:
+    """
+    Partitioned Parquet store of historical COTAHIST options and spot rows,
+    split by year, month and underlying root. Queries open only the
+    partitions matching the root and date range, and the date filter is
+    pushed down to the Parquet row groups (files are sorted by date).
+    Each source file writes its own part files, and a marker under _sources
+    records completed sources so an interrupted backfill resumes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.markers = os.path.join(directory, "_sources")
+        os.makedirs(self.markers, exist_ok=True)
+
+    def sources(self) -> List[str]:
+        return sorted(os.listdir(self.markers))
+
+    def covers(self, source: Source) -> bool:
+        """True if `source` or a coarser file containing it was already ingested."""
+        names = {source.name}
+        if source.kind != "A":
+            names.add(Source("A", source.date).name)
+        if source.kind == "D":
+            names.add(Source("M", source.date).name)
+        return not names.isdisjoint(self.sources())
+
+    def write(self, source: Source, df: pd.DataFrame) -> int:
+        """
+        Writes the rows of one source file and marks it done; returns rows
+        written. Raises ValueError for an empty frame, so a bad download is
+        never recorded as ingested and the next backfill retries it.
+        """
+        if df.empty:
+            raise ValueError(f"{source.name} has no records")
+        df = df.sort_values(['DATA_DO_PREGAO', 'CODIGO_DE_NEGOCIACAO'], kind='stable')
+        trading_dates = pd.DatetimeIndex(df['DATA_DO_PREGAO'])
+        table = pa.Table.from_pandas(df.assign(
+            year=trading_dates.year.astype('int16'),
+            month=trading_dates.month.astype('int8'),
+            underlying=df['CODIGO_DE_NEGOCIACAO'].str[:4],
+        ), preserve_index=False)
+        ds.write_dataset(
+            table,
+            self.directory,
+            format="parquet",
+            partitioning=PARTITIONING,
+            basename_template=f"{source.name}-{{i}}.parquet",
+            # Re-ingesting a source overwrites its own part files only
+            existing_data_behavior="overwrite_or_ignore",
+            max_partitions=1 << 16,
+            file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        )
+        self._drop_finer(source)
+        open(os.path.join(self.markers, source.name), "w").close()
+        return table.num_rows
+
+    def _drop_finer(self, source: Source):
+        """Removes monthly/daily parts now duplicated by a coarser source."""
+        if source.kind == "D":
+            return
+        year = source.date.year
+        months = range(1, 13) if source.kind == "A" else [source.date.month]
+        for month in months:
+            # Daily names share the ddmmYYYY suffix, so match any day of the month
+            prefixes = [f"D??{month:02d}{year}"]
+            if source.kind == "A":
+                prefixes.append(Source("M", datetime.date(year, month, 1)).name)
+            for prefix in prefixes:
+                parts = os.path.join(self.directory, f"year={year}", f"month={month}", "*", f"{prefix}-*.parquet")
+                for path in glob.glob(parts) + glob.glob(os.path.join(self.markers, prefix)):
+                    os.remove(path)
+
+    def partition_paths(self, root: str, start: datetime.date, end: datetime.date) -> List[str]:
+        """Existing part files of `root` for the months overlapping [start, end]."""
+        paths = []
+        month = start.replace(day=1)
+        while month <= end:
+            directory = os.path.join(self.directory, f"year={month.year}", f"month={month.month}", f"underlying={root.upper()}")
+            paths.extend(sorted(glob.glob(os.path.join(directory, "*.parquet"))))
+            month = _month_end(month) + datetime.timedelta(days=1)
+        return paths
+
+    def query(
+        self,
+        root: str,
+        start: datetime.date,
+        end: datetime.date,
+        columns: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """Records of one underlying root traded between `start` and `end` inclusive."""
+        columns = list(columns) if columns is not None else HISTORY_COLUMNS
+        paths = self.partition_paths(root, start, end)
+        if not paths:
+            return pd.DataFrame(columns=columns)
+        dataset = ds.dataset(paths, format="parquet", partitioning=PARTITIONING, partition_base_dir=self.directory)
+        traded = ds.field('DATA_DO_PREGAO')
+        table = dataset.to_table(
+            columns=columns,
+            filter=(traded >= pa.scalar(pd.Timestamp(start), pa.timestamp('ms')))
+            & (traded <= pa.scalar(pd.Timestamp(end), pa.timestamp('ms'))),
+        )
+        return table.to_pandas().sort_values(['DATA_DO_PREGAO', 'CODIGO_DE_NEGOCIACAO'], ignore_index=True)
+
+def _ingest(directory: str, source: Source) -> int:
+    """Worker entry point: downloads, parses and writes one source file."""
+    return HistoryStore(directory).write(source, source.fetch())
+
+def backfill(
+    store: HistoryStore,
+    start: datetime.date,
+    end: datetime.date,
+    workers: int = BACKFILL_WORKERS,
+    today: Optional[datetime.date] = None
+) -> List[str]:
+    """
+    Ingests every COTAHIST file covering [start, end] not yet in `store`,
+    `workers` files at a time in separate processes (inline when workers <= 1).
+    Returns the names of the sources ingested; failures are logged and left
+    for the next run.
+    """
+    pending = [s for s in plan_sources(start, end, today) if not store.covers(s)]
+    print(f"Backfilling {len(pending)} COTAHIST files into {store.directory}...")
+    done = []
+    if workers <= 1:
+        for source in pending:
+            try:
+                rows = _ingest(store.directory, source)
+            except Exception as e:
+                print(f"Backfill of {source.name} failed: {e}")
+                continue
+            print(f"Stored {source.name}: {rows} records")
+            done.append(source.name)
+        return done
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_ingest, store.directory, source): source for source in pending}
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                print(f"Backfill of {source.name} failed: {e}")
+                continue
+            print(f"Stored {source.name}: {rows} records")
+            done.append(source.name)
+    return done
+
+def main():
+    from .data_fetcher import fetcher
+
+    parser = argparse.ArgumentParser(description="Backfills historical COTAHIST options into the local store.")
+    parser.add_argument("start", type=datetime.date.fromisoformat, help="first date (YYYY-MM-DD)")
+    parser.add_argument("end", type=datetime.date.fromisoformat, nargs="?", default=datetime.date.today(),
+                        help="last date (YYYY-MM-DD), today by default")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS, help="parallel worker processes")
+    args = parser.parse_args()
+
+    done = fetcher.backfill(args.start, args.end, workers=args.workers)
+    print(f"Backfill finished: {len(done)} files ingested")
+
+if __name__ == "__main__":
+    main()
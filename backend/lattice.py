@@ -0,0 +1,302 @@
+from typing import Dict
+
+import numpy as np
+from .logic import _black_scholes_price_vega, calculate_black_scholes, calculate_d1_d2
+from .normal import norm_cdf, norm_pdf
+
+# Pricing models selectable through OptionRequest.model
+BLACK_SCHOLES = "BLACK_SCHOLES"
+BINOMIAL_CRR = "BINOMIAL_CRR"
+BINOMIAL_LR = "BINOMIAL_LR"
+BAW = "BAW"
+MODELS = (BLACK_SCHOLES, BINOMIAL_CRR, BINOMIAL_LR, BAW)
+
+DEFAULT_STEPS = 501
+# Bumps for the greeks that the tree itself cannot give (per 1% like the Black-Scholes ones)
+VOL_BUMP = 0.01
+RATE_BUMP = 0.01
+BAW_MAX_ITERATIONS = 100
+
+def _peizer_pratt(z: np.ndarray, steps: int) -> np.ndarray:
+    """Peizer-Pratt method 2 inversion used by Leisen-Reimer."""
+    n = steps
+    scaled = z / (n + 1.0 / 3.0 + 0.1 / (n + 1))
+    return 0.5 + np.sign(z) * np.sqrt(0.25 - 0.25 * np.exp(-scaled**2 * (n + 1.0 / 6.0)))
+
+def _tree_parameters(spot, strike, maturity, volatility, rate, dividend, steps, method):
+    """
+    Step size, up/down factors and up probability per contract. Where the
+    chosen tree has no valid probability (CRR when vol < |r - q| sqrt(dt), or
+    Leisen-Reimer when Peizer-Pratt saturates at very low vol), the contract
+    uses a CRR tree centred on the forward drift, whose probability always
+    stays inside (0, 1).
+    """
+    dt = maturity / steps
+    drift = (rate - dividend) * dt
+    growth = np.exp(drift)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        if method == BINOMIAL_LR:
+            d1, d2 = calculate_d1_d2(spot, strike, maturity, rate, volatility, dividend)
+            p = _peizer_pratt(d2, steps)
+            up = growth * _peizer_pratt(d1, steps) / p
+            down = (growth - p * up) / (1 - p)
+        else:
+            up = np.exp(volatility * np.sqrt(dt))
+            down = 1.0 / up
+            p = (growth - down) / (up - down)
+        valid = (p > 0) & (p < 1) & (down > 0) & (up > down) & np.isfinite(up)
+    if not valid.all():
+        step_vol = volatility * np.sqrt(dt)
+        centred_up = np.exp(drift + step_vol)
+        centred_down = np.exp(drift - step_vol)
+        up = np.where(valid, up, centred_up)
+        down = np.where(valid, down, centred_down)
+        p = np.where(valid, p, (growth - centred_down) / (centred_up - centred_down))
+    return dt, up, down, p
+
+def binomial_tree_batch(
+    spot,
+    strike,
+    maturity,
+    volatility,
+    risk_free_rate,
+    option_type,
+    dividend_yield=0.0,
+    steps: int = DEFAULT_STEPS,
+    method: str = BINOMIAL_LR,
+    american: bool = True
+) -> Dict[str, np.ndarray]:
+    """
+    Binomial lattice (Cox-Ross-Rubinstein or Leisen-Reimer) for a batch of
+    contracts. Backward induction runs once over a (nodes, contracts) array,
+    so every step is a handful of vectorized operations whatever the batch
+    size. Returns price plus delta, gamma and daily theta read off the first
+    two levels of the same tree. Leisen-Reimer uses an odd step count.
+    """
+    is_call = np.asarray(option_type) == 'CALL'
+    spot, strike, maturity, volatility, rate, dividend, is_call = (
+        np.ravel(a) for a in np.broadcast_arrays(
+            np.asarray(spot, dtype=float),
+            np.asarray(strike, dtype=float),
+            np.asarray(maturity, dtype=float),
+            np.asarray(volatility, dtype=float),
+            np.asarray(risk_free_rate, dtype=float),
+            np.asarray(dividend_yield, dtype=float),
+            is_call
+        )
+    )
+    if method == BINOMIAL_LR and steps % 2 == 0:
+        steps += 1
+    dt, up, down, p = _tree_parameters(spot, strike, maturity, volatility, rate, dividend, steps, method)
+    discount = np.exp(-rate * dt)
+    p_up = p * discount
+    p_down = (1 - p) * discount
+    sign = np.where(is_call, 1.0, -1.0)
+
+    # Arrays are (nodes, contracts) so each level is one contiguous prefix. Terminal
+    # node j has j up-moves; S(i-1, j) = S(i, j) / down, updated in place level by level.
+    j = np.arange(steps + 1)[:, None]
+    stock = np.exp(np.log(spot) + j * np.log(up) + (steps - j) * np.log(down))
+    values = np.maximum(sign * (stock - strike), 0.0)
+    exercise = np.empty_like(values)
+    inv_down = 1.0 / down
+    levels = {}
+    for i in range(steps - 1, -1, -1):
+        continuation = p_up * values[1:i + 2]
+        node_values = values[:i + 1]
+        node_values *= p_down
+        node_values += continuation
+        node_stock = stock[:i + 1]
+        node_stock *= inv_down
+        if american:
+            node_exercise = exercise[:i + 1]
+            np.subtract(node_stock, strike, out=node_exercise)
+            node_exercise *= sign
+            np.maximum(node_values, node_exercise, out=node_values)
+        if i <= 2:
+            levels[i] = (node_stock.copy(), node_values.copy())
+
+    (s1, v1), (s2, v2) = levels[1], levels[2]
+    price = levels[0][1][0]
+    if american:
+        # Rounding in the induction can leave the root a hair under immediate exercise
+        price = np.maximum(price, np.maximum(sign * (spot - strike), 0.0))
+    delta = (v1[1] - v1[0]) / (s1[1] - s1[0])
+    delta_up = (v2[2] - v2[1]) / (s2[2] - s2[1])
+    delta_down = (v2[1] - v2[0]) / (s2[1] - s2[0])
+    gamma = (delta_up - delta_down) / (0.5 * (s2[2] - s2[0]))
+    # The middle node two steps ahead sits at spot for CRR only; move it back to spot for Leisen-Reimer
+    offset = s2[1] - spot
+    theta = (v2[1] - delta * offset - 0.5 * gamma * offset**2 - price) / (2 * dt)
+    return {
+        "price": price,
+        "delta": delta,
+        "gamma": gamma,
+        "theta": theta / 365.0,
+    }
+
+def barone_adesi_whaley_batch(
+    spot,
+    strike,
+    maturity,
+    volatility,
+    risk_free_rate,
+    option_type,
+    dividend_yield=0.0
+) -> np.ndarray:
+    """
+    Barone-Adesi-Whaley quadratic approximation of American prices. The
+    critical exercise price is found by a vectorized Newton iteration. Calls
+    without dividend yield and puts with non-positive rates are priced European,
+    since early exercise is then never optimal. Every price is floored at
+    intrinsic value, which is also the fallback (with the European price) where
+    the quadratic approximation overflows at very low volatility.
+    """
+    is_call = np.asarray(option_type) == 'CALL'
+    spot, strike, maturity, vol, rate, dividend, is_call = (
+        np.ravel(a) for a in np.broadcast_arrays(
+            np.asarray(spot, dtype=float),
+            np.asarray(strike, dtype=float),
+            np.asarray(maturity, dtype=float),
+            np.asarray(volatility, dtype=float),
+            np.asarray(risk_free_rate, dtype=float),
+            np.asarray(dividend_yield, dtype=float),
+            is_call
+        )
+    )
+    european, _ = _black_scholes_price_vega(spot, strike, maturity, vol, rate, dividend, is_call)
+    intrinsic = np.maximum(np.where(is_call, spot - strike, strike - spot), 0.0)
+    early = np.where(is_call, dividend > 0, rate > 0)
+    # An American option is never worth less than immediate exercise
+    price = np.maximum(european, intrinsic)
+    if not early.any():
+        return price
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        price[early] = _baw_early_exercise(
+            *(a[early] for a in (spot, strike, maturity, vol, rate, dividend, is_call, european))
+        )
+    # Low vols overflow the critical-price exponentials; those contracts keep max(European, intrinsic)
+    return np.where(np.isfinite(price), np.maximum(price, intrinsic), np.maximum(european, intrinsic))
+
+def _baw_early_exercise(S, X, T, v, r, q, call, european_early):
+    """BAW value of contracts where early exercise can pay; NaN/inf where the approximation overflows."""
+
+    sqrt_t = np.sqrt(T)
+    m = 2 * r / v**2
+    n = 2 * (r - q) / v**2
+    # m / k with k = 1 - exp(-rT); tends to 2 / (v^2 T) as r -> 0 (calls with dividends)
+    k = -np.expm1(-r * T)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m_over_k = np.where(r != 0, m / k, 2 / (v**2 * T))
+    root = np.sqrt((n - 1)**2 + 4 * m_over_k)
+    exponent = np.where(call, (-(n - 1) + root) / 2, (-(n - 1) - root) / 2)
+    exp_q = np.exp(-q * T)
+    sign = np.where(call, 1.0, -1.0)
+
+    # Seed from the perpetual option's boundary (Barone-Adesi & Whaley, 1987)
+    root_inf = np.sqrt((n - 1)**2 + 4 * m)
+    s_inf = X / (1 - 2 / np.where(call, -(n - 1) + root_inf, -(n - 1) - root_inf))
+    h = np.where(call, -((r - q) * T + 2 * v * sqrt_t), (r - q) * T - 2 * v * sqrt_t) * X / np.abs(s_inf - X)
+    critical = np.where(call, X + (s_inf - X) * (1 - np.exp(h)), s_inf + (X - s_inf) * np.exp(h))
+
+    for _ in range(BAW_MAX_ITERATIONS):
+        d1, _ = calculate_d1_d2(critical, X, T, r, v, q)
+        european_at, _ = _black_scholes_price_vega(critical, X, T, v, r, q, call)
+        n_d1 = norm_cdf(sign * d1)
+        rhs = european_at + sign * (1 - exp_q * n_d1) * critical / exponent
+        pdf = norm_pdf(d1)
+        slope = sign * exp_q * n_d1 * (1 - 1 / exponent) + (1 - sign * exp_q * pdf / (v * sqrt_t)) * sign / exponent
+        updated = (X * sign + rhs - slope * critical) / (sign - slope)
+        converged = np.abs(updated - critical) < 1e-10 * X
+        critical = updated
+        if converged.all():
+            break
+
+    d1, _ = calculate_d1_d2(critical, X, T, r, v, q)
+    coefficient = sign * (critical / exponent) * (1 - exp_q * norm_cdf(sign * d1))
+    exercise_now = np.where(call, S >= critical, S <= critical)
+    value = np.where(exercise_now, sign * (S - X), european_early + coefficient * (S / critical)**exponent)
+    return np.where(np.isfinite(critical) & (critical > 0), value, np.nan)
+
+def _price_batch(spot, strike, maturity, volatility, rate, option_type, dividend, model, steps, american):
+    if model == BAW:
+        if american:
+            return barone_adesi_whaley_batch(spot, strike, maturity, volatility, rate, option_type, dividend)
+        return _black_scholes_price_vega(spot, strike, maturity, volatility, rate, dividend,
+                                         np.asarray(option_type) == 'CALL')[0]
+    return binomial_tree_batch(
+        spot, strike, maturity, volatility, rate, option_type, dividend, steps, model, american
+    )["price"]
+
+def calculate_american_option(
+    spot: float,
+    strike: float,
+    maturity: float,
+    volatility: float,
+    risk_free_rate: float,
+    option_type: str,
+    dividend_yield: float = 0.0,
+    model: str = BINOMIAL_LR,
+    steps: int = DEFAULT_STEPS,
+    american: bool = True
+) -> Dict:
+    """
+    Same result layout as calculate_black_scholes for lattice and BAW models.
+    Delta, gamma and theta come from the tree (finite differences in spot and
+    time for BAW); vega and rho from volatility and rate bumps priced in the
+    same batch as the base contract.
+    """
+    if maturity <= 0 or volatility <= 0:
+        return calculate_black_scholes(spot, strike, maturity, volatility, risk_free_rate, option_type, dividend_yield)
+    intrinsic_value = max(0.0, spot - strike) if option_type == 'CALL' else max(0.0, strike - spot)
+    if spot <= 0 or strike <= 0:
+        # Degenerate contracts have no spread of outcomes: the European limits (as in
+        # calculate_black_scholes), or immediate exercise when that is worth more
+        european = calculate_black_scholes(spot, strike, maturity, volatility, risk_free_rate, option_type, dividend_yield)
+        if not american or european["price"] >= intrinsic_value:
+            return european
+        return {
+            "price": intrinsic_value,
+            "intrinsic_value": intrinsic_value,
+            "time_value": 0.0,
+            "greeks": {"delta": 1.0 if option_type == 'CALL' else -1.0, "gamma": 0.0, "theta": 0.0, "vega": 0.0, "rho": 0.0}
+        }
+
+    # Base, vol up/down, rate up/down in a single backward induction
+    vols = np.array([volatility, volatility + VOL_BUMP, max(volatility - VOL_BUMP, 1e-4), volatility, volatility])
+    rates = np.array([risk_free_rate] * 3 + [risk_free_rate + RATE_BUMP, risk_free_rate - RATE_BUMP])
+    if model == BAW:
+        spot_bump = 0.01 * spot
+        day = 1.0 / 365.0
+        spots = np.concatenate([np.full(5, spot), [spot + spot_bump, spot - spot_bump, spot]])
+        vols = np.concatenate([vols, [volatility] * 3])
+        rates = np.concatenate([rates, [risk_free_rate] * 3])
+        maturities = np.concatenate([np.full(7, maturity), [max(maturity - day, 1e-6)]])
+        prices = _price_batch(spots, strike, maturities, vols, rates, option_type, dividend_yield, model, steps, american)
+        price = prices[0]
+        delta = (prices[5] - prices[6]) / (2 * spot_bump)
+        gamma = (prices[5] - 2 * price + prices[6]) / spot_bump**2
+        theta = prices[7] - price
+    else:
+        tree = binomial_tree_batch(
+            spot, strike, maturity, vols, rates, option_type, dividend_yield, steps, model, american
+        )
+        prices = tree["price"]
+        price = prices[0]
+        delta, gamma, theta = tree["delta"][0], tree["gamma"][0], tree["theta"][0]
+    vega = (prices[1] - prices[2]) / ((vols[1] - vols[2]) * 100)
+    rho = (prices[3] - prices[4]) / (2 * RATE_BUMP * 100)
+
+    price = max(float(price), intrinsic_value) if american else max(0.0, float(price))
+    return {
+        "price": price,
+        "intrinsic_value": float(intrinsic_value),
+        "time_value": max(0.0, price - intrinsic_value),
+        "greeks": {
+            "delta": round(float(delta), 4),
+            "gamma": round(float(gamma), 4),
+            "theta": round(float(theta), 4),
+            "vega": round(float(vega), 4),
+            "rho": round(float(rho), 4)
+        }
+    }
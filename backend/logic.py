@@ -1,7 +1,9 @@
+import math
 import numpy as np
-from scipy.stats import norm
 from typing import Dict, List, Optional, Union
 
+from .normal import norm_cdf, norm_pdf
+
 def calculate_d1_d2(
     spot: float,
     strike: float,
@@ -11,6 +13,13 @@ def calculate_d1_d2(
     dividend: float = 0.0
 ) -> tuple:
     """Calculate d1 and d2 for Black-Scholes."""
+    if isinstance(spot, (int, float)) and isinstance(strike, (int, float)) and spot > 0 and strike > 0 \
+            and isinstance(time, (int, float)) and isinstance(vol, (int, float)) and time > 0 and vol > 0:
+        # Scalar fast path: math avoids NumPy's per-call overhead on plain floats. Degenerate
+        # inputs (expiry, zero vol) take the NumPy path, which returns inf/nan instead of raising
+        sqrt_time = math.sqrt(time)
+        d1 = (math.log(spot / strike) + (rate - dividend + 0.5 * vol**2) * time) / (vol * sqrt_time)
+        return d1, d1 - vol * sqrt_time
     d1 = (np.log(spot / strike) + (rate - dividend + 0.5 * vol**2) * time) / (vol * np.sqrt(time))
     d2 = d1 - vol * np.sqrt(time)
     return d1, d2
@@ -43,17 +52,27 @@ def calculate_black_scholes(
             }
         }
 
+    if spot <= 0 or strike <= 0:
+        # Degenerate contracts hit 0/0 and log(0) in plain floats; the batch kernel takes their limits
+        batch = calculate_black_scholes_batch(spot, strike, maturity, volatility, risk_free_rate, option_type, dividend_yield)
+        return {
+            "price": float(batch["price"]),
+            "intrinsic_value": float(batch["intrinsic_value"]),
+            "time_value": float(batch["time_value"]),
+            "greeks": {greek: round(float(batch[greek]), 4) for greek in ("delta", "gamma", "theta", "vega", "rho")}
+        }
+
     d1, d2 = calculate_d1_d2(spot, strike, maturity, risk_free_rate, volatility, dividend_yield)
     
     # Normal CDF and PDF
-    nd1 = norm.cdf(d1)
-    nd2 = norm.cdf(d2)
-    n_neg_d1 = norm.cdf(-d1)
-    n_neg_d2 = norm.cdf(-d2)
-    pdf_d1 = norm.pdf(d1)
+    nd1 = norm_cdf(d1)
+    nd2 = norm_cdf(d2)
+    n_neg_d1 = norm_cdf(-d1)
+    n_neg_d2 = norm_cdf(-d2)
+    pdf_d1 = norm_pdf(d1)
     
-    exp_div = np.exp(-dividend_yield * maturity)
-    exp_rate = np.exp(-risk_free_rate * maturity)
+    exp_div = math.exp(-dividend_yield * maturity)
+    exp_rate = math.exp(-risk_free_rate * maturity)
     
     if option_type == 'CALL':
         price = spot * exp_div * nd1 - strike * exp_rate * nd2
@@ -66,10 +85,10 @@ def calculate_black_scholes(
     time_value = max(0.0, float(price) - intrinsic_value)
     
     # Gamma
-    gamma = exp_div * pdf_d1 / (spot * volatility * np.sqrt(maturity))
+    gamma = exp_div * pdf_d1 / (spot * volatility * math.sqrt(maturity))
     
     # Theta (daily)
-    theta_base = -spot * exp_div * pdf_d1 * volatility / (2 * np.sqrt(maturity))
+    theta_base = -spot * exp_div * pdf_d1 * volatility / (2 * math.sqrt(maturity))
     if option_type == 'CALL':
         theta = theta_base - risk_free_rate * strike * exp_rate * nd2 + dividend_yield * spot * exp_div * nd1
     else:
@@ -78,7 +97,7 @@ def calculate_black_scholes(
     theta_daily = theta / 365.0
     
     # Vega (for 1% change in volatility)
-    vega = spot * exp_div * pdf_d1 * np.sqrt(maturity) / 100.0
+    vega = spot * exp_div * pdf_d1 * math.sqrt(maturity) / 100.0
     
     # Rho (for 1% change in rate)
     if option_type == 'CALL':
@@ -99,33 +118,162 @@ def calculate_black_scholes(
         }
     }
 
-def calculate_payoff(
-    spot_prices: np.ndarray,
+def calculate_black_scholes_batch(
+    spot,
+    strike,
+    maturity,
+    volatility,
+    risk_free_rate,
+    option_type,
+    dividend_yield=0.0
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized Black-Scholes for a whole chain in one pass.
+    Inputs are scalars or arrays that broadcast together; option_type holds
+    'CALL'/'PUT' values. Returns columnar arrays with the same fields and units
+    as calculate_black_scholes (greeks are flattened and not rounded).
+    """
+    is_call = np.asarray(option_type) == 'CALL'
+    spot, strike, maturity, volatility, risk_free_rate, dividend_yield, is_call = np.broadcast_arrays(
+        np.asarray(spot, dtype=float),
+        np.asarray(strike, dtype=float),
+        np.asarray(maturity, dtype=float),
+        np.asarray(volatility, dtype=float),
+        np.asarray(risk_free_rate, dtype=float),
+        np.asarray(dividend_yield, dtype=float),
+        is_call
+    )
+
+    intrinsic_value = np.where(is_call, np.maximum(0.0, spot - strike), np.maximum(0.0, strike - spot))
+
+    # Expired or zero-vol contracts collapse to intrinsic value with flat greeks;
+    # substitute harmless inputs so the live formulas stay warning-free.
+    live = (maturity > 0) & (volatility > 0)
+    time = np.where(live, maturity, 1.0)
+    vol = np.where(live, volatility, 1.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1, d2 = calculate_d1_d2(spot, strike, time, risk_free_rate, vol, dividend_yield)
+
+    nd1 = norm_cdf(d1)
+    nd2 = norm_cdf(d2)
+    n_neg_d1 = norm_cdf(-d1)
+    n_neg_d2 = norm_cdf(-d2)
+    pdf_d1 = norm_pdf(d1)
+
+    exp_div = np.exp(-dividend_yield * time)
+    exp_rate = np.exp(-risk_free_rate * time)
+    sqrt_time = np.sqrt(time)
+
+    price = np.where(
+        is_call,
+        spot * exp_div * nd1 - strike * exp_rate * nd2,
+        strike * exp_rate * n_neg_d2 - spot * exp_div * n_neg_d1
+    )
+    delta = np.where(is_call, exp_div * nd1, -exp_div * n_neg_d1)
+    # At zero spot d1 is -inf and the density vanishes; gamma's limit is 0, not 0/0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gamma = np.where(spot > 0, exp_div * pdf_d1 / (spot * vol * sqrt_time), 0.0)
+
+    theta_base = -spot * exp_div * pdf_d1 * vol / (2 * sqrt_time)
+    theta = np.where(
+        is_call,
+        theta_base - risk_free_rate * strike * exp_rate * nd2 + dividend_yield * spot * exp_div * nd1,
+        theta_base + risk_free_rate * strike * exp_rate * n_neg_d2 - dividend_yield * spot * exp_div * n_neg_d1
+    )
+    vega = spot * exp_div * pdf_d1 * sqrt_time / 100.0
+    rho = np.where(
+        is_call,
+        strike * time * exp_rate * nd2 / 100.0,
+        -strike * time * exp_rate * n_neg_d2 / 100.0
+    )
+
+    zero = np.zeros_like(price)
+    return {
+        "price": np.where(live, np.maximum(0.0, price), intrinsic_value),
+        "intrinsic_value": intrinsic_value,
+        "time_value": np.where(live, np.maximum(0.0, price - intrinsic_value), zero),
+        "delta": np.where(live, delta, zero),
+        "gamma": np.where(live, gamma, zero),
+        "theta": np.where(live, theta / 365.0, zero),
+        "vega": np.where(live, vega, zero),
+        "rho": np.where(live, rho, zero)
+    }
+
+def black_scholes_price(
+    spot,
+    strike,
+    maturity,
+    volatility,
+    risk_free_rate,
+    is_call,
+    dividend_yield=0.0
+) -> np.ndarray:
+    """
+    Price-only Black-Scholes for large broadcast grids, e.g. (contracts x
+    scenarios). Inputs are used as given (no broadcast copies) so per-axis
+    arrays stay small, and no greeks are computed. Expired contracts are
+    worth intrinsic; zero spot or volatility is allowed.
+    """
+    live = maturity > 0
+    time = np.where(live, maturity, 1.0)
+    total_vol = np.maximum(volatility, 1e-12) * np.sqrt(time)
+    spot_disc = spot * np.exp(-dividend_yield * time)
+    strike_disc = strike * np.exp(-risk_free_rate * time)
+    with np.errstate(divide='ignore'):
+        d1 = np.log(spot_disc / strike_disc) / total_vol + 0.5 * total_vol
+    sign = np.where(is_call, 1.0, -1.0)
+    value = sign * (spot_disc * norm_cdf(sign * d1) - strike_disc * norm_cdf(sign * (d1 - total_vol)))
+    return np.where(live, value, np.maximum(sign * (spot - strike), 0.0))
+
+def calculate_payoff_batch(
+    spot_prices,
     strike: float,
     premium: float,
     option_type: str,
     position: str = 'LONG'
-) -> List[Dict]:
-    """Calculate payoff at different spot prices."""
+) -> Dict[str, np.ndarray]:
+    """Columnar payoff at expiry: price, payoff and intrinsic arrays (unrounded)."""
+    spot_prices = np.asarray(spot_prices, dtype=float)
     if option_type == 'CALL':
         intrinsic = np.maximum(0, spot_prices - strike)
     else:
         intrinsic = np.maximum(0, strike - spot_prices)
-        
+
     if position == 'LONG':
         payoff = intrinsic - premium
     else:
         payoff = premium - intrinsic
-        
+
+    return {"price": spot_prices, "payoff": payoff, "intrinsic": intrinsic}
+
+def calculate_payoff(
+    spot_prices: np.ndarray,
+    strike: float,
+    premium: float,
+    option_type: str,
+    position: str = 'LONG'
+) -> List[Dict]:
+    """Calculate payoff at different spot prices."""
+    result = calculate_payoff_batch(spot_prices, strike, premium, option_type, position)
+    columns = [np.round(result[key], 2).tolist() for key in ("price", "payoff", "intrinsic")]
     return [
-        {
-            "price": round(float(p), 2),
-            "payoff": round(float(pay), 2),
-            "intrinsic": round(float(i), 2)
-        }
-        for p, pay, i in zip(spot_prices, payoff, intrinsic)
+        {"price": p, "payoff": pay, "intrinsic": i}
+        for p, pay, i in zip(*columns)
     ]
 
+def downsample_indices(n: int, max_points: int, keep=()) -> np.ndarray:
+    """
+    Sorted indices of at most about `max_points` evenly spaced samples out of
+    `n`, always including the first, the last and every index in `keep`
+    (e.g. the kink of a payoff, so a piecewise-linear chart stays exact).
+    """
+    if n <= max_points:
+        return np.arange(n)
+    keep = np.asarray(keep, dtype=int)
+    uniform = np.round(np.linspace(0, n - 1, max(max_points - keep.size, 2))).astype(int)
+    return np.unique(np.concatenate([uniform, keep]))
+
 def calculate_implied_volatility(
     market_price: float,
     spot: float,
@@ -155,3 +303,133 @@ def calculate_implied_volatility(
         vol = np.clip(vol, 0.01, 5.0)
         
     return float(vol)
+
+IV_MIN_VOL = 1e-4
+IV_MAX_VOL = 5.0
+
+def _black_scholes_price_vega(
+    spot: np.ndarray,
+    strike: np.ndarray,
+    maturity: np.ndarray,
+    vol: np.ndarray,
+    rate: np.ndarray,
+    dividend: np.ndarray,
+    is_call: np.ndarray
+) -> tuple:
+    """Unrounded Black-Scholes price and vega (per 1.00 of vol) for live contracts."""
+    d1, d2 = calculate_d1_d2(spot, strike, maturity, rate, vol, dividend)
+    spot_disc = spot * np.exp(-dividend * maturity)
+    strike_disc = strike * np.exp(-rate * maturity)
+    price = np.where(
+        is_call,
+        spot_disc * norm_cdf(d1) - strike_disc * norm_cdf(d2),
+        strike_disc * norm_cdf(-d2) - spot_disc * norm_cdf(-d1)
+    )
+    vega = spot_disc * norm_pdf(d1) * np.sqrt(maturity)
+    return price, vega
+
+def _implied_volatility_guess(
+    price: np.ndarray,
+    spot: np.ndarray,
+    strike: np.ndarray,
+    maturity: np.ndarray,
+    rate: np.ndarray,
+    dividend: np.ndarray,
+    is_call: np.ndarray
+) -> np.ndarray:
+    """Corrado-Miller initial guess, falling back to Brenner-Subrahmanyam."""
+    spot_disc = spot * np.exp(-dividend * maturity)
+    strike_disc = strike * np.exp(-rate * maturity)
+    # Work with the call price; puts are mapped through put-call parity
+    call = np.where(is_call, price, price + spot_disc - strike_disc)
+    half_moneyness = 0.5 * (spot_disc - strike_disc)
+    radicand = np.maximum((call - half_moneyness)**2 - (spot_disc - strike_disc)**2 / np.pi, 0.0)
+    total_vol = np.sqrt(2 * np.pi) / (spot_disc + strike_disc) * (call - half_moneyness + np.sqrt(radicand))
+    guess = total_vol / np.sqrt(maturity)
+    brenner = np.sqrt(2 * np.pi / maturity) * call / spot_disc
+    guess = np.where(np.isfinite(guess) & (guess > 0), guess, brenner)
+    return np.clip(guess, 2 * IV_MIN_VOL, 0.5 * IV_MAX_VOL)
+
+def calculate_implied_volatility_batch(
+    market_price,
+    spot,
+    strike,
+    maturity,
+    rate,
+    option_type,
+    dividend=0.0,
+    tolerance: float = 1e-8,
+    max_iterations: int = 100
+) -> Dict[str, np.ndarray]:
+    """
+    Implied volatility for a whole chain at once.
+    Safeguarded Newton-Raphson on unrounded vega inside a [IV_MIN_VOL, IV_MAX_VOL]
+    bracket that falls back to bisection whenever a step leaves the bracket.
+    Returns "implied_volatility" (NaN when no solution exists) and a per-contract
+    "converged" mask.
+    """
+    is_call = np.asarray(option_type) == 'CALL'
+    arrays = np.broadcast_arrays(
+        np.asarray(market_price, dtype=float),
+        np.asarray(spot, dtype=float),
+        np.asarray(strike, dtype=float),
+        np.asarray(maturity, dtype=float),
+        np.asarray(rate, dtype=float),
+        np.asarray(dividend, dtype=float),
+        is_call
+    )
+    shape = arrays[0].shape
+    market_price, spot, strike, maturity, rate, dividend, is_call = (a.ravel() for a in arrays)
+    n = market_price.size
+    iv = np.full(n, np.nan)
+    converged = np.zeros(n, dtype=bool)
+
+    # Only contracts whose price lies inside the bracket have a root to find
+    valid = (maturity > 0) & (spot > 0) & (strike > 0) & np.isfinite(market_price)
+    idx = np.flatnonzero(valid)
+    args = (spot[idx], strike[idx], maturity[idx], rate[idx], dividend[idx], is_call[idx])
+    target = market_price[idx]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_lo, _ = _black_scholes_price_vega(*args[:3], np.full(idx.size, IV_MIN_VOL), *args[3:])
+        price_hi, _ = _black_scholes_price_vega(*args[:3], np.full(idx.size, IV_MAX_VOL), *args[3:])
+    at_lo = np.abs(price_lo - target) < tolerance
+    iv[idx[at_lo]] = IV_MIN_VOL
+    converged[idx[at_lo]] = True
+    keep = ~at_lo & (target > price_lo) & (target < price_hi)
+    idx = idx[keep]
+    target = target[keep]
+    spot_a, strike_a, maturity_a, rate_a, dividend_a, is_call_a = (a[keep] for a in args)
+
+    lo = np.full(idx.size, IV_MIN_VOL)
+    hi = np.full(idx.size, IV_MAX_VOL)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol = _implied_volatility_guess(target, spot_a, strike_a, maturity_a, rate_a, dividend_a, is_call_a)
+
+    for _ in range(max_iterations):
+        if idx.size == 0:
+            break
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            price, vega = _black_scholes_price_vega(spot_a, strike_a, maturity_a, vol, rate_a, dividend_a, is_call_a)
+            diff = price - target
+            # Price is increasing in vol, so the sign of diff tightens the bracket
+            hi = np.where(diff > 0, vol, hi)
+            lo = np.where(diff < 0, vol, lo)
+            newton = vol - diff / vega
+
+        done = (np.abs(diff) < tolerance) | (hi - lo < tolerance * 1e-2)
+        iv[idx[done]] = vol[done]
+        converged[idx[done]] = True
+
+        in_bracket = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        vol = np.where(in_bracket, newton, 0.5 * (lo + hi))
+
+        active = ~done
+        idx = idx[active]
+        target, vol, lo, hi = target[active], vol[active], lo[active], hi[active]
+        spot_a, strike_a, maturity_a = spot_a[active], strike_a[active], maturity_a[active]
+        rate_a, dividend_a, is_call_a = rate_a[active], dividend_a[active], is_call_a[active]
+
+    return {
+        "implied_volatility": iv.reshape(shape),
+        "converged": converged.reshape(shape)
+    }
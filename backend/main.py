@@ -1,15 +1,40 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+import asyncio
+import os
+from contextlib import asynccontextmanager
 import numpy as np
-from typing import List
+import pandas as pd
+from typing import List, Optional
 from .models import (
-    OptionRequest, OptionResult, PayoffRequest, PayoffPoint, 
-    MarketAsset, MarketIndicator
+    OptionRequest, OptionResult, OptionBatchRequest, OptionBatchResult,
+    PayoffRequest, PayoffPoint, MarketAsset, MarketIndicator,
+    MonteCarloRequest, MonteCarloResult, StrategyRequest, StrategyResult,
+    ScenarioRequest, ScenarioResult, PortfolioPosition, PortfolioRequest, PortfolioResult, SpotUpdate
 )
-from .logic import calculate_black_scholes, calculate_payoff
-from .data_fetcher import fetcher
+from .logic import calculate_black_scholes_batch, calculate_payoff_batch, downsample_indices
+from .lattice import BAW, BINOMIAL_LR, BLACK_SCHOLES
+from .monte_carlo import Leg, MarketModel, shutdown_pool, simulate
+from . import portfolio, strategy
+from .data_fetcher import DEFAULT_RISK_FREE_RATE, fetcher
+from .prefetch import Prefetcher
+from .scenarios import ShockGrid, reprice
+from .pricing import cached_price, normalize_percent, pricing_cache, pricing_key
+from .serialization import frame_response
 
-app = FastAPI(title="Options Analysis API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the next trading day in the background; set B3_PREFETCH=0 to disable
+    task = None
+    if os.environ.get("B3_PREFETCH", "1") != "0":
+        task = asyncio.create_task(Prefetcher(fetcher).run_forever())
+    yield
+    if task is not None:
+        task.cancel()
+    shutdown_pool()
+
+app = FastAPI(title="Options Analysis API", lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -27,6 +52,9 @@ MOCK_ASSETS = [
     {"symbol": "ITUB4", "name": "Itaú Unibanco PN", "price": 32.15, "change": 0.45, "change_percent": 1.42, "volume": 67000000, "high": 32.48, "low": 31.78, "open": 31.80, "close": 31.70},
 ]
 
+# Tickers shown by /market/assets when no symbols are requested
+DEFAULT_ASSET_SYMBOLS = ["PETR4", "VALE3", "ITUB4"]
+
 MOCK_INDICATORS = [
     {"label": "IBOV", "value": 128456, "change": 1.23, "change_percent": 0.96},
     {"label": "DÓLAR", "value": 5.7423, "change": -0.02, "change_percent": -0.35},
@@ -37,54 +65,364 @@ MOCK_INDICATORS = [
 async def root():
     return {"message": "Options Analysis API is running"}
 
+@app.get("/cache/stats")
+async def get_cache_stats():
+    return {
+        "latest_date": fetcher.latest_date.isoformat() if fetcher.latest_date else None,
+        "market_data": fetcher.memory_cache.stats(),
+        "pricing": pricing_cache.stats(),
+    }
+
 @app.get("/market/indicators", response_model=List[MarketIndicator])
 async def get_indicators():
     return MOCK_INDICATORS
 
 @app.get("/market/assets", response_model=List[MarketAsset])
-async def get_assets():
-    return MOCK_ASSETS
+async def get_assets(symbols: Optional[str] = None):
+    """Spot quotes from the cached COTAHIST day; `symbols` is a comma-separated ticker list."""
+    requested = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else DEFAULT_ASSET_SYMBOLS
+    try:
+        assets = await fetcher.run_async(fetcher.get_assets, requested)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out fetching market data")
+    if assets:
+        return assets
+    # No trading day could be loaded: keep the dashboard populated
+    print("No COTAHIST spot data available, serving mock assets")
+    return [asset for asset in MOCK_ASSETS if asset["symbol"] in requested]
 
 @app.get("/market/options/{symbol}")
-async def get_options(symbol: str):
+async def get_options(symbol: str, accept: Optional[str] = Header(None)):
+    """
+    Option list for an underlying. Records JSON by default; send
+    Accept: application/vnd.columnar+json or application/vnd.apache.arrow.stream
+    for column-oriented output.
+    """
     try:
-        options = fetcher.get_options_for_symbol(symbol.upper())
-        if not options:
-            return []
-        return options
+        options = await fetcher.run_async(fetcher.get_options_frame, symbol.upper())
+        return frame_response(options, accept)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Timed out fetching options for {symbol.upper()}")
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/market/chain/{symbol}")
+async def get_chain(symbol: str, rate: float = DEFAULT_RISK_FREE_RATE, accept: Optional[str] = Header(None)):
+    """
+    Every listed series of the underlying with implied volatility, greeks and
+    moneyness (strike / spot) from the latest trading day. `rate` is the annual
+    risk-free rate as a fraction or percentage. Spot and trading date are sent
+    in the X-Spot-Price and X-Trading-Date headers.
+    """
+    symbol = symbol.upper()
+    try:
+        chain = await fetcher.run_async(fetcher.get_chain_analytics, symbol, normalize_percent(rate))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Timed out fetching the {symbol} chain")
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if chain is None:
+        raise HTTPException(status_code=503, detail="No B3 trading day available")
+    headers = {"X-Spot-Price": str(chain.attrs["spot"]), "X-Trading-Date": chain.attrs["trading_date"]}
+    return frame_response(chain, accept, headers)
+
+def _parse_floats(values: Optional[str]) -> Optional[List[float]]:
+    return [float(v) for v in values.split(",") if v.strip()] if values else None
+
+async def _vol_surface(symbol: str, rate: float):
+    try:
+        surface = await fetcher.run_async(fetcher.get_vol_surface, symbol, normalize_percent(rate))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Timed out fitting the {symbol} surface")
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if surface is None:
+        raise HTTPException(status_code=503, detail="No B3 trading day available")
+    return surface
+
+@app.get("/market/surface/{symbol}")
+async def get_surface(
+    symbol: str,
+    rate: float = DEFAULT_RISK_FREE_RATE,
+    strikes: Optional[str] = None,
+    business_days: Optional[str] = None,
+    accept: Optional[str] = Header(None)
+):
+    """
+    Implied volatility surface on a regular (strike, maturity) grid, from
+    smiles fitted per expiry. `strikes` and `business_days` are optional
+    comma-separated axes; by default strikes span spot +-30% and maturities the
+    listed expiries.
+    """
+    symbol = symbol.upper()
+    surface = await _vol_surface(symbol, rate)
+    try:
+        strike_axis, days_axis = _parse_floats(strikes), _parse_floats(business_days)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="strikes and business_days must be comma-separated numbers")
+    if strike_axis is None and days_axis is None:
+        grid = surface.default_grid()
+    else:
+        default = surface.default_grid()
+        grid = surface.grid(
+            strike_axis if strike_axis is not None else default['strike'].unique(),
+            days_axis if days_axis is not None else default['business_days'].unique()
+        )
+    return frame_response(grid, accept, {"X-Spot-Price": str(surface.spot)})
+
+@app.get("/market/surface/{symbol}/smiles")
+async def get_surface_smiles(symbol: str, rate: float = DEFAULT_RISK_FREE_RATE):
+    """Fitted smile parameters per expiry (raw SVI a, b, rho, m, sigma, or quadratic coefficients)."""
+    surface = await _vol_surface(symbol.upper(), rate)
+    return [smile.to_dict() for smile in surface.slices]
+
 @app.post("/calculate/option", response_model=OptionResult)
 async def calculate_option(request: OptionRequest):
+    """
+    Prices one contract. European contracts default to Black-Scholes and
+    American ones to a Leisen-Reimer tree; `model` picks CRR or the
+    Barone-Adesi-Whaley approximation instead.
+    """
+    american = request.style == "AMERICAN"
+    model = request.model or (BINOMIAL_LR if american else BLACK_SCHOLES)
+    if model == BLACK_SCHOLES and american:
+        raise HTTPException(status_code=400, detail="BLACK_SCHOLES prices European options only")
+    if model == BAW and not american:
+        raise HTTPException(status_code=400, detail="BAW prices American options only")
+
+    key = pricing_key(
+        request.type, request.spot, request.strike, request.maturity, request.volatility,
+        request.risk_free_rate, request.dividend_yield, model, request.steps, american
+    )
+    try:
+        if model == BLACK_SCHOLES:
+            return cached_price(key)
+        # Lattices take tens of milliseconds at high step counts; keep them off the event loop
+        return await asyncio.to_thread(cached_price, key)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/calculate/options", response_model=OptionBatchResult)
+async def calculate_options(request: OptionBatchRequest):
+    n = len(request.type)
+    columns = [request.spot, request.strike, request.maturity, request.volatility]
+    if any(len(col) != n for col in columns):
+        raise HTTPException(status_code=400, detail="All contract columns must have the same length")
+    if any(t not in ("CALL", "PUT") for t in request.type):
+        raise HTTPException(status_code=400, detail="type must be CALL or PUT")
+    try:
+        result = calculate_black_scholes_batch(
+            spot=np.asarray(request.spot, dtype=float),
+            strike=np.asarray(request.strike, dtype=float),
+            maturity=np.asarray(request.maturity, dtype=float),
+            volatility=normalize_percent(np.asarray(request.volatility, dtype=float)),
+            risk_free_rate=normalize_percent(np.asarray(request.risk_free_rate, dtype=float)),
+            option_type=np.asarray(request.type),
+            dividend_yield=normalize_percent(np.asarray(request.dividend_yield, dtype=float))
+        )
+        # Bypass per-element response validation; the columns are already plain floats
+        return JSONResponse({key: np.broadcast_to(col, (n,)).tolist() for key, col in result.items()})
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/calculate/monte-carlo", response_model=MonteCarloResult)
+async def calculate_monte_carlo(request: MonteCarloRequest):
+    """
+    Monte Carlo value and greeks of a multi-leg position, including Asian and
+    barrier legs, with standard errors. Pass `seed` for reproducible results.
+    """
+    model = MarketModel(
+        spot=request.spot,
+        volatility=normalize_percent(request.volatility),
+        risk_free_rate=normalize_percent(request.risk_free_rate),
+        maturity=request.maturity,
+        dividend_yield=normalize_percent(request.dividend_yield),
+        jump_intensity=request.jump_intensity,
+        jump_mean=request.jump_mean,
+        jump_volatility=request.jump_volatility
+    )
+    legs = [Leg(leg.type, leg.strike, leg.quantity, leg.style, leg.barrier) for leg in request.legs]
+    try:
+        # Simulation fans out to worker processes; the thread only waits on them
+        return await asyncio.to_thread(simulate, model, legs, request.paths, request.time_steps, request.seed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/calculate/strategy", response_model=StrategyResult)
+async def calculate_strategy(request: StrategyRequest):
+    """
+    Expiry payoff, breakevens and a (days to expiry x spot) mark-to-model P&L
+    grid for a multi-leg strategy. `pnl[i][j]` is the P&L with
+    `days_to_expiry[i]` days left and the underlying at `prices[j]`.
+    """
+    if any(leg.type != "STOCK" and leg.strike is None for leg in request.legs):
+        raise HTTPException(status_code=400, detail="CALL and PUT legs need a strike")
+    legs = [strategy.Leg(leg.type, leg.quantity, leg.strike, leg.premium) for leg in request.legs]
+    low, high = strategy.price_range(legs, request.spot)
+    low = request.min_price if request.min_price is not None else low
+    high = request.max_price if request.max_price is not None else high
+    if high <= low:
+        raise HTTPException(status_code=400, detail="max_price must be above min_price")
+    prices = np.linspace(low, high, request.price_steps)
+    days = np.linspace(request.maturity * 365.0, 0.0, request.time_steps + 1)
     try:
-        result = calculate_black_scholes(
+        result = strategy.strategy_grid(
+            legs,
             spot=request.spot,
-            strike=request.strike,
+            volatility=normalize_percent(request.volatility),
+            rate=normalize_percent(request.risk_free_rate),
             maturity=request.maturity,
-            volatility=request.volatility / 100.0 if request.volatility > 1.0 else request.volatility,
-            risk_free_rate=request.risk_free_rate / 100.0 if request.risk_free_rate > 1.0 else request.risk_free_rate,
-            option_type=request.type,
-            dividend_yield=request.dividend_yield / 100.0 if request.dividend_yield > 1.0 else request.dividend_yield
+            prices=prices,
+            days_to_expiry=days,
+            dividend=normalize_percent(request.dividend_yield)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Bypass per-element response validation; a 500 x 60 grid is 30k floats
+    return JSONResponse({
+        key: value.tolist() if isinstance(value, np.ndarray) else value for key, value in result.items()
+    })
+
+@app.post("/risk/scenarios", response_model=ScenarioResult)
+async def risk_scenarios(request: ScenarioRequest):
+    """
+    Revalues a book of European options under every combination of spot,
+    vol, time and rate shocks. `pnl[i][j][k][l]` is the book's P&L with spot
+    shocked by `spot_shocks[i]`, vol by `vol_shocks[j]`, `days[k]` days
+    forward and rates moved by `rate_shocks_bps[l]`.
+    """
+    if any(p.style == "AMERICAN" for p in request.positions):
+        raise HTTPException(status_code=400, detail="Scenario repricing supports European positions only")
+    positions = request.positions
+    grid = ShockGrid(
+        spot=request.spot_shocks,
+        volatility=request.vol_shocks,
+        days=request.days,
+        rate=[bps / 10_000.0 for bps in request.rate_shocks_bps]
+    )
+    try:
+        result = await asyncio.to_thread(
+            reprice,
+            spot=np.array([p.spot for p in positions]),
+            strike=np.array([p.strike for p in positions]),
+            maturity=np.array([p.maturity for p in positions]),
+            volatility=normalize_percent(np.array([p.volatility for p in positions])),
+            risk_free_rate=normalize_percent(np.array([p.risk_free_rate for p in positions])),
+            option_type=np.array([p.type for p in positions]),
+            quantity=np.array([p.quantity * p.multiplier * (1 if p.position == "LONG" else -1) for p in positions]),
+            grid=grid,
+            dividend_yield=normalize_percent(np.array([p.dividend_yield for p in positions])),
+            by_contract=request.by_position
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    worst = result["worst_scenario"]
+    worst["rate_bps"] = worst.pop("rate") * 10_000.0
+    # Bypass per-element response validation; a 25 x 10 x 10 x 4 cube is 10k floats
+    return JSONResponse({
+        "base_value": result["base_value"],
+        "spot_shocks": request.spot_shocks,
+        "vol_shocks": request.vol_shocks,
+        "days": request.days,
+        "rate_shocks_bps": request.rate_shocks_bps,
+        "pnl": result["pnl"].tolist(),
+        "worst_pnl": result["worst_pnl"],
+        "worst_scenario": worst,
+        "position_pnl": result["contract_pnl"].tolist() if request.by_position else None,
+    })
+
+def _holdings(positions: List[PortfolioPosition]) -> List[portfolio.Position]:
+    if any(p.style == "AMERICAN" for p in positions):
+        raise HTTPException(status_code=400, detail="Portfolio greeks support European positions only")
+    return [
+        portfolio.Position(
+            id=p.id,
+            underlying=p.underlying.upper(),
+            type=p.type,
+            spot=p.spot,
+            strike=p.strike,
+            maturity=p.maturity,
+            volatility=normalize_percent(p.volatility),
+            risk_free_rate=normalize_percent(p.risk_free_rate),
+            dividend_yield=normalize_percent(p.dividend_yield),
+            quantity=p.quantity if p.position == "LONG" else -p.quantity,
+            multiplier=p.multiplier
         )
-        return result
+        for p in positions
+    ]
+
+@app.get("/risk/portfolio", response_model=PortfolioResult)
+async def get_portfolio():
+    """Net value and greeks of the current book, from cached per-position greeks."""
+    return portfolio.portfolio.exposures()
+
+@app.post("/risk/portfolio", response_model=PortfolioResult)
+async def load_portfolio(request: PortfolioRequest):
+    """
+    Replaces the book and returns its net value, delta, gamma, vega, theta
+    and rho per underlying and in total, scaled by quantity and
+    contract multiplier. The book is priced in one batched pass.
+    """
+    holdings = _holdings(request.positions)
+    try:
+        portfolio.portfolio.load(holdings)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return portfolio.portfolio.exposures()
+
+@app.put("/risk/portfolio/positions", response_model=PortfolioResult)
+async def upsert_positions(request: PortfolioRequest):
+    """Adds or replaces positions by id, repricing only those positions."""
+    holdings = _holdings(request.positions)
+    try:
+        portfolio.portfolio.upsert(holdings)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return portfolio.portfolio.exposures()
+
+@app.delete("/risk/portfolio/positions/{position_id}", response_model=PortfolioResult)
+async def remove_position(position_id: str):
+    try:
+        portfolio.portfolio.remove(position_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No position {position_id}")
+    return portfolio.portfolio.exposures()
+
+@app.put("/risk/portfolio/spot/{underlying}", response_model=PortfolioResult)
+async def update_spot(underlying: str, request: SpotUpdate):
+    """Moves one underlying's spot, repricing only the positions on it."""
+    try:
+        portfolio.portfolio.set_spot(underlying.upper(), request.spot)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No positions on {underlying}")
+    return portfolio.portfolio.exposures()
 
 @app.post("/calculate/payoff", response_model=List[PayoffPoint])
-async def post_calculate_payoff(request: PayoffRequest):
+async def post_calculate_payoff(request: PayoffRequest, accept: Optional[str] = Header(None)):
+    """
+    Payoff at expiry over [min_price, max_price]. Records JSON by default;
+    send `Accept: application/vnd.columnar+json` (or Arrow) for arrays. With
+    `max_points`, only a chart-sized subset of the `steps` grid is evaluated,
+    always including the point nearest the strike.
+    """
     try:
-        prices = np.linspace(request.min_price, request.max_price, request.steps)
-        result = calculate_payoff(
+        if request.max_points:
+            spacing = (request.max_price - request.min_price) / (request.steps - 1)
+            kink = np.clip(np.round((request.strike - request.min_price) / spacing), 0, request.steps - 1) if spacing else 0
+            prices = request.min_price + downsample_indices(request.steps, request.max_points, [kink]) * spacing
+        else:
+            prices = np.linspace(request.min_price, request.max_price, request.steps)
+        result = calculate_payoff_batch(
             spot_prices=prices,
             strike=request.strike,
             premium=request.premium,
             option_type=request.type,
             position=request.position
         )
-        return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    # Serialized straight from the columns, skipping per-point PayoffPoint validation
+    return frame_response(pd.DataFrame({key: np.round(column, 2) for key, column in result.items()}), accept)
 
 if __name__ == "__main__":
     import uvicorn
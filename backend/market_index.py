@@ -0,0 +1,114 @@
+import datetime
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+from .cache import frame_nbytes
+
+# Columns returned by /market/options/{symbol}, in order
+OPTION_EXPORT_COLUMNS = ["symbol", "strike", "price", "type", "maturity_date", "volume"]
+
+# Columns of the spot quote table, one row per VISTA ticker
+QUOTE_COLUMNS = ["symbol", "name", "price", "open", "high", "low", "volume"]
+
+def underlying_root(symbol: str) -> str:
+    """B3 option tickers share the first four letters of their underlying (PETR4 -> PETR)."""
+    return symbol[:4].upper()
+
+class QuoteIndex:
+    """
+    Spot-market (VISTA) OHLCV of one trading day with a symbol -> row table,
+    so quote lookups are O(1) instead of a scan of the day's rows.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        names = df['NOME_DA_EMPRESA'].fillna("") if 'NOME_DA_EMPRESA' in df else pd.Series("", index=df.index)
+        if 'ESPECIFICACAO_DO_PAPEL' in df:
+            # "PN      N2" -> "PN"; the share class is the first word of the specification
+            share_class = df['ESPECIFICACAO_DO_PAPEL'].fillna("").str.split().str[0].fillna("")
+            names = (names + " " + share_class).str.strip()
+        self.frame = pd.DataFrame({
+            "symbol": df['CODIGO_DE_NEGOCIACAO'].astype(str).to_numpy(),
+            "name": names.to_numpy(),
+            "price": df['PRECO_ULTIMO_NEGOCIO'].astype(float).to_numpy(),
+            "open": df.get('PRECO_DE_ABERTURA', df['PRECO_ULTIMO_NEGOCIO']).astype(float).to_numpy(),
+            "high": df.get('PRECO_MAXIMO', df['PRECO_ULTIMO_NEGOCIO']).astype(float).to_numpy(),
+            "low": df.get('PRECO_MINIMO', df['PRECO_ULTIMO_NEGOCIO']).astype(float).to_numpy(),
+            "volume": df['VOLUME_TOTAL_NEGOCIADO'].astype(float).to_numpy(),
+        }, columns=QUOTE_COLUMNS)
+        self._rows: Dict[str, int] = {symbol: row for row, symbol in enumerate(self.frame['symbol'])}
+        self._prices = self.frame['price'].to_numpy()
+
+    @property
+    def nbytes(self) -> int:
+        return frame_nbytes(self.frame)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._rows
+
+    def price(self, symbol: str) -> Optional[float]:
+        row = self._rows.get(symbol.upper())
+        return float(self._prices[row]) if row is not None else None
+
+    def quote(self, symbol: str) -> Optional[Dict]:
+        row = self._rows.get(symbol.upper())
+        return self.frame.iloc[row].to_dict() if row is not None else None
+
+class OptionChainIndex:
+    """
+    One trading day of COTAHIST options sorted by underlying root, with a
+    root -> (start, stop) table so each chain is a contiguous slice. The API
+    export columns are formatted once here instead of on every request. The
+    day's spot quotes travel with it in `quotes` and its trading date in `date`.
+    """
+
+    def __init__(self, df: pd.DataFrame, quotes: Optional[QuoteIndex] = None, date: Optional[datetime.date] = None):
+        self.date = date
+        self.quotes = quotes if quotes is not None else QuoteIndex(df.iloc[:0])
+        roots = df['CODIGO_DE_NEGOCIACAO'].str[:4]
+        frame = (
+            df.assign(_root=roots)
+            .sort_values(['_root', 'DATA_DE_VENCIMENTO', 'PRECO_DE_EXERCICIO'], kind='stable')
+            .reset_index(drop=True)
+        )
+        sorted_roots = frame.pop('_root').to_numpy()
+        self.frame = frame
+
+        uniques, starts = np.unique(sorted_roots, return_index=True)
+        stops = np.append(starts[1:], len(sorted_roots))
+        self._slices: Dict[str, Tuple[int, int]] = {
+            root: (int(start), int(stop)) for root, start, stop in zip(uniques, starts, stops)
+        }
+
+        # A day has only a few dozen distinct expiries, so format each once
+        codes, expiries = pd.factorize(frame['DATA_DE_VENCIMENTO'])
+        labels = pd.to_datetime(pd.Series(expiries), errors='coerce').dt.strftime("%Y-%m-%d")
+        labels = labels.fillna(pd.Series(expiries).astype(str)).to_numpy()
+        self.export = pd.DataFrame({
+            "symbol": frame['CODIGO_DE_NEGOCIACAO'].astype(str),
+            "strike": frame['PRECO_DE_EXERCICIO'].astype(float),
+            "price": frame['PRECO_ULTIMO_NEGOCIO'].astype(float),
+            "type": np.where(frame['TIPO_DE_MERCADO'] == 'OPCOES_DE_COMPRA', "CALL", "PUT"),
+            "maturity_date": np.where(codes >= 0, labels[codes], None),
+            "volume": frame['VOLUME_TOTAL_NEGOCIADO'].astype(float),
+        }, columns=OPTION_EXPORT_COLUMNS)
+
+    @property
+    def nbytes(self) -> int:
+        return frame_nbytes(self.frame) + frame_nbytes(self.export) + self.quotes.nbytes
+
+    def roots(self) -> List[str]:
+        return list(self._slices)
+
+    def bounds(self, symbol: str) -> Tuple[int, int]:
+        return self._slices.get(underlying_root(symbol), (0, 0))
+
+    def options_for(self, symbol: str) -> pd.DataFrame:
+        """Raw COTAHIST rows for the underlying of `symbol`."""
+        start, stop = self.bounds(symbol)
+        return self.frame.iloc[start:stop]
+
+    def export_for(self, symbol: str) -> pd.DataFrame:
+        """API-shaped rows for the underlying of `symbol`."""
+        start, stop = self.bounds(symbol)
+        return self.export.iloc[start:stop]
@@ -1,5 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, List, Optional, Dict, Union
+
+from .monte_carlo import MC_MAX_PATH_STEPS, path_steps
 
 class OptionRequest(BaseModel):
     symbol: str = "PETR4"
@@ -11,6 +13,20 @@ class OptionRequest(BaseModel):
     risk_free_rate: float
     dividend_yield: float = 0.0
     position: str = Field("LONG", pattern="^(LONG|SHORT)$")
+    style: str = Field("EUROPEAN", pattern="^(EUROPEAN|AMERICAN)$")
+    # Black-Scholes for European, Leisen-Reimer tree for American when not given
+    model: Optional[str] = Field(None, pattern="^(BLACK_SCHOLES|BINOMIAL_CRR|BINOMIAL_LR|BAW)$")
+    steps: int = Field(501, ge=10, le=5000)  # Lattice steps (binomial models only)
+
+class OptionBatchRequest(BaseModel):
+    """Columnar batch of contracts; rate and dividend may be shared scalars."""
+    type: List[str] = Field(..., min_length=1)
+    spot: List[float]
+    strike: List[float]
+    maturity: List[float]  # Time to maturity in years
+    volatility: List[float]
+    risk_free_rate: Union[float, List[float]]
+    dividend_yield: Union[float, List[float]] = 0.0
 
 class Greeks(BaseModel):
     delta: float
@@ -25,6 +41,136 @@ class OptionResult(BaseModel):
     time_value: float
     greeks: Greeks
 
+class OptionBatchResult(BaseModel):
+    price: List[float]
+    intrinsic_value: List[float]
+    time_value: List[float]
+    delta: List[float]
+    gamma: List[float]
+    theta: List[float]
+    vega: List[float]
+    rho: List[float]
+
+class MonteCarloLeg(BaseModel):
+    type: str = Field(..., pattern="^(CALL|PUT)$")
+    strike: float
+    quantity: float = 1.0  # Signed: negative for short legs
+    style: str = Field("EUROPEAN", pattern="^(EUROPEAN|ASIAN|UP_AND_OUT|DOWN_AND_OUT|UP_AND_IN|DOWN_AND_IN)$")
+    barrier: Optional[float] = None
+
+class MonteCarloRequest(BaseModel):
+    spot: float
+    volatility: float
+    risk_free_rate: float
+    maturity: float  # Time to maturity in years
+    dividend_yield: float = 0.0
+    legs: List[MonteCarloLeg] = Field(..., min_length=1)
+    paths: int = Field(100_000, ge=1_000, le=10_000_000)
+    time_steps: int = Field(64, ge=1, le=1_000)  # Monitoring dates for Asian and barrier legs
+    seed: Optional[int] = None
+    # Merton jumps: yearly intensity, mean and volatility of the log jump size
+    jump_intensity: float = Field(0.0, ge=0.0)
+    jump_mean: float = 0.0
+    jump_volatility: float = Field(0.0, ge=0.0)
+
+    @model_validator(mode="after")
+    def _bounded_work(self):
+        if path_steps(self.legs, self.paths, self.time_steps) > MC_MAX_PATH_STEPS:
+            raise ValueError(f"paths x time_steps must not exceed {MC_MAX_PATH_STEPS:,}")
+        return self
+
+class MonteCarloGreeks(BaseModel):
+    delta: float
+    gamma: float
+    vega: float
+    rho: float
+
+class MonteCarloResult(BaseModel):
+    price: float
+    std_error: float
+    paths: int
+    time_steps: int
+    greeks: MonteCarloGreeks
+    greeks_std_error: MonteCarloGreeks
+
+class StrategyLeg(BaseModel):
+    type: str = Field(..., pattern="^(CALL|PUT|STOCK)$")
+    quantity: float = 1.0  # Signed: negative for short legs
+    strike: Optional[float] = Field(None, gt=0)  # Required for CALL/PUT legs
+    premium: Optional[float] = None  # Entry price per unit; model value (spot for stock) when omitted
+
+class StrategyRequest(BaseModel):
+    spot: float = Field(..., gt=0)
+    volatility: float
+    risk_free_rate: float
+    maturity: float  # Time to the common expiry in years
+    dividend_yield: float = 0.0
+    legs: List[StrategyLeg] = Field(..., min_length=1)
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, gt=0)
+    price_steps: int = Field(101, ge=2, le=5_000)
+    time_steps: int = Field(10, ge=1, le=500)  # Rows of the P&L grid, from today to expiry
+
+class StrategyResult(BaseModel):
+    prices: List[float]
+    days_to_expiry: List[float]
+    payoff: List[float]
+    pnl: List[List[float]]
+    premiums: List[float]
+    net_premium: float
+    breakevens: List[float]
+    max_profit: Optional[float]
+    max_loss: Optional[float]
+
+class Position(OptionRequest):
+    spot: float = Field(..., gt=0)
+    strike: float = Field(..., gt=0)
+    quantity: float = 1.0  # Contracts held; SHORT positions flip the sign
+    multiplier: float = 1.0  # Units of the underlying (symbol) per contract
+
+class ScenarioRequest(BaseModel):
+    positions: List[Position] = Field(..., min_length=1)
+    # Relative moves: -0.1 = spot down 10%; -1 (spot at zero) is the floor
+    spot_shocks: List[Annotated[float, Field(ge=-1)]] = Field([0.0], min_length=1)
+    vol_shocks: List[float] = Field([0.0], min_length=1)  # Absolute vol points: 0.05 = +5 vol
+    days: List[float] = Field([0.0], min_length=1)  # Calendar days forward
+    rate_shocks_bps: List[float] = Field([0.0], min_length=1)
+    by_position: bool = False  # Also return each position's P&L cube
+
+class ScenarioResult(BaseModel):
+    base_value: float
+    spot_shocks: List[float]
+    vol_shocks: List[float]
+    days: List[float]
+    rate_shocks_bps: List[float]
+    pnl: List[List[List[List[float]]]]  # [spot][vol][days][rate]
+    worst_pnl: float
+    worst_scenario: Dict[str, float]
+    position_pnl: Optional[List[List[List[List[List[float]]]]]] = None
+
+class PortfolioPosition(Position):
+    id: str  # Stable key for incremental updates
+    underlying: str  # Exposures are netted per underlying; required so nothing lands under a default
+
+class PortfolioRequest(BaseModel):
+    positions: List[PortfolioPosition]
+
+class SpotUpdate(BaseModel):
+    spot: float
+
+class Exposure(BaseModel):
+    positions: int
+    price: float  # Net market value
+    delta: float
+    gamma: float
+    vega: float
+    theta: float
+    rho: float
+
+class PortfolioResult(BaseModel):
+    total: Exposure
+    underlyings: Dict[str, Exposure]
+
 class PayoffPoint(BaseModel):
     price: float
     payoff: float
@@ -37,7 +183,9 @@ class PayoffRequest(BaseModel):
     position: str = Field("LONG", pattern="^(LONG|SHORT)$")
     min_price: float
     max_price: float
-    steps: int = 50
+    steps: int = Field(50, ge=2, le=10_000_000)
+    # Server-side downsampling for charts: at most about this many points, kink included
+    max_points: Optional[int] = Field(None, ge=3)
 
 class MarketIndicator(BaseModel):
     label: str
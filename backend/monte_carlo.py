@@ -0,0 +1,254 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Payoff styles of a leg; barriers are monitored on the simulation dates
+EUROPEAN = "EUROPEAN"
+ASIAN = "ASIAN"
+BARRIER_STYLES = ("UP_AND_OUT", "DOWN_AND_OUT", "UP_AND_IN", "DOWN_AND_IN")
+PAYOFF_STYLES = (EUROPEAN, ASIAN) + BARRIER_STYLES
+
+DEFAULT_PATHS = 100_000
+DEFAULT_TIME_STEPS = 64
+# Path values simulated per chunk (paths x dates); bounds memory per worker at ~16 MB per array
+MC_CHUNK_ELEMENTS = 1 << 21
+MC_WORKERS = os.cpu_count() or 1
+# Upper bound on simulated path values (paths x dates) per request; ~10 s of work on one core
+MC_MAX_PATH_STEPS = 200_000_000
+# Worker start method: the API process holds threads and R worker pipes, which fork would copy
+MC_START_METHOD = "forkserver"
+
+# Long-lived pools keyed by worker count; the API only ever uses MC_WORKERS
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pool_lock = threading.Lock()
+
+class Leg(NamedTuple):
+    """One option of a simulated position; quantity is signed (negative = short)."""
+    type: str
+    strike: float
+    quantity: float = 1.0
+    style: str = EUROPEAN
+    barrier: Optional[float] = None
+
+class MarketModel(NamedTuple):
+    """
+    Risk-neutral GBM for the underlying, optionally with Merton lognormal
+    jumps (`jump_intensity` jumps per year of mean log size `jump_mean`).
+    """
+    spot: float
+    volatility: float
+    risk_free_rate: float
+    maturity: float
+    dividend_yield: float = 0.0
+    jump_intensity: float = 0.0
+    jump_mean: float = 0.0
+    jump_volatility: float = 0.0
+
+# Per-chunk sums, added across chunks and workers: pair count, then sum and sum of squares
+# of each pair-averaged sample (price, control, delta, gamma, vega, rho) and the price x control sum
+GREEKS = ("delta", "gamma", "vega", "rho")
+_SAMPLES = 2 + len(GREEKS)
+_YC = 1 + 2 * _SAMPLES
+
+def _simulate_chunk(model: MarketModel, legs: Sequence[Leg], steps: int, pairs: int, seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    Simulates `pairs` antithetic path pairs and returns the sums of the
+    pair-averaged price, control and greek samples. Greeks use pathwise
+    estimators for European and Asian legs and likelihood ratios (scores of
+    the diffusion normals) for barrier legs, whose payoff is discontinuous.
+    """
+    rng = np.random.default_rng(seed)
+    s0, sigma, r, q, T = model.spot, model.volatility, model.risk_free_rate, model.dividend_yield, model.maturity
+    dt = T / steps
+    sqrt_dt = np.sqrt(dt)
+    times = dt * np.arange(1, steps + 1)
+    asian = any(leg.style == ASIAN for leg in legs)
+    barrier = any(leg.style in BARRIER_STYLES for leg in legs)
+
+    half = rng.standard_normal((pairs, steps))
+    z = np.concatenate([half, -half])
+    compensator = 0.0
+    paths = z * (sigma * sqrt_dt)
+    if model.jump_intensity > 0:
+        # Antithetic pairs share their jumps; only the diffusion is mirrored
+        counts = rng.poisson(model.jump_intensity * dt, (pairs, steps))
+        jumps = model.jump_mean * counts + model.jump_volatility * np.sqrt(counts) * rng.standard_normal((pairs, steps))
+        paths += np.concatenate([jumps, jumps])
+        compensator = model.jump_intensity * (np.exp(model.jump_mean + 0.5 * model.jump_volatility**2) - 1)
+    paths += (r - q - compensator - 0.5 * sigma**2) * dt
+    np.cumsum(paths, axis=1, out=paths)
+    np.exp(paths, out=paths)
+    paths *= s0
+    terminal = paths[:, -1]
+    brownian_t = sqrt_dt * z.sum(axis=1)
+    discount = np.exp(-r * T)
+
+    if asian:
+        brownian = np.cumsum(z, axis=1)
+        brownian *= sqrt_dt
+        asian_price = paths.mean(axis=1)
+        asian_d_sigma = (paths * (brownian - sigma * times)).mean(axis=1)
+        asian_d_rate = paths @ times / steps
+    # Likelihood-ratio score of spot: the terminal normal suffices for European
+    # payoffs, path-dependent ones need the first step's (noisier as dt shrinks)
+    terminal_score = brownian_t / (s0 * sigma * T)
+    if asian or barrier:
+        z1 = z[:, 0]
+        score_delta = z1 / (s0 * sigma * sqrt_dt)
+    if barrier:
+        # Remaining scores for barrier legs: gamma from the first step, vega/rho from all of them
+        score_gamma = (z1 * z1 - 1) / (s0 * s0 * sigma * sigma * dt) - z1 / (s0 * s0 * sigma * sqrt_dt)
+        score_vega = (np.einsum('ij,ij->i', z, z) - steps) / sigma - brownian_t
+        score_rho = brownian_t / sigma
+        path_max, path_min = paths.max(axis=1), paths.min(axis=1)
+
+    n = 2 * pairs
+    payoff, delta, gamma, vega, rho = (np.zeros(n) for _ in range(5))
+    for leg in legs:
+        sign = 1.0 if leg.type == 'CALL' else -1.0
+        if leg.style == ASIAN:
+            underlying, d_sigma, d_rate = asian_price, asian_d_sigma, asian_d_rate
+        else:
+            underlying = terminal
+            d_sigma = terminal * (brownian_t - sigma * T)
+            d_rate = terminal * T
+        value = np.maximum(sign * (underlying - leg.strike), 0.0) * leg.quantity
+
+        if leg.style in BARRIER_STYLES:
+            crossed = (path_max >= leg.barrier) if leg.style.startswith("UP") else (path_min <= leg.barrier)
+            value = value * (~crossed if leg.style.endswith("OUT") else crossed)
+            delta += value * score_delta
+            gamma += value * score_gamma
+            vega += value * score_vega
+            rho += value * score_rho
+        else:
+            # Pathwise: d(max(sign*(X-K), 0))/dX = sign * 1{in the money}; X scales with spot
+            slope = sign * (sign * (underlying - leg.strike) > 0) * leg.quantity
+            pathwise_delta = slope * underlying / s0
+            delta += pathwise_delta
+            # Mixed estimator: likelihood ratio applied to the pathwise delta
+            score = score_delta if leg.style == ASIAN else terminal_score
+            gamma += pathwise_delta * (score - 1 / s0)
+            vega += slope * d_sigma
+            rho += slope * d_rate
+        payoff += value
+
+    y = discount * payoff
+    rho = discount * rho - T * y
+    # Discounted terminal price is the control variate: its mean is s0 * exp(-qT)
+    control = discount * terminal
+    samples = [y, control, discount * delta, discount * gamma, discount * vega, rho]
+    samples = [(sample[:pairs] + sample[pairs:]) / 2 for sample in samples]
+
+    totals = [pairs]
+    for sample in samples:
+        totals += [sample.sum(), sample @ sample]
+    totals.append(samples[0] @ samples[1])
+    return np.array(totals)
+
+def _chunk_sizes(paths: int, steps: int) -> np.ndarray:
+    pairs = max(1, (paths + 1) // 2)
+    per_chunk = max(1, MC_CHUNK_ELEMENTS // (2 * steps))
+    sizes = np.full(pairs // per_chunk, per_chunk)
+    if pairs % per_chunk:
+        sizes = np.append(sizes, pairs % per_chunk)
+    return sizes
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """The shared pool of exactly `workers` processes, started on first use and then reused."""
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=get_context(MC_START_METHOD))
+        return pool
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    with _pool_lock:
+        for workers, cached in list(_pools.items()):
+            if cached is pool:
+                del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_pool():
+    """Stops every shared worker pool; the next pooled simulation starts a new one."""
+    with _pool_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(cancel_futures=True)
+
+def path_steps(legs: Sequence[Leg], paths: int, time_steps: int) -> int:
+    """Path values a simulation generates; European-only positions take one step to expiry."""
+    steps = time_steps if any(leg.style != EUROPEAN for leg in legs) else 1
+    return paths * steps
+
+def simulate(
+    model: MarketModel,
+    legs: Sequence[Leg],
+    paths: int = DEFAULT_PATHS,
+    time_steps: int = DEFAULT_TIME_STEPS,
+    seed: Optional[int] = None,
+    workers: int = MC_WORKERS
+) -> Dict:
+    """
+    Monte Carlo price and greeks of a position of European, Asian and barrier
+    legs. Paths are simulated in memory-bounded chunks of antithetic pairs,
+    spread over a shared pool of `workers` processes (inline when workers <= 1
+    or there is a single chunk). Chunk i always draws from the i-th child of
+    `seed`, so a seeded result is identical for any number of workers.
+    European-only positions are simulated in a single step to expiry.
+    """
+    legs = [Leg(*leg) for leg in legs]
+    for leg in legs:
+        if leg.style not in PAYOFF_STYLES:
+            raise ValueError(f"Unknown payoff style {leg.style}")
+        if leg.style in BARRIER_STYLES and leg.barrier is None:
+            raise ValueError(f"{leg.style} leg needs a barrier")
+    if model.maturity <= 0 or model.volatility <= 0:
+        raise ValueError("Monte Carlo needs a positive maturity and volatility")
+    if path_steps(legs, paths, time_steps) > MC_MAX_PATH_STEPS:
+        raise ValueError(f"paths x time_steps must not exceed {MC_MAX_PATH_STEPS:,}")
+
+    steps = path_steps(legs, 1, time_steps)
+    sizes = _chunk_sizes(paths, steps)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(model, legs, steps, int(pairs), chunk_seed) for pairs, chunk_seed in zip(sizes, seeds)]
+
+    if workers <= 1 or len(args) == 1:
+        totals = sum(_simulate_chunk(*a) for a in args)
+    else:
+        pool = _get_pool(workers)
+        try:
+            # map keeps chunk order, so the sums are bitwise reproducible
+            totals = sum(pool.map(_simulate_chunk, *zip(*args)))
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); drop the pool so the next call starts a fresh one
+            _discard_pool(pool)
+            raise
+
+    n = totals[0]
+    means = totals[1:_YC:2] / n
+    variances = np.maximum(totals[2:_YC:2] / n - means**2, 0.0)
+    mean_y, mean_c = means[0], means[1]
+    cov = totals[_YC] / n - mean_y * mean_c
+    beta = cov / variances[1] if variances[1] > 0 else 0.0
+    expected_c = model.spot * np.exp(-model.dividend_yield * model.maturity)
+    price = mean_y - beta * (mean_c - expected_c)
+    variances[0] = max(variances[0] - beta * cov, 0.0)
+    std_errors = np.sqrt(variances / max(n - 1, 1))
+    # Vega and rho per 1% like the Black-Scholes greeks
+    scale = {"delta": 1.0, "gamma": 1.0, "vega": 0.01, "rho": 0.01}
+
+    return {
+        "price": float(price),
+        "std_error": float(std_errors[0]),
+        "paths": int(2 * n),
+        "time_steps": steps,
+        "greeks": {greek: float(means[2 + i] * scale[greek]) for i, greek in enumerate(GREEKS)},
+        "greeks_std_error": {greek: float(std_errors[2 + i] * scale[greek]) for i, greek in enumerate(GREEKS)},
+    }
@@ -0,0 +1,25 @@
+import math
+
+import numpy as np
+from scipy.special import ndtr
+
+# 1 / sqrt(2 pi) and 1 / sqrt(2), computed once
+INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+INV_SQRT_2 = 1.0 / math.sqrt(2.0)
+
+def norm_cdf(x):
+    """
+    Standard normal CDF. Python and NumPy float scalars go through math.erfc,
+    which is exact to a few ulps into both tails; everything else goes to the
+    scipy.special.ndtr ufunc. Neither path does scipy.stats' argument checks.
+    """
+    if isinstance(x, float):
+        return 0.5 * math.erfc(-x * INV_SQRT_2)
+    return ndtr(x)
+
+def norm_pdf(x):
+    """Standard normal density, with the same scalar fast path as norm_cdf."""
+    if isinstance(x, float):
+        return INV_SQRT_2PI * math.exp(-0.5 * x * x)
+    x = np.asarray(x, dtype=float)
+    return INV_SQRT_2PI * np.exp(-0.5 * x * x)
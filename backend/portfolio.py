@@ -0,0 +1,153 @@
+import threading
+from typing import Dict, Iterable, List, NamedTuple
+
+import numpy as np
+
+from .logic import calculate_black_scholes_batch
+
+# Per-contract fields of calculate_black_scholes_batch aggregated into exposures
+EXPOSURE_FIELDS = ("price", "delta", "gamma", "vega", "theta", "rho")
+
+class Position(NamedTuple):
+    """
+    A European option holding. Quantity is signed (negative = short) and the
+    multiplier is units of the underlying per contract, so a position's
+    exposure is its per-unit greeks times quantity * multiplier.
+    """
+    id: str
+    underlying: str
+    type: str
+    spot: float
+    strike: float
+    maturity: float
+    volatility: float
+    risk_free_rate: float
+    dividend_yield: float = 0.0
+    quantity: float = 1.0
+    multiplier: float = 1.0
+
+# Numeric inputs stored per row, in calculate_black_scholes_batch argument order
+_INPUTS = ("spot", "strike", "maturity", "volatility", "risk_free_rate")
+
+class Portfolio:
+    """
+    Thread-safe book of positions with cached per-unit greeks. load() prices
+    the whole book in one batched pass; upsert(), remove() and set_spot()
+    reprice only the rows they touch, and exposures() just re-aggregates the
+    cached greeks, so polling a large book costs a few array reductions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._underlyings: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._columns = {name: np.empty(0) for name in _INPUTS + ("dividend_yield", "weight")}
+        self._columns["is_call"] = np.empty(0, dtype=bool)
+        self._columns["underlying"] = np.empty(0, dtype=np.intp)
+        self._greeks = np.empty((0, len(EXPOSURE_FIELDS)))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def load(self, positions: Iterable[Position]):
+        """Replaces the whole book."""
+        with self._lock:
+            self._reset()
+            self._upsert(list(positions))
+
+    def upsert(self, positions: Iterable[Position]):
+        """Adds new positions and replaces existing ones (matched by id)."""
+        with self._lock:
+            self._upsert(list(positions))
+
+    def remove(self, position_id: str):
+        """Drops one position; raises KeyError for unknown ids."""
+        with self._lock:
+            row = self._rows.pop(position_id)
+            last = len(self._ids) - 1
+            # Move the last row into the hole so the columns stay dense
+            if row != last:
+                moved = self._ids[last]
+                self._ids[row] = moved
+                self._rows[moved] = row
+                for column in self._columns.values():
+                    column[row] = column[last]
+                self._greeks[row] = self._greeks[last]
+            self._ids.pop()
+            self._columns = {name: column[:last] for name, column in self._columns.items()}
+            self._greeks = self._greeks[:last]
+
+    def set_spot(self, underlying: str, spot: float):
+        """Moves one underlying's spot and reprices only the positions on it."""
+        with self._lock:
+            if underlying not in self._codes:
+                raise KeyError(underlying)
+            rows = np.flatnonzero(self._columns["underlying"] == self._codes[underlying])
+            self._columns["spot"][rows] = spot
+            self._reprice(rows)
+
+    def exposures(self) -> Dict:
+        """
+        Net value and greeks (already scaled by quantity * multiplier) in total
+        and per underlying, with each group's position count.
+        """
+        with self._lock:
+            weight = self._columns["weight"]
+            codes = self._columns["underlying"]
+            n = len(self._underlyings)
+            counts = np.bincount(codes, minlength=n)
+            by_field = {
+                field: np.bincount(codes, weights=self._greeks[:, i] * weight, minlength=n)
+                for i, field in enumerate(EXPOSURE_FIELDS)
+            }
+            underlyings = {
+                name: dict(positions=int(counts[code]), **{f: float(v[code]) for f, v in by_field.items()})
+                for code, name in enumerate(self._underlyings) if counts[code]
+            }
+            total = dict(positions=len(self._ids), **{f: float(v.sum()) for f, v in by_field.items()})
+            return {"total": total, "underlyings": underlyings}
+
+    def _upsert(self, positions: List[Position]):
+        if not positions:
+            return
+        latest = {p.id: p for p in positions}  # Later duplicates win
+        new = [i for i in latest if i not in self._rows]
+        for i in new:
+            self._rows[i] = len(self._ids)
+            self._ids.append(i)
+        if new:
+            self._columns = {name: np.concatenate([column, np.zeros(len(new), dtype=column.dtype)])
+                             for name, column in self._columns.items()}
+            self._greeks = np.concatenate([self._greeks, np.zeros((len(new), len(EXPOSURE_FIELDS)))])
+
+        for p in latest.values():
+            if p.underlying not in self._codes:
+                self._codes[p.underlying] = len(self._underlyings)
+                self._underlyings.append(p.underlying)
+        rows = np.array([self._rows[i] for i in latest], dtype=np.intp)
+        values = list(latest.values())
+        for name in _INPUTS + ("dividend_yield",):
+            self._columns[name][rows] = [getattr(p, name) for p in values]
+        self._columns["is_call"][rows] = [p.type == 'CALL' for p in values]
+        self._columns["underlying"][rows] = [self._codes[p.underlying] for p in values]
+        self._columns["weight"][rows] = [p.quantity * p.multiplier for p in values]
+        self._reprice(rows)
+
+    def _reprice(self, rows: np.ndarray):
+        if rows.size == 0:
+            return
+        columns = self._columns
+        result = calculate_black_scholes_batch(
+            *(columns[name][rows] for name in _INPUTS),
+            option_type=np.where(columns["is_call"][rows], 'CALL', 'PUT'),
+            dividend_yield=columns["dividend_yield"][rows]
+        )
+        self._greeks[rows] = np.column_stack([result[field] for field in EXPOSURE_FIELDS])
+
+# The book served by /risk/portfolio
+portfolio = Portfolio()
@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import datetime
+from typing import Optional
+
+from .b3_calendar import latest_trading_day, previous_trading_day
+from .data_fetcher import MARKET_CLOSE_HOUR, B3DataFetcher, fetcher as default_fetcher
+
+POLL_INTERVAL = 600.0
+# Trading days to walk back when nothing has been loaded yet
+LOOKBACK_DAYS = 5
+
+def expected_trading_date(now: datetime.datetime, close_hour: int = MARKET_CLOSE_HOUR) -> datetime.date:
+    """Most recent trading day whose COTAHIST file should already be published at `now`."""
+    date = now.date()
+    if now.hour < close_hour:
+        date -= datetime.timedelta(days=1)
+    return latest_trading_day(date)
+
+class Prefetcher:
+    """
+    Polls for the newest COTAHIST file after market close, loads and indexes it
+    through the fetcher caches, then points fetcher.latest_date at it so the
+    first user request of the day is served warm. The swap is a single
+    attribute assignment made only after the day is fully loaded.
+    """
+
+    def __init__(
+        self,
+        fetcher: B3DataFetcher,
+        poll_interval: float = POLL_INTERVAL,
+        close_hour: int = MARKET_CLOSE_HOUR,
+        lookback_days: int = LOOKBACK_DAYS
+    ):
+        self.fetcher = fetcher
+        self.poll_interval = poll_interval
+        self.close_hour = close_hour
+        self.lookback_days = lookback_days
+
+    def run_once(self, now: Optional[datetime.datetime] = None) -> Optional[datetime.date]:
+        """Loads the newest available trading day; returns the date now being served."""
+        target = expected_trading_date(now or datetime.datetime.now(), self.close_hour)
+        current = self.fetcher.latest_date
+        if current is not None and current >= target:
+            return current
+
+        # Without a warm day yet, walk back past days whose file is missing
+        attempts = 1 if current is not None else self.lookback_days + 1
+        date = target
+        for _ in range(attempts):
+            if current is not None and date <= current:
+                break
+            # Shares the single-flight load with any concurrent user request
+            if self.fetcher.memory_cache.get_or_load(date, self.fetcher._load_index) is not None:
+                self.fetcher.latest_date = date
+                print(f"Prefetched B3 data for {date}")
+                return date
+            date = previous_trading_day(date)
+        return current
+
+    async def run_forever(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(self.fetcher.executor, self.run_once)
+            except Exception as e:
+                print(f"Prefetch failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-warms the B3 COTAHIST cache after market close.")
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit (for cron)")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="seconds between polls")
+    args = parser.parse_args()
+
+    prefetcher = Prefetcher(default_fetcher, poll_interval=args.interval)
+    if args.once:
+        print(f"Latest trading day: {prefetcher.run_once()}")
+    else:
+        asyncio.run(prefetcher.run_forever())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import sys
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+from .cache import LRUCache
+from .lattice import BINOMIAL_CRR, BINOMIAL_LR, BLACK_SCHOLES, calculate_american_option
+from .logic import calculate_black_scholes
+
+# /calculate/option results kept in memory (count and approximate bytes), and how long (seconds) each stays valid
+PRICING_CACHE_ENTRIES = 50_000
+PRICING_CACHE_BYTES = 64 * 1024 * 1024
+PRICING_CACHE_TTL = 600.0
+
+# Decimal places kept when quantizing inputs into a cache key. Fine enough that the
+# rounding moves prices by well under 1e-10, coarse enough to merge float noise
+# from percent conversions and day fractions (days / 365)
+PRICE_DECIMALS = 8
+MATURITY_DECIMALS = 12
+RATE_DECIMALS = 10
+
+def normalize_percent(value):
+    """Accept rates given either as fractions (0.105) or percentages (10.5)."""
+    if isinstance(value, np.ndarray):
+        return np.where(value > 1.0, value / 100.0, value)
+    return value / 100.0 if value > 1.0 else value
+
+class PricingKey(NamedTuple):
+    """Normalized, quantized inputs of one single-contract valuation."""
+    option_type: str
+    spot: float
+    strike: float
+    maturity: float
+    volatility: float
+    risk_free_rate: float
+    dividend_yield: float
+    model: str
+    steps: int
+    american: bool
+
+def pricing_key(
+    option_type: str,
+    spot: float,
+    strike: float,
+    maturity: float,
+    volatility: float,
+    risk_free_rate: float,
+    dividend_yield: float = 0.0,
+    model: str = BLACK_SCHOLES,
+    steps: int = 0,
+    american: bool = False
+) -> PricingKey:
+    """
+    Cache key for a contract. Rates may be percentages or fractions; the
+    result is priced from the key itself, so equal keys always mean equal
+    results. Step counts only matter for the lattices.
+    """
+    return PricingKey(
+        option_type,
+        round(float(spot), PRICE_DECIMALS),
+        round(float(strike), PRICE_DECIMALS),
+        round(float(maturity), MATURITY_DECIMALS),
+        round(normalize_percent(float(volatility)), RATE_DECIMALS),
+        round(normalize_percent(float(risk_free_rate)), RATE_DECIMALS),
+        round(normalize_percent(float(dividend_yield)), RATE_DECIMALS),
+        model,
+        int(steps) if model in (BINOMIAL_CRR, BINOMIAL_LR) else 0,
+        bool(american)
+    )
+
+def price(key: PricingKey) -> Dict:
+    """Values the contract of `key` with its model; same layout as calculate_black_scholes."""
+    args = (key.spot, key.strike, key.maturity, key.volatility, key.risk_free_rate, key.option_type, key.dividend_yield)
+    if key.model == BLACK_SCHOLES:
+        return calculate_black_scholes(*args)
+    return calculate_american_option(*args, model=key.model, steps=key.steps, american=key.american)
+
+def result_nbytes(result: Dict) -> int:
+    """Approximate memory of a price() result: its two dicts and their float values."""
+    greeks = result["greeks"]
+    values = [v for v in result.values() if v is not greeks] + list(greeks.values())
+    return sys.getsizeof(result) + sys.getsizeof(greeks) + sum(sys.getsizeof(v) for v in values)
+
+# Shared by every request
+pricing_cache = LRUCache(
+    max_bytes=PRICING_CACHE_BYTES,
+    sizeof=result_nbytes,
+    ttl=PRICING_CACHE_TTL,
+    max_entries=PRICING_CACHE_ENTRIES
+)
+
+def cached_price(key: PricingKey) -> Dict:
+    """
+    Memoized price(key). Concurrent requests for the same key compute it once.
+    The returned dict is shared between callers and must not be mutated.
+    """
+    return pricing_cache.get_or_load(key, price)
@@ -0,0 +1,217 @@
+import io
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+R_WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "..", "scripts", "rb3_worker.R")
+
+# Rscript locations tried in order
+RSCRIPT_EXECUTABLES = [
+    "Rscript",
+    r"C:\Program Files\R\R-4.3.2\bin\x64\Rscript.exe",
+    r"C:\Program Files\R\R-4.3.1\bin\x64\Rscript.exe",
+]
+
+class RWorkerError(Exception):
+    """The R worker answered a request with an error."""
+
+class RWorkerCrashed(RWorkerError):
+    """The R worker died, hung past its timeout or broke the protocol."""
+
+def find_rscript(executables: List[str] = RSCRIPT_EXECUTABLES) -> Optional[str]:
+    for exe in executables:
+        path = shutil.which(exe) or (exe if os.path.isfile(exe) else None)
+        if path:
+            return path
+    return None
+
+def read_feather(path: str) -> pd.DataFrame:
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+class RWorker:
+    """
+    One long-lived process speaking the scripts/rb3_worker.R line protocol:
+    a command line in, then "OK <n> <format>" plus n lines or "ERR <message>" out.
+    """
+
+    def __init__(self, command: List[str]):
+        self.command = command
+        self.process: Optional[subprocess.Popen] = None
+        self.requests = 0
+        self.restarts = 0
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        if self.process is not None:
+            self.restarts += 1
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1
+        )
+
+    def stop(self, timeout: float = 5.0):
+        if self.process is None:
+            return
+        try:
+            if self.alive:
+                self.process.stdin.write("QUIT\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            self._discard(self.process)
+
+    @staticmethod
+    def _discard(process: subprocess.Popen):
+        # Reap the process so `alive` is False before the next request
+        process.kill()
+        process.wait()
+
+    def request(self, command: str, timeout: float) -> Tuple[str, List[str]]:
+        """Sends `command` and returns the reply format (CSV or FEATHER) and its lines."""
+        with self._lock:
+            if not self.alive:
+                try:
+                    self.start()
+                except OSError as e:
+                    raise RWorkerCrashed(f"could not start R worker: {e}") from e
+            process = self.process
+            # Kill a hung worker so the blocking reads below return
+            watchdog = threading.Timer(timeout, process.kill)
+            watchdog.start()
+            try:
+                process.stdin.write(command + "\n")
+                process.stdin.flush()
+                header = process.stdout.readline().rstrip("\r\n")
+                if not header:
+                    raise RWorkerCrashed("worker exited or timed out")
+                if header.startswith("ERR"):
+                    raise RWorkerError(header[3:].strip())
+                status, count, *reply_format = header.split()
+                if status != "OK" or not count.isdigit():
+                    raise RWorkerCrashed(f"unexpected reply {header!r}")
+                lines = []
+                for _ in range(int(count)):
+                    line = process.stdout.readline()
+                    if not line:
+                        raise RWorkerCrashed("worker exited mid-reply")
+                    lines.append(line.rstrip("\r\n"))
+                self.requests += 1
+                return (reply_format[0] if reply_format else "CSV"), lines
+            except OSError as e:
+                self._discard(process)
+                raise RWorkerCrashed(str(e)) from e
+            except RWorkerCrashed:
+                self._discard(process)
+                raise
+            finally:
+                watchdog.cancel()
+
+class RWorkerPool:
+    """
+    Fixed-size pool of R workers started on first use. A worker that crashes
+    or times out is restarted and the request retried once; if Rscript cannot
+    be found the pool reports itself unavailable for `retry_after` seconds
+    instead of probing executables on every request.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        command: Optional[List[str]] = None,
+        timeout: float = 180.0,
+        retry_after: float = 300.0
+    ):
+        self.size = size
+        self.command = command
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._workers: List[RWorker] = []
+        self._idle: "queue.Queue[RWorker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._unavailable_until = 0.0
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._workers:
+                return
+            if time.monotonic() < self._unavailable_until:
+                raise RWorkerError("R is unavailable")
+            command = self.command
+            if command is None:
+                rscript = find_rscript()
+                if rscript is None:
+                    self._unavailable_until = time.monotonic() + self.retry_after
+                    raise RWorkerError("Rscript not found")
+                command = [rscript, R_WORKER_SCRIPT]
+            for _ in range(self.size):
+                worker = RWorker(command)
+                try:
+                    worker.start()
+                except OSError as e:
+                    self._unavailable_until = time.monotonic() + self.retry_after
+                    raise RWorkerError(f"could not start R worker: {e}") from e
+                self._workers.append(worker)
+                self._idle.put(worker)
+
+    def request(self, command: str) -> Tuple[str, List[str]]:
+        self._ensure_workers()
+        worker = self._idle.get()
+        try:
+            try:
+                return worker.request(command, self.timeout)
+            except RWorkerCrashed as e:
+                print(f"R worker failed ({e}), restarting...")
+                return worker.request(command, self.timeout)
+        finally:
+            self._idle.put(worker)
+
+    def query(self, symbol: str) -> pd.DataFrame:
+        """
+        rb3 options of `symbol`. R writes them to a temporary Arrow IPC file that
+        is memory-mapped here, keeping column types (dates included) intact; a
+        worker without the R arrow package answers in CSV instead.
+        """
+        fd, path = tempfile.mkstemp(prefix="rb3_", suffix=".feather")
+        os.close(fd)
+        try:
+            reply_format, lines = self.request(f"QUERY {symbol} FEATHER {path}")
+            if reply_format == "FEATHER":
+                return read_feather(lines[0])
+            return pd.read_csv(io.StringIO("\n".join(lines)))
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._workers),
+            "alive": sum(w.alive for w in self._workers),
+            "requests": sum(w.requests for w in self._workers),
+            "restarts": sum(w.restarts for w in self._workers),
+        }
+
+    def close(self):
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+            self._workers = []
+            self._idle = queue.Queue()
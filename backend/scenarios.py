@@ -0,0 +1,136 @@
+from typing import Dict, NamedTuple, Sequence
+
+import numpy as np
+
+from .logic import black_scholes_price
+from .normal import norm_cdf
+
+# (contracts x scenarios) values priced per step; bounds working memory to a few ~8 MB arrays
+SCENARIO_CHUNK_ELEMENTS = 1 << 20
+# Floor for shocked volatilities so large negative vol shocks stay priceable
+SCENARIO_MIN_VOL = 1e-4
+
+class ShockGrid(NamedTuple):
+    """
+    Axes of a stress grid; scenarios are their full Cartesian product.
+    Spot shocks are relative (0.05 = +5%, applied to every underlying), vol
+    shocks absolute (0.02 = +2 vol points), days are calendar days forward
+    and rate shocks absolute (0.0025 = +25 bps).
+    """
+    spot: Sequence[float] = (0.0,)
+    volatility: Sequence[float] = (0.0,)
+    days: Sequence[float] = (0.0,)
+    rate: Sequence[float] = (0.0,)
+
+    @property
+    def shape(self) -> tuple:
+        return tuple(len(axis) for axis in self)
+
+    def scenarios(self) -> Dict[str, np.ndarray]:
+        """Flattened shocks, one entry per scenario in C order of `shape`."""
+        axes = np.meshgrid(*(np.asarray(axis, dtype=float) for axis in self), indexing='ij')
+        return {name: axis.ravel() for name, axis in zip(self._fields, axes)}
+
+def _block_pnl(contract, axes, base, quantity):
+    """
+    P&L of a slice of contracts over a slice of the grid, shaped (contracts,
+    spot, vol, days, rate). Every Black-Scholes term is computed on the axes
+    it depends on (discounting on days x rate, total vol on vol x days) and
+    only the final few operations run at full size. log(S/K) splits into a
+    contract and a spot-shock term, and puts follow from calls by parity.
+    """
+    spot, strike, maturity, volatility, rate, dividend, is_call = contract
+    spot_move, vol_move, elapsed, rate_move = axes
+
+    time = np.maximum(maturity - elapsed, 0.0)  # (c, 1, 1, days, 1)
+    live = time > 0
+    sqrt_time = np.sqrt(time)
+    total_vol = np.maximum(volatility + vol_move, SCENARIO_MIN_VOL) * sqrt_time  # (c, 1, vol, days, 1)
+    shocked_rate = rate + rate_move  # (c, 1, 1, 1, rate)
+    strike_disc = strike * np.exp(-shocked_rate * time)  # (c, 1, 1, days, rate)
+    shocked_spot = spot * spot_move  # (c, spot, 1, 1, 1)
+    spot_disc = shocked_spot * np.exp(-dividend * time)  # (c, spot, 1, days, 1)
+    with np.errstate(divide='ignore'):
+        drift = np.log(shocked_spot / strike) + (shocked_rate - dividend) * time  # (c, spot, 1, days, rate)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = drift / total_vol
+        d1 += 0.5 * total_vol
+    d2 = d1 - total_vol
+    value = spot_disc * norm_cdf(d1)
+    value -= strike_disc * norm_cdf(d2)
+    # Puts by parity; expired contracts (zero time, NaN d1) collapse to intrinsic
+    value += np.where(is_call, 0.0, strike_disc - spot_disc)
+    if not live.all():
+        intrinsic = np.maximum(np.where(is_call, shocked_spot - strike, strike - shocked_spot), 0.0)
+        value = np.where(live, value, intrinsic)
+    value -= base
+    value *= quantity
+    return value
+
+def reprice(
+    spot,
+    strike,
+    maturity,
+    volatility,
+    risk_free_rate,
+    option_type,
+    quantity,
+    grid: ShockGrid,
+    dividend_yield=0.0,
+    by_contract: bool = False
+) -> Dict:
+    """
+    Revalues a book of European options under every scenario of `grid`.
+    Contract inputs are per-contract arrays (or scalars); quantity is signed.
+    Pricing runs over blocks of at most about SCENARIO_CHUNK_ELEMENTS
+    (contract, scenario) values, split along contracts and spot shocks, so
+    memory stays flat however large the book or grid. Returns the book's base
+    value and its P&L cube shaped like the grid; with `by_contract`, also the
+    per-contract P&L shaped (contracts,) + grid shape.
+    """
+    arrays = np.broadcast_arrays(
+        np.asarray(spot, dtype=float),
+        np.asarray(strike, dtype=float),
+        np.asarray(maturity, dtype=float),
+        np.asarray(volatility, dtype=float),
+        np.asarray(risk_free_rate, dtype=float),
+        np.asarray(dividend_yield, dtype=float),
+        np.asarray(option_type) == 'CALL',
+        np.asarray(quantity, dtype=float)
+    )
+    columns = [np.atleast_1d(a).ravel() for a in arrays]
+    quantity = columns.pop()
+    # Same volatility floor as the shocked blocks, so the zero-shock scenario has zero P&L
+    base = black_scholes_price(*columns[:3], np.maximum(columns[3], SCENARIO_MIN_VOL), columns[4], columns[6], columns[5])
+    # Contract columns as (c, 1, 1, 1, 1) and shock axes along their own dimension
+    contract = [column.reshape(-1, 1, 1, 1, 1) for column in columns]
+    axes = [np.asarray(axis, dtype=float) for axis in grid]
+    axes[0] = 1.0 + axes[0]
+    axes[2] = axes[2] / 365.0
+    axes = [axis.reshape([-1 if i == d else 1 for i in range(5)]) for d, axis in enumerate(axes, start=1)]
+
+    n_contracts = quantity.size
+    per_spot = int(np.prod(grid.shape[1:]))
+    spot_step = max(1, min(len(grid.spot), SCENARIO_CHUNK_ELEMENTS // per_spot))
+    rows = max(1, SCENARIO_CHUNK_ELEMENTS // (spot_step * per_spot))
+    total = np.zeros(grid.shape)
+    contract_pnl = np.empty((n_contracts,) + grid.shape) if by_contract else None
+    for s0 in range(0, len(grid.spot), spot_step):
+        s = slice(s0, s0 + spot_step)
+        block_axes = [axes[0][:, s]] + axes[1:]
+        for c0 in range(0, n_contracts, rows):
+            c = slice(c0, c0 + rows)
+            pnl = _block_pnl([column[c] for column in contract], block_axes, base[c, None, None, None, None],
+                             quantity[c, None, None, None, None])
+            total[s] += pnl.sum(axis=0)
+            if by_contract:
+                contract_pnl[c, s] = pnl
+
+    worst = np.unravel_index(int(np.argmin(total)), grid.shape)
+    return {
+        "base_value": float(quantity @ base),
+        "pnl": total,
+        "worst_pnl": float(total[worst]),
+        "worst_scenario": {name: float(axis[i]) for name, axis, i in zip(grid._fields, grid, worst)},
+        "contract_pnl": contract_pnl,
+    }
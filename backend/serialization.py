@@ -0,0 +1,44 @@
+import json
+from typing import Dict, Optional
+
+import pandas as pd
+import pyarrow as pa
+from fastapi.responses import Response
+
+# Media types accepted by the frame endpoints besides plain application/json
+COLUMNAR_JSON_MEDIA_TYPE = "application/vnd.columnar+json"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Decimal places for JSON floats (pandas' default); plenty for prices and greeks, and
+# more would print binary noise (54.99 -> 54.990000000000002) into every payload
+JSON_DOUBLE_PRECISION = 10
+
+def records_json(df: pd.DataFrame) -> bytes:
+    """[{"col": value, ...}, ...] encoded straight from the columns."""
+    return df.to_json(orient='records', double_precision=JSON_DOUBLE_PRECISION).encode()
+
+def columnar_json(df: pd.DataFrame) -> bytes:
+    """{"col": [values, ...], ...} with one encoded array per column."""
+    parts = [
+        f"{json.dumps(str(col))}:{df[col].to_json(orient='values', double_precision=JSON_DOUBLE_PRECISION)}"
+        for col in df.columns
+    ]
+    return ("{" + ",".join(parts) + "}").encode()
+
+def arrow_stream(df: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def frame_response(df: pd.DataFrame, accept: Optional[str] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Serializes `df` in the format negotiated by the Accept header, defaulting to records JSON."""
+    accept = (accept or "").lower()
+    if ARROW_STREAM_MEDIA_TYPE in accept:
+        body, media_type = arrow_stream(df), ARROW_STREAM_MEDIA_TYPE
+    elif COLUMNAR_JSON_MEDIA_TYPE in accept:
+        body, media_type = columnar_json(df), COLUMNAR_JSON_MEDIA_TYPE
+    else:
+        body, media_type = records_json(df), "application/json"
+    return Response(content=body, media_type=media_type, headers={**(headers or {}), "Vary": "Accept"})
@@ -0,0 +1,121 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .logic import black_scholes_price, calculate_black_scholes_batch
+
+# Default chart range around the strikes and spot when the request gives none
+STRATEGY_PRICE_MARGIN = 0.2
+
+class Leg(NamedTuple):
+    """
+    One leg of a strategy: type is CALL, PUT or STOCK, quantity is signed
+    (negative = short) and premium is the entry price per unit. A missing
+    premium means the leg is entered at its model value (spot for stock).
+    """
+    type: str
+    quantity: float = 1.0
+    strike: Optional[float] = None
+    premium: Optional[float] = None
+
+def _columns(legs: Sequence[Leg]):
+    option = np.array([leg.type != 'STOCK' for leg in legs])
+    types = np.array([leg.type for leg in legs])
+    quantity = np.array([leg.quantity for leg in legs], dtype=float)
+    strike = np.array([leg.strike if leg.strike is not None else 0.0 for leg in legs], dtype=float)
+    return option, types, quantity, strike
+
+def entry_premiums(legs: Sequence[Leg], spot: float, volatility: float, rate: float, maturity: float,
+                   dividend: float = 0.0) -> np.ndarray:
+    """Entry price of each leg, filling missing premiums with today's model value."""
+    option, types, _, strike = _columns(legs)
+    model = calculate_black_scholes_batch(spot, strike, maturity, volatility, rate, np.where(option, types, 'CALL'), dividend)
+    fair = np.where(option, model["price"], spot)
+    given = np.array([leg.premium if leg.premium is not None else np.nan for leg in legs], dtype=float)
+    return np.where(np.isnan(given), fair, given)
+
+def expiry_profile(legs: Sequence[Leg], premiums: np.ndarray):
+    """
+    P&L at expiry is piecewise linear in spot with kinks at the strikes.
+    Returns the kinks (starting at spot 0), the P&L at each kink and the
+    slope beyond the last one.
+    """
+    option, types, quantity, strike = _columns(legs)
+    kinks = np.unique(np.concatenate([[0.0], strike[option]]))
+    values = expiry_pnl(legs, premiums, kinks)
+    right_slope = quantity[~option | (types == 'CALL')].sum()
+    return kinks, values, float(right_slope)
+
+def expiry_pnl(legs: Sequence[Leg], premiums: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    """Aggregate P&L at expiry for each underlying price."""
+    option, types, quantity, strike = _columns(legs)
+    prices = np.asarray(prices, dtype=float)[:, None]
+    intrinsic = np.where(
+        option,
+        np.maximum(np.where(types == 'CALL', prices - strike, strike - prices), 0.0),
+        prices
+    )
+    return (intrinsic - premiums) @ quantity
+
+def breakevens(kinks: np.ndarray, values: np.ndarray, right_slope: float) -> List[float]:
+    """Exact roots of the piecewise-linear expiry P&L (endpoints only where it is flat at zero)."""
+    roots = list(kinks[values == 0])
+    left, right = values[:-1], values[1:]
+    crossing = np.flatnonzero(left * right < 0)
+    roots += list(kinks[crossing] - left[crossing] * (kinks[crossing + 1] - kinks[crossing]) / (right[crossing] - left[crossing]))
+    if right_slope != 0 and values[-1] * right_slope < 0:
+        roots.append(kinks[-1] - values[-1] / right_slope)
+    return sorted(round(float(root), 4) for root in roots)
+
+def price_range(legs: Sequence[Leg], spot: float) -> tuple:
+    strikes = [leg.strike for leg in legs if leg.type != 'STOCK'] + [spot]
+    return min(strikes) * (1 - STRATEGY_PRICE_MARGIN), max(strikes) * (1 + STRATEGY_PRICE_MARGIN)
+
+def strategy_grid(
+    legs: Sequence[Leg],
+    spot: float,
+    volatility: float,
+    rate: float,
+    maturity: float,
+    prices: np.ndarray,
+    days_to_expiry: np.ndarray,
+    dividend: float = 0.0
+) -> Dict:
+    """
+    Expiry payoff, breakevens and mark-to-model P&L of a multi-leg strategy.
+    All legs share one expiry `maturity` (years). The P&L grid has one row per
+    entry of `days_to_expiry` (calendar days) and one column per underlying
+    price, and is priced in a single (legs x days x prices) Black-Scholes pass.
+    """
+    premiums = entry_premiums(legs, spot, volatility, rate, maturity, dividend)
+    option, types, quantity, strike = _columns(legs)
+    prices = np.asarray(prices, dtype=float)
+    remaining = np.asarray(days_to_expiry, dtype=float) / 365.0
+
+    pnl = np.zeros((remaining.size, prices.size))
+    if option.any():
+        values = black_scholes_price(
+            prices[None, None, :],
+            strike[option, None, None],
+            remaining[None, :, None],
+            volatility,
+            rate,
+            types[option, None, None] == 'CALL',
+            dividend
+        )
+        pnl += np.tensordot(quantity[option], values, axes=1) - premiums[option] @ quantity[option]
+    pnl += ((prices[None, :] - premiums[~option, None]).T @ quantity[~option])[None, :]
+
+    kinks, kink_values, right_slope = expiry_profile(legs, premiums)
+    return {
+        "prices": prices,
+        "days_to_expiry": np.asarray(days_to_expiry, dtype=float),
+        "payoff": expiry_pnl(legs, premiums, prices),
+        "pnl": pnl,
+        "premiums": premiums,
+        "net_premium": float(premiums @ quantity),
+        "breakevens": breakevens(kinks, kink_values, right_slope),
+        # Unbounded when the position keeps gaining (losing) as spot rises
+        "max_profit": None if right_slope > 0 else float(kink_values.max()),
+        "max_loss": None if right_slope < 0 else float(kink_values.min()),
+    }
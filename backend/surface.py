@@ -0,0 +1,189 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import least_squares
+
+from .b3_calendar import BUSINESS_DAYS_PER_YEAR
+
+# Fewest quotes needed for a five-parameter SVI fit; thinner expiries use a quadratic
+SVI_MIN_POINTS = 5
+# Quotes with implied volatility outside this range are treated as bad prints
+SURFACE_MIN_VOL = 0.01
+SURFACE_MAX_VOL = 3.0
+
+# Columns of a surface grid, one row per (strike, maturity) point
+SURFACE_COLUMNS = ["strike", "maturity", "business_days", "log_moneyness", "volatility"]
+
+def svi_total_variance(k: np.ndarray, a: float, b: float, rho: float, m: float, sigma: float) -> np.ndarray:
+    """Raw SVI: w(k) = a + b * (rho * (k - m) + sqrt((k - m)^2 + sigma^2))."""
+    x = k - m
+    return a + b * (rho * x + np.sqrt(x * x + sigma * sigma))
+
+def _svi_linear(k: np.ndarray, w: np.ndarray, weights: np.ndarray, m: float, sigma: float):
+    """
+    Best (a, b, rho) for fixed (m, sigma). In y = (k - m) / sigma the SVI
+    slice is linear, w = a + d*y + c*sqrt(y^2 + 1) with c = b*sigma and
+    d = rho*c, so this is a weighted linear least squares with c >= 0, |d| <= c.
+    """
+    y = (k - m) / sigma
+    root = np.sqrt(y * y + 1.0)
+    design = np.column_stack([np.ones_like(y), y, root]) * weights[:, None]
+    a, d, c = np.linalg.lstsq(design, w * weights, rcond=None)[0]
+    if c < 0 or abs(d) > c:
+        c = max(c, 0.0)
+        d = float(np.clip(d, -c, c))
+        a = np.average(w - d * y - c * root, weights=weights * weights)
+    rho = d / c if c > 0 else 0.0
+    return a, c / sigma, float(np.clip(rho, -0.999, 0.999))
+
+def fit_svi(k: np.ndarray, w: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Raw SVI parameters (a, b, rho, m, sigma) for total variances `w` at
+    log-moneyness `k`. Only (m, sigma) are searched numerically; (a, b, rho)
+    follow in closed form for each candidate (quasi-explicit calibration).
+    """
+    weights = np.ones_like(w) if weights is None else weights
+
+    def residuals(p):
+        return weights * (svi_total_variance(k, *_svi_linear(k, w, weights, *p), *p) - w)
+
+    span = max(float(np.ptp(k)), 0.05)
+    lower = [float(k.min()) - span, 1e-3]
+    upper = [float(k.max()) + span, 2.0]
+    start = np.clip([float(k[np.argmin(w)]), 0.1], lower, upper)
+    m, sigma = least_squares(residuals, start, bounds=(lower, upper), method="trf").x
+    return np.array([*_svi_linear(k, w, weights, m, sigma), m, sigma])
+
+class SmileSlice:
+    """
+    Fitted total variance w(k) of one expiry. SVI when the expiry has enough
+    quotes; otherwise a quadratic (or flat) fit evaluated inside the quoted
+    log-moneyness range only.
+    """
+
+    def __init__(self, maturity: float, business_days: int, forward: float, k: np.ndarray, w: np.ndarray,
+                 weights: Optional[np.ndarray] = None):
+        self.maturity = maturity
+        self.business_days = business_days
+        self.forward = forward
+        self.points = int(k.size)
+        self.k_range = (float(k.min()), float(k.max()))
+        if k.size >= SVI_MIN_POINTS:
+            self.model = "svi"
+            self.params = fit_svi(k, w, weights)
+        else:
+            self.model = "quadratic"
+            self.params = np.polyfit(k, w, min(2, k.size - 1)) if k.size > 1 else np.array([w[0]])
+
+    def total_variance(self, k: np.ndarray) -> np.ndarray:
+        if self.model == "svi":
+            w = svi_total_variance(k, *self.params)
+        else:
+            w = np.polyval(self.params, np.clip(k, *self.k_range))
+        return np.maximum(w, 1e-8)
+
+    def to_dict(self) -> Dict:
+        return {
+            "maturity": self.maturity,
+            "business_days": self.business_days,
+            "forward": self.forward,
+            "model": self.model,
+            "params": self.params.tolist(),
+            "points": self.points,
+        }
+
+class VolSurface:
+    """
+    Per-expiry smiles fitted once from a chain; evaluating any (strike,
+    maturity) is closed-form. Between expiries total variance is interpolated
+    linearly in maturity at fixed strike; outside them the nearest smile is
+    held at constant volatility.
+    """
+
+    def __init__(self, slices: List[SmileSlice], spot: float, rate: float):
+        self.slices = sorted(slices, key=lambda s: s.maturity)
+        self.spot = spot
+        self.rate = rate
+        self._maturities = np.array([s.maturity for s in self.slices])
+
+    @property
+    def nbytes(self) -> int:
+        # A handful of floats per slice; the surface is tiny next to the chain it came from
+        return 256 + 128 * len(self.slices)
+
+    def implied_volatility(self, strike, maturity) -> np.ndarray:
+        """Volatility at strikes and maturities (in years) that broadcast together."""
+        strike, maturity = np.broadcast_arrays(np.asarray(strike, dtype=float), np.asarray(maturity, dtype=float))
+        if not self.slices:
+            return np.full(strike.shape, np.nan)
+        t = np.clip(maturity, self._maturities[0], self._maturities[-1])
+        if len(self.slices) == 1:
+            lower = upper = np.zeros(t.shape, dtype=int)
+        else:
+            upper = np.clip(np.searchsorted(self._maturities, t), 1, len(self.slices) - 1)
+            lower = upper - 1
+
+        w_lower = self._slice_variance(lower, strike)
+        w_upper = self._slice_variance(upper, strike)
+        t_lower, t_upper = self._maturities[lower], self._maturities[upper]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(t_upper > t_lower, (t - t_lower) / (t_upper - t_lower), 0.0)
+        w = w_lower + weight * (w_upper - w_lower)
+        return np.sqrt(w / t)
+
+    def _slice_variance(self, slice_index: np.ndarray, strike: np.ndarray) -> np.ndarray:
+        w = np.empty(strike.shape)
+        for i in np.unique(slice_index):
+            mask = slice_index == i
+            smile = self.slices[i]
+            w[mask] = smile.total_variance(np.log(strike[mask] / smile.forward))
+        return w
+
+    def grid(self, strikes: Sequence[float], business_days: Sequence[int]) -> pd.DataFrame:
+        """Long-format surface on the full strikes x maturities grid."""
+        strike_grid, days_grid = np.meshgrid(np.asarray(strikes, dtype=float), np.asarray(business_days, dtype=int))
+        maturity = days_grid / BUSINESS_DAYS_PER_YEAR
+        forward = self.spot * np.exp(self.rate * maturity)
+        return pd.DataFrame({
+            "strike": strike_grid.ravel(),
+            "maturity": maturity.ravel(),
+            "business_days": days_grid.ravel(),
+            "log_moneyness": np.log(strike_grid / forward).ravel(),
+            "volatility": self.implied_volatility(strike_grid, maturity).ravel(),
+        }, columns=SURFACE_COLUMNS)
+
+    def default_grid(self, n_strikes: int = 25, n_maturities: int = 10, width: float = 0.3) -> pd.DataFrame:
+        """Regular grid of strikes within +-width of spot over the fitted maturities."""
+        if not self.slices:
+            return pd.DataFrame(columns=SURFACE_COLUMNS)
+        strikes = np.round(np.linspace(self.spot * (1 - width), self.spot * (1 + width), n_strikes), 2)
+        days = np.unique(np.round(np.linspace(
+            self.slices[0].business_days, self.slices[-1].business_days, n_maturities
+        )).astype(int))
+        return self.grid(strikes, days)
+
+def fit_surface(chain: pd.DataFrame, spot: float, rate: float) -> VolSurface:
+    """
+    Fits one smile per expiry from chain analytics (see chain.chain_analytics).
+    Uses out-of-the-money quotes only (puts below the forward, calls above),
+    weighted by vega so near-the-money prints dominate.
+    """
+    quotes = chain[
+        np.isfinite(chain['implied_volatility'])
+        & chain['implied_volatility'].between(SURFACE_MIN_VOL, SURFACE_MAX_VOL)
+        & (chain['business_days'] > 0)
+    ]
+    slices = []
+    for days, expiry in quotes.groupby('business_days', sort=True):
+        maturity = days / BUSINESS_DAYS_PER_YEAR
+        forward = spot * np.exp(rate * maturity)
+        k = np.log(expiry['strike'].to_numpy() / forward)
+        otm = np.where(expiry['type'] == 'CALL', k >= 0, k < 0)
+        if not otm.any():
+            continue
+        k = k[otm]
+        iv = expiry['implied_volatility'].to_numpy()[otm]
+        weights = np.sqrt(np.maximum(expiry['vega'].to_numpy()[otm], 1e-6))
+        slices.append(SmileSlice(maturity, int(days), forward, k, iv * iv * maturity, weights / weights.max()))
+    return VolSurface(slices, spot, rate)
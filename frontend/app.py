@@ -158,6 +158,14 @@ def fetch_assets():
     except:
         return []
 
+@st.cache_data(ttl=3600)
+def fetch_surface(symbol):
+    try:
+        response = requests.get(f"{API_URL}/market/surface/{symbol}")
+        return pd.DataFrame(response.json()) if response.status_code == 200 else pd.DataFrame()
+    except:
+        return pd.DataFrame()
+
 def fetch_indicators():
     try:
         response = requests.get(f"{API_URL}/market/indicators")
@@ -175,19 +183,16 @@ def fetch_options(symbol):
     except:
         return []
 
-def simulate_greeks(opt_type, strike, spot):
-    """Simulates Greeks for display purposes, similar to the React app."""
-    iv = 0.32 + (strike/spot - 1)**2 
-    delta = 0.5 if abs(strike - spot) < 0.5 else (0.7 if (opt_type == "CALL" and strike < spot) or (opt_type == "PUT" and strike > spot) else 0.3)
-    if opt_type == "PUT": delta = -delta
-    
-    return {
-        "delta": delta,
-        "gamma": 0.05 + np.random.uniform(0, 0.05),
-        "theta": -0.02 - np.random.uniform(0, 0.05),
-        "vega": 0.1 + np.random.uniform(0, 0.05),
-        "iv": iv
-    }
+@st.cache_data(ttl=3600)
+def fetch_chain(symbol):
+    """Server-side IV and greeks for every series, plus the spot they were priced from."""
+    try:
+        response = requests.get(f"{API_URL}/market/chain/{symbol}")
+        if response.status_code == 200:
+            return pd.DataFrame(response.json()), float(response.headers.get("X-Spot-Price", "nan"))
+        return pd.DataFrame(), None
+    except:
+        return pd.DataFrame(), None
 
 # --- 1. NAVBAR ---
 def render_navbar():
@@ -334,6 +339,7 @@ def render_calculator():
         with c1:
             st.subheader("Configuração")
             opt_type = st.selectbox("Tipo de Opção", ["CALL", "PUT"])
+            style = st.selectbox("Estilo", ["EUROPEAN", "AMERICAN"], format_func=lambda s: "Europeia" if s == "EUROPEAN" else "Americana")
             spot = st.number_input("Preço Spot (R$)", value=38.50)
             strike = st.number_input("Preço Strike (R$)", value=39.00)
             days = st.number_input("Dias para Vencimento", value=30)
@@ -347,6 +353,7 @@ def render_calculator():
                 "maturity": days / 365,
                 "volatility": vol,
                 "risk_free_rate": rate,
+                "style": style,
                 "symbol": "CALC"
             }
             
@@ -389,7 +396,6 @@ def render_option_chain(selected_symbol):
             suffixes=('_C', '_P')
         ).sort_values('strike')
         
-        # Add simulated greeks for display
         st.markdown('<div class="glass-card" style="padding: 0; overflow: hidden;">', unsafe_allow_html=True)
         
         # Use st.expander for details or just a clean table
@@ -412,22 +418,36 @@ def render_option_chain(selected_symbol):
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Greeks detail visualization
-        st.markdown("### Detalhamento de Gregas (Simulação)")
-        col_g1, col_g2 = st.columns(2)
-        
-        # Show Greeks for 3 specific strikes around spot
-        spot_price = chain['strike'].median() # Simple approximation for display
-        strikes_to_show = chain.sort_values(by='strike').iloc[len(chain)//2-2 : len(chain)//2+2]
-        
-        for idx, row in strikes_to_show.iterrows():
-            with st.expander(f"Strike R$ {row['strike']:.2f} - Gregas"):
-                sg = simulate_greeks("CALL", row['strike'], spot_price)
+        st.markdown("### Detalhamento de Gregas")
+
+        analytics, spot_price = fetch_chain(selected_symbol)
+        if analytics.empty:
+            st.info("Gregas indisponíveis: sem cotação à vista para este ativo.")
+            return
+
+        # Calls of the nearest expiry with the four strikes closest to spot
+        calls_near = analytics[(analytics['type'] == 'CALL') & analytics['implied_volatility'].notna()]
+        calls_near = calls_near[calls_near['maturity_date'] == calls_near['maturity_date'].min()]
+        nearest = (calls_near['strike'] - spot_price).abs().to_numpy().argsort()[:4]
+
+        for _, row in calls_near.iloc[nearest].sort_values(by='strike').iterrows():
+            with st.expander(f"{row['symbol']} - Strike R$ {row['strike']:.2f} ({row['maturity_date']})"):
                 cg1, cg2, cg3, cg4, cg5 = st.columns(5)
-                cg1.metric("Delta", f"{sg['delta']:.2f}")
-                cg2.metric("Gamma", f"{sg['gamma']:.3f}")
-                cg3.metric("Theta", f"{sg['theta']:.3f}")
-                cg4.metric("Vega", f"{sg['vega']:.3f}")
-                cg5.metric("IV (%)", f"{sg['iv']*100:.1f}%")
+                cg1.metric("Delta", f"{row['delta']:.2f}")
+                cg2.metric("Gamma", f"{row['gamma']:.3f}")
+                cg3.metric("Theta", f"{row['theta']:.3f}")
+                cg4.metric("Vega", f"{row['vega']:.3f}")
+                cg5.metric("IV (%)", f"{row['implied_volatility']*100:.1f}%")
+
+        surface = fetch_surface(selected_symbol)
+        if not surface.empty:
+            st.markdown("### Volatilidade Implícita")
+            col_s1, col_s2 = st.columns(2)
+            # Nearest maturity of the fitted surface is the front-month smile
+            front = surface[surface['business_days'] == surface['business_days'].min()]
+            smile = [{"strike": k, "implied_vol": v * 100} for k, v in zip(front['strike'], front['volatility'])]
+            col_s1.plotly_chart(create_volatility_smile_chart(smile, spot_price), use_container_width=True)
+            col_s2.plotly_chart(create_volatility_surface_3d(surface.to_dict('records')), use_container_width=True)
                 
     else:
         st.info(f"Nenhuma opção encontrada para {selected_symbol}")
@@ -87,10 +87,12 @@ def create_greeks_chart(greeks: Dict):
 def create_volatility_surface_3d(surface_data: List[Dict]):
     df = pd.DataFrame(surface_data)
     
-    # Pivot for 3D surface
-    z_data = df.pivot(index='maturity', columns='strike', values='volatility').values
-    x_data = df['strike'].unique()
-    y_data = df['maturity'].unique()
+    # Pivot for 3D surface; axes come from the pivot so they match the z ordering
+    maturity_col = 'business_days' if 'business_days' in df.columns else 'maturity'
+    grid = df.pivot_table(index=maturity_col, columns='strike', values='volatility')
+    z_data = grid.values * 100
+    x_data = grid.columns.values
+    y_data = grid.index.values
     
     fig = go.Figure(data=[go.Surface(z=z_data, x=x_data, y=y_data, colorscale='Viridis')])
     
@@ -1,7 +1,4 @@
 import streamlit as st
-import subprocess
-import pandas as pd
-import io
 import os
 import sys
 
@@ -32,54 +29,41 @@ st.title("📊 RB3 Options Data Viewer")
 st.markdown("Visualize os dados de opções buscados diretamente da B3 via R (pacote rb3).")
 
 # Paths
-R_SCRIPT_PATH = os.path.join("scripts", "rb3_options_fetcher.R")
+R_SCRIPT_PATH = os.path.join("scripts", "rb3_worker.R")
 
-def run_r_script():
+# Uses the backend's RWorkerPool class, but runs its own single R process (separate from
+# the API's workers): the superset is loaded once per viewer session and reused by every query
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from backend.rb3_worker import RWorkerError, RWorkerPool
+
+@st.cache_resource
+def get_worker_pool():
+    return RWorkerPool(size=1)
+
+def run_r_query(symbol):
     try:
-        # Tenta rodar o Rscript. Se não estiver no path, tentaremos caminhos comuns do Windows.
-        cmd = ["Rscript", R_SCRIPT_PATH]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        return result.stdout, None
-    except subprocess.CalledProcessError as e:
-        return e.stdout, e.stderr
-    except FileNotFoundError:
-        # Se Rscript não foi encontrado, tenta procurar em locais comuns
-        common_paths = [
-            r"C:\Program Files\R\R-4.3.2\bin\x64\Rscript.exe",
-            r"C:\Program Files\R\R-4.3.1\bin\x64\Rscript.exe",
-            r"C:\Program Files\R\R-4.2.0\bin\x64\Rscript.exe",
-        ]
-        for path in common_paths:
-            if os.path.exists(path):
-                try:
-                    result = subprocess.run([path, R_SCRIPT_PATH], capture_output=True, text=True, check=True)
-                    return result.stdout, None
-                except Exception as ex:
-                    return None, str(ex)
-        
-        return None, "Rscript não encontrado no PATH. Por favor, instale o R ou adicione-o às variáveis de ambiente."
+        return get_worker_pool().query(symbol), None
+    except RWorkerError as e:
+        return None, str(e)
+
+symbol = st.text_input("Ativo objeto", value="PETR4").upper()
 
 if st.button("🚀 Buscar Dados Atualizados (Executar R)"):
-    with st.spinner("Executando script R e processando dados da B3..."):
-        stdout, stderr = run_r_script()
+    with st.spinner("Consultando o worker R e processando dados da B3..."):
+        df, error = run_r_query(symbol)
         
-        if stderr:
+        if error:
              st.error("Erro durante a execução do script R:")
-             st.code(stderr)
+             st.code(error)
         
-        if stdout:
-            st.success("Dados recuperados com sucesso!")
-            st.markdown("### Output do Console R:")
-            st.code(stdout)
-            
-            # Tentar extrair tabela se o output for formatado
-            # (Simplificado por agora, mostrando o log completo)
-            if "PETR4" in stdout:
-                st.info("Detectados dados de PETR4 no output.")
+        if df is not None:
+            st.success(f"{len(df)} opções recuperadas para {symbol}!")
+            st.dataframe(df, hide_index=True, use_container_width=True)
 
 st.sidebar.header("Configurações")
-st.sidebar.info("Este viewer executa o script R localmente para buscar o 'superset' de opções da B3.")
+st.sidebar.info("Este viewer consulta um worker R persistente que mantém o 'superset' de opções da B3 carregado em memória.")
 st.sidebar.markdown(f"**Script Path:** `{R_SCRIPT_PATH}`")
+st.sidebar.json(get_worker_pool().stats())
 
 if not os.path.exists(R_SCRIPT_PATH):
     st.error(f"Arquivo não encontrado: {R_SCRIPT_PATH}")
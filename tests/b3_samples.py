@@ -0,0 +1,65 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+TRADING_DATE = datetime.date(2025, 6, 13)
+
+
+def fake_cotahist(date):
+    """Minimal stand-in for b3cotahist.get with one spot row and four options."""
+    return pd.DataFrame({
+        'DATA_DO_PREGAO': np.array([date] * 5, dtype='datetime64[ms]'),
+        'CODIGO_DE_NEGOCIACAO': ['PETR4', 'PETRG350', 'PETRS350', 'VALEG700', 'VALES700'],
+        'TIPO_DE_MERCADO': ['VISTA', 'OPCOES_DE_COMPRA', 'OPCOES_DE_VENDA', 'OPCOES_DE_COMPRA', 'OPCOES_DE_VENDA'],
+        'PRECO_DE_ABERTURA': [36.2, 1.1, 0.9, 2.0, 1.8],
+        'PRECO_MAXIMO': [37.1, 1.3, 1.0, 2.2, 1.9],
+        'PRECO_MINIMO': [36.0, 1.0, 0.8, 1.9, 1.6],
+        'PRECO_DE_EXERCICIO': [0.0, 35.0, 35.0, 70.0, 70.0],
+        'PRECO_ULTIMO_NEGOCIO': [36.85, 1.2, 0.95, 2.1, 1.7],
+        # COTAHIST uses 9999-12-31 for spot rows, which needs ms resolution
+        'DATA_DE_VENCIMENTO': np.array(['9999-12-31'] + ['2025-07-18'] * 4, dtype='datetime64[ms]'),
+        'VOLUME_TOTAL_NEGOCIADO': [1.25e8, 1000.0, 800.0, 500.0, 400.0],
+        'QUANTIDADE_NEGOCIADA': [3.4e6, 900.0, 850.0, 240.0, 230.0],
+    })
+
+
+def cotahist_bytes(date):
+    """The rows of fake_cotahist as a fixed-width COTAHIST file, header and trailer included."""
+    from b3cotahist import FIELD_SIZES
+
+    df = fake_cotahist(date)
+    markets = {'VISTA': '010', 'OPCOES_DE_COMPRA': '070', 'OPCOES_DE_VENDA': '080'}
+    lines = [f"00COTAHIST.{date:%Y}BOVESPA {date:%Y%m%d}".ljust(245)]
+    for row in df.itertuples(index=False):
+        fields = {
+            'TIPO_DE_REGISTRO': '01',
+            'DATA_DO_PREGAO': f"{date:%Y%m%d}",
+            'CODIGO_BDI': '02' if row.TIPO_DE_MERCADO == 'VISTA' else '78',
+            'CODIGO_DE_NEGOCIACAO': row.CODIGO_DE_NEGOCIACAO,
+            'TIPO_DE_MERCADO': markets[row.TIPO_DE_MERCADO],
+            'NOME_DA_EMPRESA': 'PETROBRAS' if row.CODIGO_DE_NEGOCIACAO.startswith('PETR') else 'VALE',
+            'ESPECIFICACAO_DO_PAPEL': 'PN      N2' if row.TIPO_DE_MERCADO == 'VISTA' else 'PN',
+            'MOEDA_DE_REFERENCIA': 'R$',
+            'DATA_DE_VENCIMENTO': f"{row.DATA_DE_VENCIMENTO:%Y%m%d}",
+            'FATOR_DE_COTACAO': '1',
+        }
+        for column in ('PRECO_DE_ABERTURA', 'PRECO_MAXIMO', 'PRECO_MINIMO', 'PRECO_ULTIMO_NEGOCIO', 'PRECO_DE_EXERCICIO'):
+            fields[column] = str(round(getattr(row, column) * 100))
+        for column in ('VOLUME_TOTAL_NEGOCIADO', 'QUANTIDADE_NEGOCIADA'):
+            fields[column] = str(round(getattr(row, column)))
+        line = ""
+        for column, width in FIELD_SIZES.items():
+            value = fields.get(column, '')
+            numeric = value.isdigit() and column not in ('CODIGO_DE_NEGOCIACAO', 'TIPO_DE_MERCADO', 'CODIGO_BDI')
+            line += value.zfill(width) if numeric else value.ljust(width)
+        lines.append(line)
+    lines.append(f"99COTAHIST.{date:%Y}BOVESPA {date:%Y%m%d}".ljust(245))
+    return ("\r\n".join(lines) + "\r\n").encode('latin-1')
+
+
+def fake_fetch_day(date, markets=('070', '080'), columns=None):
+    """Stand-in for cotahist.fetch_day that parses cotahist_bytes instead of downloading."""
+    from backend.cotahist import read_cotahist
+
+    return read_cotahist(cotahist_bytes(date), markets=markets, columns=columns)
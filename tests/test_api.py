@@ -0,0 +1,350 @@
+import asyncio
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from fastapi.testclient import TestClient
+
+from backend.main import app, fetcher
+from backend.serialization import ARROW_STREAM_MEDIA_TYPE, COLUMNAR_JSON_MEDIA_TYPE
+
+client = TestClient(app)
+
+
+def test_calculate_options_matches_single_endpoint():
+    book = {
+        "type": ["CALL", "PUT", "CALL"],
+        "spot": [38.5, 38.5, 68.4],
+        "strike": [39.0, 37.0, 70.0],
+        "maturity": [30 / 365, 60 / 365, 0.5],
+        "volatility": [32, 28, 0.35],
+        "risk_free_rate": 10.5,
+    }
+    response = client.post("/calculate/options", json=book)
+    assert response.status_code == 200
+    batch = response.json()
+    assert len(batch["price"]) == 3
+
+    for i in range(3):
+        single = client.post("/calculate/option", json={
+            "type": book["type"][i],
+            "spot": book["spot"][i],
+            "strike": book["strike"][i],
+            "maturity": book["maturity"][i],
+            "volatility": book["volatility"][i],
+            "risk_free_rate": book["risk_free_rate"],
+        }).json()
+        assert abs(batch["price"][i] - single["price"]) < 1e-10
+        assert abs(batch["delta"][i] - single["greeks"]["delta"]) <= 5e-5 + 1e-10
+
+
+def test_calculate_options_rejects_ragged_columns():
+    response = client.post("/calculate/options", json={
+        "type": ["CALL", "PUT"],
+        "spot": [38.5],
+        "strike": [39.0, 37.0],
+        "maturity": [0.1, 0.1],
+        "volatility": [0.3, 0.3],
+        "risk_free_rate": 0.105,
+    })
+    assert response.status_code == 400
+
+
+def _sample_options_frame(symbol):
+    return pd.DataFrame({
+        "symbol": ["PETRG350", "PETRS350"],
+        "strike": [35.0, 35.0],
+        "price": [1.2, float("nan")],
+        "type": ["CALL", "PUT"],
+        "maturity_date": ["2025-07-18", "2025-07-18"],
+        "volume": [1000.0, 0.0],
+    })
+
+
+def test_market_assets_filters_requested_symbols(monkeypatch):
+    quotes = {
+        "PETR4": {"symbol": "PETR4", "name": "PETROBRAS PN", "price": 36.85, "change": 0.65, "change_percent": 1.8,
+                  "volume": 1.25e8, "high": 37.1, "low": 36.0, "open": 36.2, "close": 36.2},
+    }
+    monkeypatch.setattr(fetcher, "get_assets", lambda symbols: [quotes[s] for s in symbols if s in quotes])
+
+    assert client.get("/market/assets", params={"symbols": "petr4, itub4"}).json() == [quotes["PETR4"]]
+    # Default watchlist, only tickers with a quote
+    assert [a["symbol"] for a in client.get("/market/assets").json()] == ["PETR4"]
+
+    # No market data at all: the mock dashboard data is served instead
+    monkeypatch.setattr(fetcher, "get_assets", lambda symbols: [])
+    assert [a["symbol"] for a in client.get("/market/assets").json()] == ["PETR4", "VALE3", "ITUB4"]
+
+
+def test_market_chain_headers_and_missing_spot(monkeypatch):
+    def fake_chain(symbol, rate):
+        if symbol != "PETR4":
+            raise ValueError(f"No spot quote for {symbol}")
+        chain = pd.DataFrame({"symbol": ["PETRG350"], "implied_volatility": [rate]})
+        chain.attrs = {"spot": 36.85, "trading_date": "2025-06-13"}
+        return chain
+
+    monkeypatch.setattr(fetcher, "get_chain_analytics", fake_chain)
+
+    response = client.get("/market/chain/petr4", params={"rate": 10.5})
+    assert response.json() == [{"symbol": "PETRG350", "implied_volatility": 0.105}]
+    assert response.headers["x-spot-price"] == "36.85"
+    assert response.headers["x-trading-date"] == "2025-06-13"
+    assert client.get("/market/chain/ABCD3").status_code == 404
+
+
+def test_market_surface_grid_axes(monkeypatch):
+    from backend.surface import SmileSlice, VolSurface
+
+    k = np.linspace(-0.2, 0.2, 9)
+    surface = VolSurface([SmileSlice(21 / 252, 21, 36.85, k, np.full(9, 0.09 * 21 / 252))], spot=36.85, rate=0.0)
+    monkeypatch.setattr(fetcher, "get_vol_surface", lambda symbol, rate: surface)
+
+    grid = client.get("/market/surface/PETR4", params={"strikes": "30,36.85", "business_days": "21,42"}).json()
+    assert [(p["strike"], p["business_days"]) for p in grid] == [(30.0, 21), (36.85, 21), (30.0, 42), (36.85, 42)]
+    assert all(abs(p["volatility"] - 0.3) < 1e-9 for p in grid)
+    assert len(client.get("/market/surface/PETR4").json()) == 25
+    assert client.get("/market/surface/PETR4", params={"strikes": "abc"}).status_code == 400
+    assert client.get("/market/surface/PETR4/smiles").json()[0]["model"] == "svi"
+
+
+def test_market_options_content_negotiation(monkeypatch):
+    monkeypatch.setattr(fetcher, "get_options_frame", _sample_options_frame)
+
+    default = client.get("/market/options/petr4")
+    assert default.headers["content-type"] == "application/json"
+    assert default.json()[0] == {
+        "symbol": "PETRG350", "strike": 35.0, "price": 1.2,
+        "type": "CALL", "maturity_date": "2025-07-18", "volume": 1000.0,
+    }
+    assert default.json()[1]["price"] is None
+
+    columnar = client.get("/market/options/PETR4", headers={"Accept": COLUMNAR_JSON_MEDIA_TYPE})
+    assert columnar.json()["symbol"] == ["PETRG350", "PETRS350"]
+    assert columnar.json()["price"] == [1.2, None]
+
+    arrow = client.get("/market/options/PETR4", headers={"Accept": ARROW_STREAM_MEDIA_TYPE})
+    table = pa.ipc.open_stream(arrow.content).read_all()
+    assert table.column("strike").to_pylist() == [35.0, 35.0]
+
+
+def test_slow_fetch_does_not_block_other_requests(monkeypatch):
+    def slow_frame(symbol):
+        time.sleep(1.0)
+        return _sample_options_frame(symbol)
+
+    monkeypatch.setattr(fetcher, "get_options_frame", slow_frame)
+    finished = []
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as api:
+            async def call(name, coro):
+                response = await coro
+                finished.append(name)
+                return response
+
+            slow = asyncio.create_task(call("options", api.get("/market/options/PETR4")))
+            await asyncio.sleep(0.05)
+            fast = await call("calculate", api.post("/calculate/option", json={
+                "type": "CALL", "spot": 38.5, "strike": 39.0, "maturity": 0.1,
+                "volatility": 0.32, "risk_free_rate": 0.105,
+            }))
+            return fast, await slow
+
+    fast, slow = asyncio.run(scenario())
+    assert fast.status_code == 200 and slow.status_code == 200
+    assert finished == ["calculate", "options"]
+
+
+def test_fetch_timeout_returns_504(monkeypatch):
+    monkeypatch.setattr(fetcher, "get_options_frame", lambda symbol: time.sleep(0.5))
+    monkeypatch.setattr(fetcher, "fetch_timeout", 0.05)
+
+    response = client.get("/market/options/PETR4")
+    assert response.status_code == 504
+
+
+def test_retry_after_timeout_joins_the_running_fetch(monkeypatch):
+    calls = []
+
+    def slow_frame(symbol):
+        calls.append(symbol)
+        time.sleep(0.3)
+        return _sample_options_frame(symbol)
+
+    monkeypatch.setattr(fetcher, "get_options_frame", slow_frame)
+    monkeypatch.setattr(fetcher, "fetch_timeout", 0.05)
+    assert client.get("/market/options/PETR4").status_code == 504
+    assert client.get("/market/options/PETR4").status_code == 504
+    monkeypatch.setattr(fetcher, "fetch_timeout", 5.0)
+    assert client.get("/market/options/PETR4").status_code == 200
+    # The retries waited on the first call instead of starting new ones
+    assert calls == ["PETR4"]
+
+
+def test_calculate_option_american_style():
+    contract = {"type": "PUT", "spot": 100.0, "strike": 105.0, "maturity": 0.5, "volatility": 30, "risk_free_rate": 10.0}
+    european = client.post("/calculate/option", json=contract).json()
+    american = client.post("/calculate/option", json={**contract, "style": "AMERICAN"}).json()
+    baw = client.post("/calculate/option", json={**contract, "style": "AMERICAN", "model": "BAW"}).json()
+    assert american["price"] > european["price"]
+    assert abs(baw["price"] - american["price"]) < 0.05
+
+    mismatched = client.post("/calculate/option", json={**contract, "style": "AMERICAN", "model": "BLACK_SCHOLES"})
+    assert mismatched.status_code == 400
+    assert client.post("/calculate/option", json={**contract, "style": "BERMUDAN"}).status_code == 422
+
+
+def test_calculate_monte_carlo_spread():
+    spread = {
+        "spot": 38.5, "volatility": 32, "risk_free_rate": 10.5, "maturity": 0.25, "paths": 20_000, "seed": 1,
+        "legs": [{"type": "CALL", "strike": 38.0}, {"type": "CALL", "strike": 42.0, "quantity": -1}],
+    }
+    response = client.post("/calculate/monte-carlo", json=spread)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["paths"] == 20_000
+    assert 0 < result["price"] < 4.0
+    assert client.post("/calculate/monte-carlo", json=spread).json() == result
+
+    missing_barrier = {**spread, "legs": [{"type": "PUT", "strike": 38.0, "style": "DOWN_AND_OUT"}]}
+    assert client.post("/calculate/monte-carlo", json=missing_barrier).status_code == 400
+
+    # paths x time_steps is capped; European-only legs take a single step whatever time_steps says
+    huge = {**spread, "paths": 10_000_000, "time_steps": 1_000}
+    assert client.post("/calculate/monte-carlo", json={**huge, "legs": [{"type": "CALL", "strike": 38.0, "style": "ASIAN"}]}).status_code == 422
+    from backend.models import MonteCarloRequest
+    assert MonteCarloRequest(**huge).paths == 10_000_000
+
+
+def test_calculate_strategy_grid():
+    straddle = {
+        "spot": 38.5, "volatility": 32, "risk_free_rate": 10.5, "maturity": 0.25,
+        "legs": [{"type": "CALL", "strike": 38.0, "premium": 2.0}, {"type": "PUT", "strike": 38.0, "premium": 1.5}],
+        "price_steps": 500, "time_steps": 59,
+    }
+    response = client.post("/calculate/strategy", json=straddle)
+    assert response.status_code == 200
+    result = response.json()
+    assert len(result["pnl"]) == 60 and len(result["pnl"][0]) == 500
+    assert result["breakevens"] == [34.5, 41.5]
+    assert result["max_profit"] is None and result["max_loss"] == -3.5
+
+    no_strike = {**straddle, "legs": [{"type": "CALL"}]}
+    assert client.post("/calculate/strategy", json=no_strike).status_code == 400
+    assert client.post("/calculate/strategy", json={**straddle, "min_price": -5.0}).status_code == 422
+    assert client.post("/calculate/strategy", json={**straddle, "min_price": 50.0, "max_price": 40.0}).status_code == 400
+    # Only min_price given: the default upper bound (strikes + 20%) is below it
+    assert client.post("/calculate/strategy", json={**straddle, "min_price": 60.0}).status_code == 400
+    bad_strike = {**straddle, "legs": [{"type": "CALL", "strike": 0.0}]}
+    assert client.post("/calculate/strategy", json=bad_strike).status_code == 422
+
+
+def test_risk_scenarios_cube():
+    book = {
+        "positions": [
+            {"type": "CALL", "spot": 38.5, "strike": 40.0, "maturity": 0.25, "volatility": 32, "risk_free_rate": 10.5,
+             "quantity": 100},
+            {"type": "PUT", "spot": 38.5, "strike": 36.0, "maturity": 0.5, "volatility": 35, "risk_free_rate": 10.5,
+             "quantity": 50, "position": "SHORT"},
+        ],
+        "spot_shocks": [-0.2, 0.0, 0.2], "vol_shocks": [0.0, 0.1], "days": [0, 30], "rate_shocks_bps": [0, 100],
+        "by_position": True,
+    }
+    response = client.post("/risk/scenarios", json=book)
+    assert response.status_code == 200
+    result = response.json()
+    pnl = np.array(result["pnl"])
+    assert pnl.shape == (3, 2, 2, 2)
+    assert abs(pnl[1, 0, 0, 0]) < 1e-9
+    assert np.allclose(np.array(result["position_pnl"]).sum(axis=0), pnl)
+    assert result["worst_pnl"] == pnl.min()
+    assert result["worst_scenario"]["spot"] == -0.2 and result["worst_scenario"]["rate_bps"] in (0.0, 100.0)
+
+    american = {**book, "positions": [{**book["positions"][0], "style": "AMERICAN"}]}
+    assert client.post("/risk/scenarios", json=american).status_code == 400
+    assert client.post("/risk/scenarios", json={**book, "vol_shocks": []}).status_code == 422
+    assert client.post("/risk/scenarios", json={**book, "spot_shocks": [-1.5, 0.0]}).status_code == 422
+    zero_spot = {**book, "positions": [{**book["positions"][0], "spot": 0.0}]}
+    assert client.post("/risk/scenarios", json=zero_spot).status_code == 422
+    # A -100% shock is the zero-spot limit: calls worthless, puts at their discounted strike
+    crash = client.post("/risk/scenarios", json={**book, "spot_shocks": [-1.0]})
+    assert crash.status_code == 200 and np.isfinite(np.array(crash.json()["pnl"])).all()
+
+
+def test_risk_portfolio_incremental_updates():
+    call = {"id": "c1", "underlying": "PETR4", "type": "CALL", "spot": 38.5, "strike": 40.0, "maturity": 0.25,
+            "volatility": 32, "risk_free_rate": 10.5, "quantity": 10, "multiplier": 100}
+    put = {**call, "id": "p1", "underlying": "vale3", "type": "PUT", "spot": 60.0, "strike": 58.0, "position": "SHORT"}
+    response = client.post("/risk/portfolio", json={"positions": [call, put]})
+    assert response.status_code == 200
+    loaded = response.json()
+    single = client.post("/calculate/option", json=call).json()
+    assert np.isclose(loaded["underlyings"]["PETR4"]["delta"], 1000 * single["greeks"]["delta"], atol=1.0)
+    assert loaded["underlyings"]["VALE3"]["delta"] > 0  # Short put
+    assert loaded["total"]["positions"] == 2
+
+    moved = client.put("/risk/portfolio/spot/PETR4", json={"spot": 42.0}).json()
+    assert moved["underlyings"]["PETR4"]["delta"] > loaded["underlyings"]["PETR4"]["delta"]
+    assert moved["underlyings"]["VALE3"] == loaded["underlyings"]["VALE3"]
+    assert client.delete("/risk/portfolio/positions/p1").json()["total"]["positions"] == 1
+    assert client.get("/risk/portfolio").json()["underlyings"].keys() == {"PETR4"}
+    assert client.delete("/risk/portfolio/positions/p1").status_code == 404
+    assert client.put("/risk/portfolio/spot/ITUB4", json={"spot": 30.0}).status_code == 404
+    american = {"positions": [{**call, "style": "AMERICAN"}]}
+    assert client.put("/risk/portfolio/positions", json=american).status_code == 400
+    no_underlying = {key: value for key, value in call.items() if key != "underlying"}
+    assert client.put("/risk/portfolio/positions", json={"positions": [no_underlying]}).status_code == 422
+
+
+def test_calculate_payoff_columnar_and_downsampled():
+    request = {"strike": 40.0, "premium": 2.0, "type": "CALL", "min_price": 20.0, "max_price": 60.0, "steps": 81}
+    records = client.post("/calculate/payoff", json=request).json()
+    assert records[40] == {"price": 40.0, "payoff": -2.0, "intrinsic": 0.0}
+
+    columnar = client.post("/calculate/payoff", json=request, headers={"Accept": COLUMNAR_JSON_MEDIA_TYPE})
+    assert columnar.headers["content-type"] == COLUMNAR_JSON_MEDIA_TYPE
+    assert columnar.json()["payoff"] == [r["payoff"] for r in records]
+    # No binary float noise in the encoded prices
+    fine = client.post("/calculate/payoff", json={**request, "min_price": 54.99, "max_price": 55.99, "steps": 2})
+    assert b"54.99," in fine.content and b"54.9900" not in fine.content
+
+    chart = client.post("/calculate/payoff", json={**request, "steps": 5_000_001, "max_points": 100}).json()
+    assert len(chart) <= 100
+    assert {"price": 40.0, "payoff": -2.0, "intrinsic": 0.0} in chart
+    assert chart[0]["price"] == 20.0 and chart[-1]["price"] == 60.0
+
+
+def test_calculate_option_memoizes_normalized_inputs():
+    from backend.pricing import pricing_cache, pricing_key
+
+    contract = {"type": "CALL", "spot": 38.5, "strike": 39.0, "maturity": 30 / 365, "volatility": 32, "risk_free_rate": 10.5}
+    before = pricing_cache.stats()
+    first = client.post("/calculate/option", json=contract).json()
+    # Same contract with fractional rates and sub-quantum noise shares the cache entry
+    same = {**contract, "volatility": 0.32, "risk_free_rate": 0.105, "spot": 38.5 + 1e-12}
+    assert client.post("/calculate/option", json=same).json() == first
+    after = pricing_cache.stats()
+    assert after["hits"] - before["hits"] >= 1
+    assert after["misses"] - before["misses"] <= 1
+    pricing = client.get("/cache/stats").json()["pricing"]
+    assert 0 < pricing["hit_rate"] <= 1
+    # Bytes are real result sizes, separate from the entry cap
+    assert pricing["max_entries"] == 50_000 and pricing["bytes"] > 100 * pricing["entries"]
+
+    key = pricing_key("CALL", 38.5, 39.0, 30 / 365, 32, 10.5)
+    assert key == pricing_key("CALL", 38.500000001, 39.0, 30 / 365, 0.32, 0.105)
+    assert key != pricing_key("CALL", 38.5, 39.0, 30 / 365, 32, 10.5, model="BINOMIAL_LR", steps=501, american=True)
+
+
+def test_calculate_option_zero_spot():
+    contract = {"type": "PUT", "spot": 0.0, "strike": 30.0, "maturity": 0.5, "volatility": 0.3, "risk_free_rate": 0.1}
+    response = client.post("/calculate/option", json=contract)
+    assert response.status_code == 200
+    result = response.json()
+    assert np.isclose(result["price"], 30.0 * np.exp(-0.05))
+    assert result["greeks"]["gamma"] == 0.0 and result["greeks"]["delta"] == -1.0
@@ -0,0 +1,41 @@
+import datetime
+
+import numpy as np
+
+from backend.b3_calendar import (
+    b3_holidays, business_days_between, easter_sunday, is_trading_day,
+    latest_trading_day, next_trading_day, previous_trading_day, year_fraction
+)
+
+
+def test_moveable_and_exchange_holidays_2025():
+    assert easter_sunday(2025) == datetime.date(2025, 4, 20)
+    closed = [
+        datetime.date(2025, 3, 3),    # Carnaval
+        datetime.date(2025, 3, 4),
+        datetime.date(2025, 4, 18),   # Sexta-feira Santa
+        datetime.date(2025, 6, 19),   # Corpus Christi
+        datetime.date(2025, 11, 20),  # Consciência Negra
+        datetime.date(2025, 12, 24),
+        datetime.date(2025, 12, 31),
+    ]
+    assert not any(is_trading_day(d) for d in closed)
+    assert is_trading_day(datetime.date(2025, 3, 5))  # Ash Wednesday opens late
+    assert datetime.date(2023, 11, 20) not in b3_holidays(2023)
+
+
+def test_trading_day_navigation():
+    assert latest_trading_day(datetime.date(2025, 4, 20)) == datetime.date(2025, 4, 17)
+    assert previous_trading_day(datetime.date(2025, 3, 5)) == datetime.date(2025, 2, 28)
+    assert next_trading_day(datetime.date(2025, 12, 23)) == datetime.date(2025, 12, 26)
+
+
+def test_business_day_counts():
+    assert business_days_between(datetime.date(2025, 1, 1), datetime.date(2026, 1, 1)) == 250
+    # One week with no holidays
+    assert business_days_between(datetime.date(2025, 6, 2), datetime.date(2025, 6, 9)) == 5
+    assert year_fraction(datetime.date(2025, 6, 2), datetime.date(2025, 6, 9)) == 5 / 252
+
+    expiries = np.array(['2025-06-20', '2025-07-18', '2025-08-15'], dtype='datetime64[D]')
+    counts = business_days_between(np.datetime64('2025-06-13'), expiries)
+    assert counts.tolist() == [4, 24, 44]
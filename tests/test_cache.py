@@ -0,0 +1,137 @@
+import datetime
+import os
+import threading
+import time
+
+import backend.data_fetcher as data_fetcher
+from backend.cache import LRUCache, ParquetDayCache
+from backend.data_fetcher import B3DataFetcher, OPTION_COLUMNS
+from tests.b3_samples import TRADING_DATE, fake_cotahist, fake_fetch_day
+
+
+def test_save_and_load_with_projection(tmp_path):
+    cache = ParquetDayCache(str(tmp_path), max_age_days=None)
+    df = fake_cotahist(TRADING_DATE)
+    cache.save(TRADING_DATE, df)
+
+    loaded = cache.load(TRADING_DATE, columns=['CODIGO_DE_NEGOCIACAO', 'PRECO_DE_EXERCICIO'])
+    assert list(loaded.columns) == ['CODIGO_DE_NEGOCIACAO', 'PRECO_DE_EXERCICIO']
+    assert loaded['CODIGO_DE_NEGOCIACAO'].tolist() == df['CODIGO_DE_NEGOCIACAO'].tolist()
+    assert cache.load(TRADING_DATE + datetime.timedelta(days=1)) is None
+
+
+def test_corrupted_file_is_discarded(tmp_path):
+    cache = ParquetDayCache(str(tmp_path), max_age_days=None)
+    cache.save(TRADING_DATE, fake_cotahist(TRADING_DATE))
+    with open(cache.path_for(TRADING_DATE), "r+b") as f:
+        f.truncate(100)
+
+    assert cache.load(TRADING_DATE) is None
+    assert cache.dates() == []
+
+
+def test_eviction_by_age_and_size(tmp_path):
+    cache = ParquetDayCache(str(tmp_path), max_age_days=None, max_bytes=None)
+    dates = [TRADING_DATE - datetime.timedelta(days=d) for d in (0, 1, 2, 3)]
+    now = datetime.datetime(2025, 6, 14).timestamp()
+    for age_days, date in zip((0, 1, 2, 40), dates):
+        cache.save(date, fake_cotahist(date))
+        mtime = now - age_days * 86400
+        os.utime(cache.path_for(date), (mtime, mtime))
+
+    cache.max_age_days = 30
+    cache.evict(now=now)
+    assert cache.dates() == sorted(dates[:3])
+
+    cache.max_bytes = 2 * os.path.getsize(cache.path_for(TRADING_DATE))
+    cache.evict(now=now)
+    assert cache.dates() == sorted(dates[:2])
+
+
+def test_fetcher_warm_start_skips_download(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_get(date, **kwargs):
+        calls.append(date)
+        return fake_fetch_day(date, **kwargs)
+
+    monkeypatch.setattr(data_fetcher.cotahist, "fetch_day", fake_get)
+
+    cold = B3DataFetcher(cache_dir=str(tmp_path))
+    df = cold.fetch_data(TRADING_DATE)
+    assert list(df.columns) == OPTION_COLUMNS
+    assert len(df) == 4
+
+    warm = B3DataFetcher(cache_dir=str(tmp_path))
+    df_warm = warm.fetch_data(TRADING_DATE)
+    assert calls == [TRADING_DATE]
+    assert df_warm['CODIGO_DE_NEGOCIACAO'].tolist() == df['CODIGO_DE_NEGOCIACAO'].tolist()
+
+
+def test_lru_evicts_by_size_and_counts():
+    cache = LRUCache(max_bytes=10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    assert cache.get("a") == "xxxx"
+    cache.put("c", "xxxx")  # over budget: evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get_or_load("c", lambda key: "never") == "xxxx"
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == 8
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+
+
+def test_lru_coalesces_concurrent_misses():
+    cache = LRUCache(max_bytes=100, sizeof=len)
+    release = threading.Event()
+    loads = []
+
+    def slow_loader(key):
+        loads.append(key)
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("day", slow_loader)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    while cache.stats()["misses"] + cache.stats()["coalesced"] < 8:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert loads == ["day"]
+    assert results == ["value"] * 8
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_lru_ttl_expires_entries():
+    now = [0.0]
+    cache = LRUCache(max_bytes=10, sizeof=len, ttl=60.0, clock=lambda: now[0])
+    assert cache.get_or_load("a", lambda key: "xx") == "xx"
+    now[0] = 59.0
+    assert cache.get("a") == "xx"
+    now[0] = 60.0
+    assert cache.get_or_load("a", lambda key: "yyy") == "yyy"
+
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["bytes"] == 3
+    assert stats["hit_rate"] == 1 / 3
+
+
+def test_lru_max_entries():
+    cache = LRUCache(max_bytes=1000, sizeof=len, max_entries=2)
+    for key in "abc":
+        cache.put(key, "xx")
+    assert cache.get("a") is None and cache.get("c") == "xx"
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["max_entries"], stats["evictions"]) == (2, 4, 2, 1)
@@ -0,0 +1,92 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backend.data_fetcher as data_fetcher
+from backend.b3_calendar import year_fraction
+from backend.chain import CHAIN_COLUMNS, chain_analytics
+from backend.data_fetcher import B3DataFetcher
+from backend.logic import calculate_black_scholes_batch
+from tests.b3_samples import TRADING_DATE, fake_fetch_day
+
+
+def test_chain_recovers_volatility_and_greeks():
+    expiry = pd.Timestamp('2025-07-18')
+    strikes = np.array([32.0, 36.0, 40.0, 36.0])
+    types = np.array(['CALL', 'CALL', 'CALL', 'PUT'])
+    maturity = year_fraction(TRADING_DATE, expiry.date())
+    model = calculate_black_scholes_batch(36.85, strikes, maturity, 0.3, 0.105, types)
+    options = pd.DataFrame({
+        'CODIGO_DE_NEGOCIACAO': ['PETRG320', 'PETRG360', 'PETRG400', 'PETRS360'],
+        'TIPO_DE_MERCADO': np.where(types == 'CALL', 'OPCOES_DE_COMPRA', 'OPCOES_DE_VENDA'),
+        'PRECO_DE_EXERCICIO': strikes,
+        'PRECO_ULTIMO_NEGOCIO': model['price'],
+        'DATA_DE_VENCIMENTO': np.array([expiry] * 4, dtype='datetime64[ms]'),
+        'VOLUME_TOTAL_NEGOCIADO': 100.0,
+    })
+
+    chain = chain_analytics(options, 36.85, TRADING_DATE, 0.105)
+    assert list(chain.columns) == CHAIN_COLUMNS
+    assert chain['business_days'].tolist() == [24] * 4
+    np.testing.assert_allclose(chain['implied_volatility'], 0.3, atol=1e-6)
+    np.testing.assert_allclose(chain['delta'], model['delta'], atol=1e-6)
+    np.testing.assert_allclose(chain['moneyness'], strikes / 36.85)
+    assert chain.attrs == {"spot": 36.85, "trading_date": "2025-06-13"}
+
+
+def test_chain_below_intrinsic_has_no_greeks():
+    options = pd.DataFrame({
+        'CODIGO_DE_NEGOCIACAO': ['PETRG300'],
+        'TIPO_DE_MERCADO': ['OPCOES_DE_COMPRA'],
+        'PRECO_DE_EXERCICIO': [30.0],
+        'PRECO_ULTIMO_NEGOCIO': [5.0],
+        'DATA_DE_VENCIMENTO': np.array(['2025-07-18'], dtype='datetime64[ms]'),
+        'VOLUME_TOTAL_NEGOCIADO': [10.0],
+    })
+    row = chain_analytics(options, 36.85, TRADING_DATE, 0.105).iloc[0]
+    assert np.isnan(row['implied_volatility']) and np.isnan(row['delta'])
+
+
+def test_fetcher_caches_chain_per_symbol_and_date(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_fetcher.cotahist, "fetch_day", fake_fetch_day)
+    monkeypatch.setattr(data_fetcher, "get_latest_workday", lambda: TRADING_DATE)
+    fetcher = B3DataFetcher(cache_dir=str(tmp_path))
+
+    chain = fetcher.get_chain_analytics('petr4')
+    assert chain['symbol'].tolist() == ['PETRG350', 'PETRS350']
+    assert chain.attrs['spot'] == 36.85
+    assert fetcher.get_chain_analytics('PETR4') is chain
+    assert fetcher.analytics_cache.stats()['hits'] == 1
+
+    with pytest.raises(ValueError):
+        fetcher.get_chain_analytics('VALE3')
+
+
+def test_chain_cache_key_uses_the_index_date(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_fetcher.cotahist, "fetch_day", fake_fetch_day)
+    monkeypatch.setattr(data_fetcher, "get_latest_workday", lambda: TRADING_DATE)
+    fetcher = B3DataFetcher(cache_dir=str(tmp_path))
+    fetch_index = fetcher.fetch_index
+
+    def racing_fetch_index(date=None):
+        index = fetch_index(date)
+        # Another executor thread resolves a different session in between
+        fetcher.cached_date = datetime.date(2000, 1, 3)
+        return index
+
+    monkeypatch.setattr(fetcher, "fetch_index", racing_fetch_index)
+    chain = fetcher.get_chain_analytics('PETR4')
+    assert chain.attrs['trading_date'] == str(TRADING_DATE)
+    assert fetcher.analytics_cache.get(('PETR4', TRADING_DATE, data_fetcher.DEFAULT_RISK_FREE_RATE)) is chain
+
+
+def test_fetcher_caches_fitted_surface(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_fetcher.cotahist, "fetch_day", fake_fetch_day)
+    monkeypatch.setattr(data_fetcher, "get_latest_workday", lambda: TRADING_DATE)
+    fetcher = B3DataFetcher(cache_dir=str(tmp_path))
+
+    surface = fetcher.get_vol_surface('PETR4')
+    assert surface.spot == 36.85
+    assert fetcher.get_vol_surface('PETR4') is surface
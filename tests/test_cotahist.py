@@ -0,0 +1,58 @@
+import io
+import zipfile
+
+import b3cotahist
+import pandas as pd
+import pytest
+
+from backend import cotahist
+from tests.b3_samples import TRADING_DATE, cotahist_bytes
+
+
+def test_matches_b3cotahist_for_kept_markets():
+    raw = cotahist_bytes(TRADING_DATE)
+    expected = b3cotahist.read_bytes(io.BytesIO(raw))
+
+    parsed = cotahist.read_cotahist(raw, markets=(cotahist.SPOT_MARKET,) + cotahist.OPTION_MARKETS)
+    assert list(parsed.columns) == list(expected.columns)
+    for column in expected.columns:
+        pd.testing.assert_series_equal(parsed[column], expected[column], check_dtype=False)
+
+    options = cotahist.read_cotahist(raw, columns=['CODIGO_DE_NEGOCIACAO', 'TIPO_DE_MERCADO'])
+    assert options['CODIGO_DE_NEGOCIACAO'].tolist() == ['PETRG350', 'PETRS350', 'VALEG700', 'VALES700']
+    assert set(options['TIPO_DE_MERCADO']) == {'OPCOES_DE_COMPRA', 'OPCOES_DE_VENDA'}
+
+
+def test_streams_zip_in_small_chunks():
+    raw = cotahist_bytes(TRADING_DATE)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('COTAHIST_D13062025.TXT', raw)
+
+    stats = cotahist.ParseStats()
+    # Chunks smaller than a record and LF-only line endings take the slow path
+    chunks = list(cotahist.iter_cotahist(
+        io.BytesIO(raw.replace(b"\r\n", b"\n")), columns=['PRECO_DE_EXERCICIO'], chunk_bytes=100, stats=stats
+    ))
+    assert sum(len(c) for c in chunks) == 4
+    assert (stats.records, stats.kept) == (5, 4)
+
+    parsed = cotahist.read_cotahist(archive.getvalue(), columns=['PRECO_DE_EXERCICIO', 'DATA_DE_VENCIMENTO'])
+    assert parsed['PRECO_DE_EXERCICIO'].tolist() == [35.0, 35.0, 70.0, 70.0]
+    assert str(parsed['DATA_DE_VENCIMENTO'].iloc[0].date()) == '2025-07-18'
+
+
+def test_fetch_rejects_html_pages_and_empty_files(monkeypatch):
+    def serve(body):
+        monkeypatch.setattr(cotahist, "download", lambda url, destination: destination.write(body))
+
+    serve(b"<html><body>Arquivo indisponivel</body></html>")
+    with pytest.raises(zipfile.BadZipFile):
+        cotahist.fetch_day(TRADING_DATE)
+
+    header_only = io.BytesIO()
+    with zipfile.ZipFile(header_only, 'w') as z:
+        z.writestr('COTAHIST_D13062025.TXT', cotahist_bytes(TRADING_DATE).split(b"\r\n")[0] + b"\r\n")
+    serve(header_only.getvalue())
+    with pytest.raises(FileNotFoundError):
+        cotahist.fetch_day(TRADING_DATE)
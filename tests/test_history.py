@@ -0,0 +1,77 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+import backend.history as history
+from backend.history import HistoryStore, Source, backfill, plan_sources
+from tests.b3_samples import fake_fetch_day
+
+
+def test_plan_uses_coarsest_files():
+    sources = plan_sources(datetime.date(2023, 12, 28), datetime.date(2025, 6, 17), today=datetime.date(2025, 6, 17))
+    names = [s.name for s in sources]
+    assert names[:3] == ["D28122023", "D29122023", "A2024"]
+    assert names[3:8] == ["M012025", "M022025", "M032025", "M042025", "M052025"]
+    # June is still open: trading days only (no weekend, Corpus Christi is the 19th)
+    assert names[8:] == ["D02062025", "D03062025", "D04062025", "D05062025", "D06062025",
+                         "D09062025", "D10062025", "D11062025", "D12062025", "D13062025",
+                         "D16062025", "D17062025"]
+
+
+def test_plan_before_the_trading_calendar():
+    # Whole years and months before 2000 are fine; daily files need the calendar
+    names = [s.name for s in plan_sources(datetime.date(1998, 1, 1), datetime.date(1999, 12, 31))]
+    assert names == ["A1998", "A1999"]
+    assert plan_sources(datetime.date(1999, 11, 1), datetime.date(1999, 11, 30))[0].name == "M111999"
+    with pytest.raises(ValueError, match="daily file"):
+        plan_sources(datetime.date(1999, 11, 15), datetime.date(2000, 2, 1))
+
+
+def test_backfill_writes_partitions_and_queries_by_root(tmp_path, monkeypatch):
+    def fake_month(year, month, markets, columns):
+        days = [datetime.date(year, month, 2), datetime.date(year, month, 3)]
+        return pd.concat([fake_fetch_day(d, markets, columns) for d in days], ignore_index=True)
+
+    monkeypatch.setattr(history.cotahist, "fetch_day", fake_fetch_day)
+    monkeypatch.setattr(history.cotahist, "fetch_month", fake_month)
+    store = HistoryStore(str(tmp_path))
+
+    today = datetime.date(2025, 7, 2)
+    done = backfill(store, datetime.date(2025, 6, 1), datetime.date(2025, 7, 1), workers=1, today=today)
+    assert done == ["M062025", "D01072025"]
+    # Already ingested sources are skipped on the next run
+    assert backfill(store, datetime.date(2025, 6, 1), datetime.date(2025, 7, 1), workers=1, today=today) == []
+
+    paths = store.partition_paths("PETR", datetime.date(2025, 6, 3), datetime.date(2025, 6, 30))
+    assert len(paths) == 1 and "underlying=PETR" in paths[0] and "month=6" in paths[0]
+
+    rows = store.query("PETR", datetime.date(2025, 6, 3), datetime.date(2025, 7, 1))
+    assert set(rows['CODIGO_DE_NEGOCIACAO']) == {"PETR4", "PETRG350", "PETRS350"}
+    assert sorted(set(rows['DATA_DO_PREGAO'].dt.date)) == [datetime.date(2025, 6, 3), datetime.date(2025, 7, 1)]
+    assert store.query("ITUB", datetime.date(2025, 6, 1), today).empty
+
+
+def test_coarser_source_replaces_daily_parts(tmp_path, monkeypatch):
+    monkeypatch.setattr(history.cotahist, "fetch_day", fake_fetch_day)
+    store = HistoryStore(str(tmp_path))
+    day = Source("D", datetime.date(2025, 6, 2))
+    store.write(day, day.fetch())
+
+    month = Source("M", datetime.date(2025, 6, 1))
+    store.write(month, fake_fetch_day(datetime.date(2025, 6, 2), history.HISTORY_MARKETS, history.HISTORY_COLUMNS))
+    assert store.sources() == ["M062025"]
+    assert store.covers(day)
+    assert len(store.query("VALE", datetime.date(2025, 6, 1), datetime.date(2025, 6, 30))) == 2
+
+
+def test_empty_download_is_not_marked_done(tmp_path, monkeypatch):
+    empty = fake_fetch_day(datetime.date(2025, 6, 2), history.HISTORY_MARKETS, history.HISTORY_COLUMNS).iloc[:0]
+    monkeypatch.setattr(history.cotahist, "fetch_day", lambda *args: empty)
+    store = HistoryStore(str(tmp_path))
+    today = datetime.date(2025, 6, 3)
+    assert backfill(store, datetime.date(2025, 6, 2), datetime.date(2025, 6, 2), workers=1, today=today) == []
+    assert store.sources() == []
+
+    monkeypatch.setattr(history.cotahist, "fetch_day", fake_fetch_day)
+    assert backfill(store, datetime.date(2025, 6, 2), datetime.date(2025, 6, 2), workers=1, today=today) == ["D02062025"]
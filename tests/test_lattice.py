@@ -0,0 +1,108 @@
+import time
+
+import numpy as np
+
+from backend.lattice import (
+    BAW, BINOMIAL_CRR, BINOMIAL_LR, barone_adesi_whaley_batch, binomial_tree_batch, calculate_american_option,
+)
+from backend.logic import calculate_black_scholes, calculate_black_scholes_batch
+
+
+def test_european_tree_converges_to_black_scholes():
+    spots = np.array([80.0, 100.0, 120.0, 100.0])
+    types = np.array(['CALL', 'PUT', 'PUT', 'CALL'])
+    exact = calculate_black_scholes_batch(spots, 100.0, 0.5, 0.3, 0.1, types, 0.02)
+    for method, tolerance in ((BINOMIAL_LR, 1e-4), (BINOMIAL_CRR, 5e-3)):
+        tree = binomial_tree_batch(spots, 100.0, 0.5, 0.3, 0.1, types, 0.02, 1000, method, american=False)
+        assert np.allclose(tree["price"], exact["price"], atol=tolerance)
+        assert np.allclose(tree["delta"], exact["delta"], atol=1e-3)
+        assert np.allclose(tree["gamma"], exact["gamma"], atol=1e-3)
+        assert np.allclose(tree["theta"], exact["theta"], atol=1e-3)
+
+
+def test_american_exercise_premium():
+    spots = np.array([90.0, 100.0, 110.0])
+    european = binomial_tree_batch(spots, 100.0, 1.0, 0.2, 0.08, 'PUT', american=False)["price"]
+    american = binomial_tree_batch(spots, 100.0, 1.0, 0.2, 0.08, 'PUT')["price"]
+    assert (american > european + 0.05).all()
+    assert (american >= 100.0 - spots).all()
+
+    # Without dividends an American call is never exercised early
+    call = binomial_tree_batch(spots, 100.0, 1.0, 0.2, 0.08, 'CALL')["price"]
+    assert np.allclose(call, calculate_black_scholes_batch(spots, 100.0, 1.0, 0.2, 0.08, 'CALL')["price"], atol=1e-3)
+
+
+def test_barone_adesi_whaley_close_to_tree():
+    spots = np.array([90.0, 100.0, 110.0, 90.0, 100.0, 110.0])
+    types = np.array(['CALL'] * 3 + ['PUT'] * 3)
+    baw = barone_adesi_whaley_batch(spots, 100.0, 0.25, 0.2, 0.08, types, 0.12)
+    tree = binomial_tree_batch(spots, 100.0, 0.25, 0.2, 0.08, types, 0.12, 2001)["price"]
+    # BAW's own approximation error (Barone-Adesi & Whaley 1987 table: 0.59, 3.52, 10.31 for the calls)
+    assert np.allclose(baw, [0.59, 3.52, 10.31, 11.25, 4.40, 1.12], atol=0.01)
+    assert np.allclose(baw, tree, atol=0.05)
+    # Deep in the money past the critical price the value is intrinsic
+    assert barone_adesi_whaley_batch(40.0, 100.0, 0.25, 0.2, 0.08, 'PUT')[0] == 60.0
+
+
+def test_barone_adesi_whaley_zero_rate_call_with_dividend():
+    # k = 1 - exp(-rT) vanishes at r = 0; the quadratic takes its limit instead of NaN
+    result = calculate_american_option(100.0, 100.0, 0.5, 0.3, 0.0, 'CALL', 0.05, model=BAW)
+    tree = calculate_american_option(100.0, 100.0, 0.5, 0.3, 0.0, 'CALL', 0.05, model=BINOMIAL_LR)
+    assert abs(result["price"] - tree["price"]) < 0.05
+    assert all(np.isfinite(value) for value in result["greeks"].values())
+    near_zero = barone_adesi_whaley_batch(100.0, 100.0, 0.5, 0.3, 1e-9, 'CALL', 0.05)[0]
+    assert abs(near_zero - result["price"]) < 1e-6
+
+
+def test_low_volatility_trees_stay_valid():
+    # vol < r sqrt(dt) pushes the CRR probability above 1; the drift-centred tree takes over
+    for method in (BINOMIAL_CRR, BINOMIAL_LR):
+        tree = binomial_tree_batch(100.0, 100.0, 1.0, [0.001, 1e-4], 0.05, ['CALL', 'PUT'], 0.0, 501, method, american=False)
+        european = calculate_black_scholes_batch(100.0, 100.0, 1.0, [0.001, 1e-4], 0.05, ['CALL', 'PUT'])["price"]
+        assert np.allclose(tree["price"], european, atol=1e-6)
+    for model in (BAW, BINOMIAL_CRR, BINOMIAL_LR):
+        for volatility in (0.01, 0.001):
+            put = calculate_american_option(100.0, 110.0, 1.0, volatility, 0.05, 'PUT', model=model)
+            call = calculate_american_option(100.0, 100.0, 1.0, volatility, 0.05, 'CALL', 0.03, model=model)
+            # In the money, the put is worth exercising now; the call is about its discounted forward
+            assert np.isclose(put["price"], 10.0) and put["greeks"]["delta"] == -1.0
+            assert abs(call["price"] - 100.0 * (np.exp(-0.03) - np.exp(-0.05))) < 0.01
+            for result in (put, call):
+                assert all(np.isfinite(value) for value in result["greeks"].values())
+
+
+def test_american_prices_never_below_intrinsic():
+    spots = np.array([50.0, 80.0, 120.0, 200.0])
+    for method in (BINOMIAL_CRR, BINOMIAL_LR):
+        tree = binomial_tree_batch(spots, 100.0, 1.0, 0.2, 0.1, 'PUT', 0.0, 201, method)["price"]
+        assert (tree >= np.maximum(100.0 - spots, 0.0)).all()
+    baw = barone_adesi_whaley_batch(spots, 100.0, 1.0, 0.001, 0.1, 'PUT')
+    assert (baw >= np.maximum(100.0 - spots, 0.0)).all() and np.isfinite(baw).all()
+
+
+def test_american_zero_spot_and_strike():
+    for model in (BAW, BINOMIAL_CRR, BINOMIAL_LR):
+        put = calculate_american_option(0.0, 39.0, 1.0, 0.3, 0.05, 'PUT', model=model)
+        assert put["price"] == 39.0 and put["greeks"]["delta"] == -1.0
+        call = calculate_american_option(30.0, 0.0, 1.0, 0.3, 0.05, 'CALL', 0.02, model=model)
+        assert call["price"] == 30.0 and call["greeks"]["delta"] == 1.0
+        # European style keeps the Black-Scholes limit
+        european = calculate_american_option(30.0, 0.0, 1.0, 0.3, 0.05, 'CALL', 0.02, model=model, american=False)
+        assert np.isclose(european["price"], 30.0 * np.exp(-0.02))
+        for result in (put, call, european):
+            assert all(np.isfinite(value) for value in result["greeks"].values())
+
+
+def test_american_greeks_layout_and_latency():
+    european = calculate_black_scholes(100.0, 105.0, 0.5, 0.3, 0.1, 'PUT', 0.02)
+    start = time.perf_counter()
+    tree = calculate_american_option(100.0, 105.0, 0.5, 0.3, 0.1, 'PUT', 0.02, BINOMIAL_LR, 1000, american=False)
+    assert time.perf_counter() - start < 0.5
+    assert tree.keys() == european.keys()
+    for greek, value in european["greeks"].items():
+        assert abs(tree["greeks"][greek] - value) <= 2e-4
+
+    baw = calculate_american_option(100.0, 105.0, 0.5, 0.3, 0.1, 'PUT', 0.02, BAW)
+    lr = calculate_american_option(100.0, 105.0, 0.5, 0.3, 0.1, 'PUT', 0.02, BINOMIAL_LR, 1000)
+    assert abs(baw["price"] - lr["price"]) < 0.05
+    assert abs(baw["greeks"]["delta"] - lr["greeks"]["delta"]) < 0.01
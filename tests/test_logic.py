@@ -0,0 +1,110 @@
+import numpy as np
+
+from backend.logic import (
+    calculate_black_scholes, calculate_black_scholes_batch, calculate_d1_d2, calculate_implied_volatility_batch,
+    calculate_payoff, calculate_payoff_batch, downsample_indices
+)
+
+GREEKS = ["delta", "gamma", "theta", "vega", "rho"]
+
+
+def _random_chain(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return {
+        "spot": rng.uniform(10, 120, n),
+        "strike": rng.uniform(10, 120, n),
+        "maturity": rng.uniform(0.01, 2.0, n),
+        "volatility": rng.uniform(0.05, 1.2, n),
+        "risk_free_rate": rng.uniform(0.0, 0.15, n),
+        "dividend_yield": rng.uniform(0.0, 0.08, n),
+        "option_type": np.where(rng.random(n) < 0.5, "CALL", "PUT"),
+    }
+
+
+def test_batch_matches_scalar():
+    chain = _random_chain(500)
+    # Include expired and zero-vol rows, which take the intrinsic branch
+    chain["maturity"][:5] = 0.0
+    chain["volatility"][5:10] = 0.0
+
+    batch = calculate_black_scholes_batch(**chain)
+
+    for i in range(500):
+        scalar = calculate_black_scholes(
+            chain["spot"][i], chain["strike"][i], chain["maturity"][i],
+            chain["volatility"][i], chain["risk_free_rate"][i],
+            chain["option_type"][i], chain["dividend_yield"][i]
+        )
+        for field in ["price", "intrinsic_value", "time_value"]:
+            assert abs(batch[field][i] - scalar[field]) < 1e-10
+        # The scalar path rounds greeks to 4 decimals
+        for greek in GREEKS:
+            assert abs(batch[greek][i] - scalar["greeks"][greek]) <= 5e-5 + 1e-10
+
+
+def test_batch_broadcasts_scalars():
+    strikes = np.array([90.0, 100.0, 110.0])
+    batch = calculate_black_scholes_batch(100.0, strikes, 1.0, 0.2, 0.05, "CALL")
+    assert batch["price"].shape == (3,)
+    assert abs(batch["price"][1] - 10.4506) < 1e-3
+    assert np.all(np.diff(batch["price"]) < 0)
+
+
+def test_batch_zero_spot_has_finite_greeks():
+    result = calculate_black_scholes_batch([0.0, 0.0], 30.0, 0.5, 0.3, 0.1, ['CALL', 'PUT'])
+    assert all(np.isfinite(column).all() for column in result.values())
+    assert result["gamma"].tolist() == [0.0, 0.0]
+    assert np.allclose(result["price"], [0.0, 30.0 * np.exp(-0.05)])
+
+
+def test_implied_volatility_batch_round_trip():
+    chain = _random_chain(2000, seed=11)
+    prices = calculate_black_scholes_batch(**chain)["price"]
+
+    result = calculate_implied_volatility_batch(
+        prices, chain["spot"], chain["strike"], chain["maturity"],
+        chain["risk_free_rate"], chain["option_type"], chain["dividend_yield"]
+    )
+    iv = result["implied_volatility"]
+    converged = result["converged"]
+
+    # Far-from-the-money contracts with negligible vega pin down vol only loosely
+    vega = calculate_black_scholes_batch(**chain)["vega"]
+    recoverable = vega > 1e-4
+    assert converged[recoverable].all()
+    assert np.allclose(iv[recoverable], chain["volatility"][recoverable], atol=1e-6)
+    assert np.isnan(iv[~converged]).all()
+
+
+def test_implied_volatility_batch_flags_arbitrage():
+    # Below intrinsic, above the spot bound and expired: no solution
+    result = calculate_implied_volatility_batch(
+        [5.0, 150.0, 3.0, 10.4506], 100.0, [90.0, 100.0, 100.0, 100.0],
+        [1.0, 1.0, 0.0, 1.0], 0.05, "CALL"
+    )
+    assert result["converged"].tolist() == [False, False, False, True]
+    assert abs(result["implied_volatility"][3] - 0.2) < 1e-4
+
+
+def test_payoff_batch_matches_records():
+    prices = np.linspace(20.0, 60.0, 101)
+    records = calculate_payoff(prices, 40.0, 2.5, 'PUT', 'SHORT')
+    batch = calculate_payoff_batch(prices, 40.0, 2.5, 'PUT', 'SHORT')
+    assert [r["payoff"] for r in records] == np.round(batch["payoff"], 2).tolist()
+    assert records[0] == {"price": 20.0, "payoff": -17.5, "intrinsic": 20.0}
+
+
+def test_downsample_keeps_ends_and_kink():
+    idx = downsample_indices(1_000_001, 200, keep=[123_457])
+    assert idx[0] == 0 and idx[-1] == 1_000_000
+    assert 123_457 in idx
+    assert len(idx) <= 200 and (np.diff(idx) > 0).all()
+    assert (downsample_indices(50, 200) == np.arange(50)).all()
+
+
+def test_d1_d2_scalar_degenerate_inputs_do_not_raise():
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for time, vol in ((0.0, 0.3), (0.5, 0.0), (-0.1, 0.3)):
+            d1, d2 = calculate_d1_d2(40.0, 38.0, time, 0.1, vol)
+            assert not np.isfinite(d1) or not np.isfinite(d2)
+    assert np.allclose(calculate_d1_d2(40.0, 38.0, 0.5, 0.1, 0.3), calculate_d1_d2(np.float64(40.0), 38.0, 0.5, 0.1, np.array(0.3)))
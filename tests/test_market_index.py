@@ -0,0 +1,87 @@
+import pandas as pd
+
+import backend.data_fetcher as data_fetcher
+from backend.b3_calendar import next_trading_day
+from backend.data_fetcher import B3DataFetcher, OPTION_COLUMNS
+from backend.market_index import OptionChainIndex
+from tests.b3_samples import TRADING_DATE, fake_cotahist, fake_fetch_day
+
+
+def option_rows():
+    df = fake_cotahist(TRADING_DATE)
+    return df[df['TIPO_DE_MERCADO'] != 'VISTA'][OPTION_COLUMNS].iloc[::-1]
+
+
+def test_index_slices_by_underlying_root():
+    index = OptionChainIndex(option_rows())
+
+    assert sorted(index.roots()) == ['PETR', 'VALE']
+    assert index.options_for('PETR4')['CODIGO_DE_NEGOCIACAO'].tolist() == ['PETRS350', 'PETRG350']
+    assert index.options_for('VALE3')['CODIGO_DE_NEGOCIACAO'].str.startswith('VALE').all()
+    assert index.export_for('ITUB4').empty
+
+
+def test_export_matches_legacy_record_shape():
+    index = OptionChainIndex(option_rows())
+    records = index.export_for('PETR4').to_dict('records')
+
+    call = next(r for r in records if r['symbol'] == 'PETRG350')
+    assert call == {
+        "symbol": "PETRG350",
+        "strike": 35.0,
+        "price": 1.2,
+        "type": "CALL",
+        "maturity_date": "2025-07-18",
+        "volume": 1000.0,
+    }
+
+
+def test_get_options_for_symbol_uses_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_fetcher.cotahist, "fetch_day", fake_fetch_day)
+    monkeypatch.setattr(data_fetcher, "get_latest_workday", lambda: TRADING_DATE)
+    fetcher = B3DataFetcher(cache_dir=str(tmp_path))
+    monkeypatch.setattr(fetcher, "fetch_frame_with_rb3", lambda symbol: pd.DataFrame())
+
+    options = fetcher.get_options_for_symbol('VALE3')
+    assert sorted(o['type'] for o in options) == ['CALL', 'PUT']
+
+
+def test_spot_quotes_come_from_the_same_load(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_get(date, **kwargs):
+        calls.append(date)
+        return fake_fetch_day(date, **kwargs)
+
+    monkeypatch.setattr(data_fetcher.cotahist, "fetch_day", fake_get)
+    monkeypatch.setattr(data_fetcher, "get_latest_workday", lambda: TRADING_DATE)
+    fetcher = B3DataFetcher(cache_dir=str(tmp_path))
+
+    assert fetcher.get_asset_price('petr4') == 36.85
+    assert fetcher.get_asset_price('ITUB4') is None
+    assert len(fetcher.fetch_data()) == 4
+
+    [asset] = fetcher.get_assets(['PETR4', 'ITUB4'])
+    assert asset['name'] == 'PETROBRAS PN'
+    assert (asset['open'], asset['high'], asset['low'], asset['volume']) == (36.2, 37.1, 36.0, 1.25e8)
+    # Previous day not loaded: change is against the open
+    assert asset['close'] == 36.2 and asset['change'] == 0.65
+    assert calls == [TRADING_DATE]
+
+
+def test_assets_compare_against_the_fetched_day(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_fetcher.cotahist, "fetch_day", fake_fetch_day)
+    monkeypatch.setattr(data_fetcher, "get_latest_workday", lambda: TRADING_DATE)
+    fetcher = B3DataFetcher(cache_dir=str(tmp_path))
+    fetch_index = fetcher.fetch_index
+
+    def racing_fetch_index(date=None):
+        index = fetch_index(date)
+        # Another thread moves cached_date to the next session, whose previous day is in memory
+        fetcher.cached_date = next_trading_day(TRADING_DATE)
+        return index
+
+    monkeypatch.setattr(fetcher, "fetch_index", racing_fetch_index)
+    [asset] = fetcher.get_assets(['PETR4'])
+    # TRADING_DATE's own previous session is not loaded, so the change is still against the open
+    assert asset['close'] == 36.2 and asset['change'] == 0.65
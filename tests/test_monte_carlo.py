@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from backend.logic import calculate_black_scholes_batch
+from backend.monte_carlo import Leg, MarketModel, simulate
+
+MODEL = MarketModel(spot=100.0, volatility=0.3, risk_free_rate=0.1, maturity=0.5, dividend_yield=0.02)
+
+
+def test_european_strategy_matches_black_scholes():
+    # Bull call spread plus a short put
+    legs = [Leg('CALL', 100.0), Leg('CALL', 110.0, -1.0), Leg('PUT', 90.0, -2.0)]
+    result = simulate(MODEL, legs, paths=200_000, seed=7, workers=1)
+    exact = calculate_black_scholes_batch(
+        100.0, np.array([100.0, 110.0, 90.0]), 0.5, 0.3, 0.1, np.array(['CALL', 'CALL', 'PUT']), 0.02
+    )
+    quantity = np.array([1.0, -1.0, -2.0])
+    assert result["time_steps"] == 1
+    assert abs(result["price"] - quantity @ exact["price"]) < 4 * result["std_error"]
+    for greek in ("delta", "gamma", "vega", "rho"):
+        error = result["greeks_std_error"][greek]
+        assert abs(result["greeks"][greek] - quantity @ exact[greek]) < max(4 * error, 1e-4)
+
+
+def test_barrier_parity_and_asian_discount():
+    vanilla = simulate(MODEL, [Leg('CALL', 105.0)], paths=50_000, time_steps=32, seed=3, workers=1)
+    knock_out = simulate(MODEL, [Leg('CALL', 105.0, 1.0, 'DOWN_AND_OUT', 90.0)], 50_000, 32, seed=3, workers=1)
+    knock_in = simulate(MODEL, [Leg('CALL', 105.0, 1.0, 'DOWN_AND_IN', 90.0)], 50_000, 32, seed=3, workers=1)
+    # A barrier never reached is the vanilla simulated on the same 32-date paths
+    monitored = simulate(MODEL, [Leg('CALL', 105.0, 1.0, 'UP_AND_OUT', 1e9)], 50_000, 32, seed=3, workers=1)
+    assert abs(knock_out["price"] + knock_in["price"] - monitored["price"]) < 1e-9
+    assert 0 < knock_in["price"] < knock_out["price"] < vanilla["price"] + 4 * vanilla["std_error"]
+
+    asian = simulate(MODEL, [Leg('CALL', 105.0, 1.0, 'ASIAN')], 50_000, 32, seed=3, workers=1)
+    assert asian["price"] < vanilla["price"]
+    assert 0 < asian["greeks"]["delta"] < vanilla["greeks"]["delta"]
+
+
+def test_seeded_results_do_not_depend_on_workers(monkeypatch):
+    import backend.monte_carlo as monte_carlo
+    monkeypatch.setattr(monte_carlo, "MC_CHUNK_ELEMENTS", 4096)
+    legs = [Leg('PUT', 95.0, 1.0, 'ASIAN')]
+    inline = simulate(MODEL, legs, paths=20_000, time_steps=16, seed=11, workers=1)
+    pooled = simulate(MODEL, legs, paths=20_000, time_steps=16, seed=11, workers=2)
+    assert inline == pooled
+    # One long-lived pool of exactly `workers` processes serves every call of that size until shutdown
+    pool = monte_carlo._pools[2]
+    assert pool._max_workers == 2 and pool._mp_context.get_start_method() == monte_carlo.MC_START_METHOD
+    assert simulate(MODEL, legs, paths=20_000, time_steps=16, seed=11, workers=2) == pooled
+    assert monte_carlo._pools[2] is pool
+    monte_carlo.shutdown_pool()
+    assert monte_carlo._pools == {}
+    assert simulate(MODEL, legs, paths=20_000, time_steps=16, seed=12, workers=1)["price"] != inline["price"]
+
+
+def test_path_steps_are_capped():
+    legs = [Leg('CALL', 100.0, 1.0, 'ASIAN')]
+    with pytest.raises(ValueError):
+        simulate(MODEL, legs, paths=1_000_000, time_steps=1_000)
@@ -0,0 +1,67 @@
+import numpy as np
+
+from backend.logic import calculate_black_scholes_batch
+from backend.portfolio import EXPOSURE_FIELDS, Portfolio, Position
+
+
+def _book(n, seed=3):
+    rng = np.random.default_rng(seed)
+    return [
+        Position(
+            id=str(i),
+            underlying=('PETR4', 'VALE3', 'BOVA11')[i % 3],
+            type='CALL' if rng.random() < 0.5 else 'PUT',
+            spot=(38.0, 60.0, 120.0)[i % 3],
+            strike=float(rng.uniform(0.8, 1.2) * (38.0, 60.0, 120.0)[i % 3]),
+            maturity=float(rng.uniform(0.0, 1.0)),
+            volatility=float(rng.uniform(0.15, 0.5)),
+            risk_free_rate=0.105,
+            quantity=float(rng.integers(-20, 21)),
+            multiplier=100.0
+        )
+        for i in range(n)
+    ]
+
+
+def _close(a, b):
+    assert a["positions"] == b["positions"]
+    assert all(np.isclose(a[f], b[f], rtol=1e-12, atol=1e-9) for f in EXPOSURE_FIELDS)
+
+
+def test_exposures_sum_scaled_greeks_per_underlying():
+    positions = _book(300)
+    book = Portfolio()
+    book.load(positions)
+    result = calculate_black_scholes_batch(
+        [p.spot for p in positions], [p.strike for p in positions], [p.maturity for p in positions],
+        [p.volatility for p in positions], 0.105, [p.type for p in positions]
+    )
+    weight = np.array([p.quantity * p.multiplier for p in positions])
+    exposures = book.exposures()
+    for field in EXPOSURE_FIELDS:
+        assert np.isclose(exposures["total"][field], result[field] @ weight)
+    vale = np.array([p.underlying == 'VALE3' for p in positions])
+    assert exposures["underlyings"]["VALE3"]["positions"] == 100
+    assert np.isclose(exposures["underlyings"]["VALE3"]["delta"], result["delta"][vale] @ weight[vale])
+
+
+def test_incremental_updates_match_a_full_reload():
+    positions = _book(200)
+    book = Portfolio()
+    book.load(positions)
+    book.set_spot('PETR4', 40.0)
+    book.upsert([positions[4]._replace(quantity=-7.0), positions[0]._replace(id='new', underlying='ITUB4')])
+    book.remove('10')
+    book.remove('new')
+
+    expected = [p._replace(spot=40.0) if p.underlying == 'PETR4' else p for p in positions]
+    expected[4] = expected[4]._replace(quantity=-7.0)
+    del expected[10]
+    reference = Portfolio()
+    reference.load(expected)
+
+    got, want = book.exposures(), reference.exposures()
+    _close(got["total"], want["total"])
+    assert got["underlyings"].keys() == want["underlyings"].keys()
+    for name in want["underlyings"]:
+        _close(got["underlyings"][name], want["underlyings"][name])
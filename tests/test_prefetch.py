@@ -0,0 +1,44 @@
+import datetime
+
+import backend.data_fetcher as data_fetcher
+from backend.data_fetcher import B3DataFetcher
+from backend.prefetch import Prefetcher, expected_trading_date
+from tests.b3_samples import fake_fetch_day
+
+FRIDAY = datetime.date(2025, 6, 13)
+MONDAY = datetime.date(2025, 6, 16)
+
+
+def test_expected_trading_date_respects_close_and_weekends():
+    assert expected_trading_date(datetime.datetime(2025, 6, 16, 20)) == MONDAY
+    assert expected_trading_date(datetime.datetime(2025, 6, 16, 10)) == FRIDAY
+    assert expected_trading_date(datetime.datetime(2025, 6, 15, 21)) == FRIDAY
+
+
+def test_prefetch_swaps_in_new_day_once_published(tmp_path, monkeypatch):
+    published = {FRIDAY}
+    downloads = []
+
+    def fake_get(date, **kwargs):
+        downloads.append(date)
+        if date not in published:
+            raise FileNotFoundError(date)
+        return fake_fetch_day(date, **kwargs)
+
+    monkeypatch.setattr(data_fetcher.cotahist, "fetch_day", fake_get)
+    fetcher = B3DataFetcher(cache_dir=str(tmp_path))
+    prefetcher = Prefetcher(fetcher)
+
+    # Monday evening before the file is out: fall back to Friday and keep serving it
+    assert prefetcher.run_once(datetime.datetime(2025, 6, 16, 19, 30)) == FRIDAY
+    assert fetcher.latest_date == FRIDAY
+    assert prefetcher.run_once(datetime.datetime(2025, 6, 16, 19, 40)) == FRIDAY
+
+    published.add(MONDAY)
+    assert prefetcher.run_once(datetime.datetime(2025, 6, 16, 19, 50)) == MONDAY
+
+    # The first user request after the swap is a cache hit, no download
+    downloads.clear()
+    assert len(fetcher.fetch_data()) == 4
+    assert downloads == []
+    assert fetcher.memory_cache.stats()["hits"] >= 1
@@ -0,0 +1,91 @@
+import datetime
+import sys
+import tempfile
+import textwrap
+
+import pytest
+
+from backend.rb3_worker import RWorkerError, RWorkerPool
+
+# Python stand-in for scripts/rb3_worker.R speaking the same line protocol
+FAKE_WORKER = textwrap.dedent('''
+    import sys, time
+    for line in sys.stdin:
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == "QUIT":
+            break
+        symbol = parts[1] if len(parts) > 1 else ""
+        if symbol == "CRASH":
+            sys.exit(1)
+        if symbol == "SLOW":
+            time.sleep(30)
+        if symbol == "BAD":
+            print("ERR ativo desconhecido", flush=True)
+            continue
+        if len(parts) > 3 and parts[2] == "FEATHER" and not symbol.endswith("CSV"):
+            import datetime, pyarrow as pa, pyarrow.feather as feather
+            table = pa.table({
+                "symbol": [f"{symbol}G350"], "strike": [35.0],
+                "maturity_date": [datetime.date(2025, 7, 18)], "type": ["Call"],
+                "price_close": [1.2], "volume": [1000.0],
+            })
+            path = line.split(None, 3)[3].strip()
+            feather.write_feather(table, path, compression="uncompressed")
+            print("OK 1 FEATHER", flush=True)
+            print(path, flush=True)
+            continue
+        rows = ["symbol,strike,maturity_date,type,price_close,volume",
+                f"{symbol}G350,35.0,2025-07-18,Call,1.2,1000"]
+        print(f"OK {len(rows)} CSV", flush=True)
+        for row in rows:
+            print(row, flush=True)
+''')
+
+
+@pytest.fixture
+def pool(tmp_path):
+    script = tmp_path / "fake_worker.py"
+    script.write_text(FAKE_WORKER)
+    pool = RWorkerPool(size=1, command=[sys.executable, str(script)], timeout=1.0)
+    yield pool
+    pool.close()
+
+
+def test_worker_serves_many_queries_from_one_process(pool):
+    assert pool.query("PETR")["symbol"].tolist() == ["PETRG350"]
+    pid = pool._workers[0].process.pid
+    assert pool.query("VALE")["symbol"].tolist() == ["VALEG350"]
+    assert pool._workers[0].process.pid == pid
+    assert pool.stats()["requests"] == 2
+
+
+def test_worker_errors_are_reported_without_restart(pool):
+    with pytest.raises(RWorkerError, match="ativo desconhecido"):
+        pool.query("BAD")
+    assert pool.stats()["restarts"] == 0
+
+
+def test_crashed_or_hung_worker_is_restarted(pool):
+    with pytest.raises(RWorkerError):
+        pool.query("CRASH")
+    assert pool.query("PETR")["symbol"].tolist() == ["PETRG350"]
+
+    with pytest.raises(RWorkerError):
+        pool.query("SLOW")
+    assert pool.query("ITUB")["symbol"].tolist() == ["ITUBG350"]
+    assert pool.stats()["restarts"] >= 2
+
+
+def test_feather_handoff_keeps_types_and_csv_fallback(pool, tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    df = pool.query("PETR")
+    assert df["maturity_date"].tolist() == [datetime.date(2025, 7, 18)]
+    assert df["volume"].dtype == "float64"
+    # The temporary Arrow file is removed once read
+    assert not list(tmp_path.glob("rb3_*.feather"))
+
+    fallback = pool.query("PETRCSV")
+    assert fallback["symbol"].tolist() == ["PETRCSVG350"]
+    assert fallback["strike"].tolist() == [35.0]
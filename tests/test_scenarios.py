@@ -0,0 +1,63 @@
+import numpy as np
+
+from backend import scenarios
+from backend.logic import black_scholes_price
+from backend.scenarios import ShockGrid, reprice
+
+GRID = ShockGrid(spot=[-0.2, 0.0, 0.15], volatility=[-0.1, 0.0, 0.05], days=[0.0, 45.0, 120.0], rate=[-0.01, 0.0, 0.02])
+
+
+def _book(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return dict(
+        spot=rng.uniform(20.0, 60.0, n),
+        strike=rng.uniform(20.0, 60.0, n),
+        maturity=rng.uniform(0.05, 1.0, n),  # Some contracts expire inside the grid
+        volatility=rng.uniform(0.15, 0.6, n),
+        risk_free_rate=0.105,
+        option_type=rng.choice(['CALL', 'PUT'], n),
+        quantity=rng.integers(-10, 11, n).astype(float),
+        dividend_yield=rng.uniform(0.0, 0.05, n),
+    )
+
+
+def test_reprice_matches_black_scholes_per_scenario():
+    book = _book(40)
+    result = reprice(grid=GRID, by_contract=True, **book)
+    base = black_scholes_price(book["spot"], book["strike"], book["maturity"], book["volatility"], 0.105,
+                               book["option_type"] == 'CALL', book["dividend_yield"])
+    assert np.isclose(result["base_value"], book["quantity"] @ base)
+    assert result["pnl"].shape == GRID.shape and result["contract_pnl"].shape == (40,) + GRID.shape
+    assert np.allclose(result["contract_pnl"].sum(axis=0), result["pnl"])
+
+    shocks = GRID.scenarios()
+    for i in range(shocks["spot"].size):
+        value = black_scholes_price(
+            book["spot"] * (1 + shocks["spot"][i]),
+            book["strike"],
+            np.maximum(book["maturity"] - shocks["days"][i] / 365.0, 0.0),
+            book["volatility"] + shocks["volatility"][i],
+            0.105 + shocks["rate"][i],
+            book["option_type"] == 'CALL',
+            book["dividend_yield"]
+        )
+        assert np.isclose(result["pnl"].ravel()[i], book["quantity"] @ (value - base), atol=1e-9)
+    assert result["worst_pnl"] == result["pnl"].min()
+
+
+def test_chunking_does_not_change_the_cube(monkeypatch):
+    book = _book(25)
+    whole = reprice(grid=GRID, by_contract=True, **book)
+    # Smaller than one spot slice, so blocks split along spot shocks and contracts
+    monkeypatch.setattr(scenarios, "SCENARIO_CHUNK_ELEMENTS", 7)
+    chunked = reprice(grid=GRID, by_contract=True, **book)
+    assert np.allclose(whole["pnl"], chunked["pnl"], rtol=0, atol=1e-9)
+    assert np.allclose(whole["contract_pnl"], chunked["contract_pnl"], rtol=0, atol=1e-9)
+
+
+def test_tiny_volatility_has_zero_base_scenario_pnl():
+    # At-the-forward strikes, where the value is linear in volatility
+    forward = 40.0 * np.exp(0.05)
+    result = reprice(40.0, forward, 0.5, [1e-6, 0.0], 0.1, ['CALL', 'PUT'], 1.0, ShockGrid(volatility=[0.0, 0.1]))
+    assert abs(result["pnl"][0, 0, 0, 0]) < 1e-12
+    assert result["pnl"][0, 1, 0, 0] > 0
@@ -0,0 +1,35 @@
+import numpy as np
+
+from backend.logic import calculate_black_scholes_batch
+from backend.strategy import Leg, strategy_grid
+
+CONDOR = [Leg('PUT', 1, 85.0, 0.5), Leg('PUT', -1, 90.0, 1.2), Leg('CALL', -1, 110.0, 1.3), Leg('CALL', 1, 115.0, 0.6)]
+
+
+def test_iron_condor_breakevens_and_bounds():
+    prices = np.linspace(70.0, 130.0, 61)
+    result = strategy_grid(CONDOR, 100.0, 0.3, 0.1, 0.25, prices, np.array([91.25, 30.0, 0.0]))
+    credit = 1.2 + 1.3 - 0.5 - 0.6
+    assert np.isclose(result["net_premium"], -credit)
+    assert result["breakevens"] == [90.0 - credit, 110.0 + credit]
+    assert np.isclose(result["max_profit"], credit)
+    assert np.isclose(result["max_loss"], credit - 5.0)
+    # The last grid row is at expiry
+    assert np.allclose(result["pnl"][-1], result["payoff"])
+    assert result["pnl"].shape == (3, 61)
+
+
+def test_grid_matches_black_scholes_and_stock_legs():
+    legs = [Leg('STOCK', 100), Leg('CALL', -100, 110.0)]
+    prices = np.array([90.0, 100.0, 120.0])
+    result = strategy_grid(legs, 100.0, 0.3, 0.1, 0.5, prices, np.array([182.5, 60.0]))
+    call_today = calculate_black_scholes_batch(100.0, 110.0, 0.5, 0.3, 0.1, 'CALL')["price"]
+    assert np.allclose(result["premiums"], [100.0, call_today])
+    # Entered at model value, so today's P&L at the current spot is zero
+    assert abs(result["pnl"][0][1]) < 1e-9
+
+    call_later = calculate_black_scholes_batch(prices, 110.0, 60 / 365, 0.3, 0.1, 'CALL')["price"]
+    assert np.allclose(result["pnl"][1], 100 * (prices - 100.0) - 100 * (call_later - call_today))
+    assert np.isclose(result["max_loss"], -100 * (100.0 - call_today))
+    assert np.isclose(result["max_profit"], 100 * (10.0 + call_today))
+    assert result["breakevens"] == [round(100.0 - float(call_today), 4)]
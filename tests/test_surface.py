@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from backend.b3_calendar import BUSINESS_DAYS_PER_YEAR
+from backend.surface import SmileSlice, VolSurface, fit_surface, fit_svi, svi_total_variance
+
+
+def test_fit_svi_recovers_a_skewed_smile():
+    k = np.linspace(-0.4, 0.3, 25)
+    params = (0.01, 0.12, -0.4, 0.02, 0.15)
+    w = svi_total_variance(k, *params)
+
+    fitted = fit_svi(k, w)
+    np.testing.assert_allclose(svi_total_variance(k, *fitted), w, atol=1e-6)
+
+
+def test_surface_interpolates_total_variance_between_expiries():
+    k = np.linspace(-0.2, 0.2, 9)
+    short = SmileSlice(21 / 252, 21, 100.0, k, np.full(9, 0.04 * 21 / 252))
+    long = SmileSlice(63 / 252, 63, 100.0, k, np.full(9, 0.09 * 63 / 252))
+    surface = VolSurface([long, short], spot=100.0, rate=0.0)
+
+    assert surface.implied_volatility(100.0, 21 / 252) == np.sqrt(0.04)
+    # Halfway in time, total variance is the average of the two slices
+    w_mid = 0.5 * (0.04 * 21 / 252 + 0.09 * 63 / 252)
+    np.testing.assert_allclose(surface.implied_volatility(100.0, 42 / 252), np.sqrt(w_mid / (42 / 252)))
+    # Outside the listed expiries the nearest smile's volatility is held
+    np.testing.assert_allclose(surface.implied_volatility([100.0, 100.0], [1 / 252, 2.0]), [0.2, 0.3])
+
+
+def test_fit_surface_from_chain_and_grid():
+    rows = []
+    for days in (20, 60):
+        for strike in np.linspace(28, 46, 13):
+            vol = 0.3 + 0.5 * np.log(strike / 37.0) ** 2
+            rows.append({"type": "CALL" if strike >= 37 else "PUT", "strike": strike,
+                         "business_days": days, "implied_volatility": vol, "vega": 0.05})
+    chain = pd.DataFrame(rows)
+
+    surface = fit_surface(chain, spot=37.0, rate=0.0)
+    assert [s.model for s in surface.slices] == ["svi", "svi"]
+    np.testing.assert_allclose(surface.implied_volatility(37.0, 20 / BUSINESS_DAYS_PER_YEAR), 0.3, atol=2e-3)
+
+    grid = surface.grid([30.0, 37.0, 44.0], [20, 40, 60])
+    assert len(grid) == 9
+    assert grid['volatility'].between(0.29, 0.35).all()
+    assert len(surface.default_grid(n_strikes=5, n_maturities=3)) == 15